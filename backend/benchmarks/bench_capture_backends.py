@@ -0,0 +1,79 @@
+# benchmarks/bench_capture_backends.py
+"""
+Membandingkan biaya CPU capture antara cv2.VideoCapture dan PyAV (scale di decoder).
+
+Setiap skenario membaca stream/file selama --duration detik, men-decode 1 dari --every frame
+ke BGR (sama seperti FRAME_SKIP di worker), lalu melaporkan frame/detik dan CPU proses.
+
+Contoh:
+    python benchmarks/bench_capture_backends.py --url rtsp://10.0.0.5:7447/abc --decode-width 960
+    python benchmarks/bench_capture_backends.py --url sample_1440p.mp4 --every 15
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import time
+import cv2
+import psutil
+
+from core.video_source import PyAVSource, av
+
+def run(name, cap, duration, every, use_grab):
+    proc = psutil.Process()
+    cpu_start = proc.cpu_times()
+    wall_start = time.time()
+    grabbed = decoded = 0
+    shape = None
+
+    while time.time() - wall_start < duration:
+        keep = grabbed % every == 0
+        if use_grab:
+            if not cap.grab():
+                break
+            if keep:
+                ok, frame = cap.retrieve()
+                if not ok:
+                    break
+                decoded += 1
+                shape = frame.shape
+        else:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            decoded += 1
+            shape = frame.shape
+        grabbed += 1
+
+    wall = time.time() - wall_start
+    cpu_end = proc.cpu_times()
+    cpu = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    cap.release()
+    print(f"{name:<32} | {grabbed / wall:7.1f} frame/s | decoded {decoded:5d} | "
+          f"CPU {cpu / wall * 100:6.1f}% | {cpu / max(grabbed, 1) * 1000:6.2f} ms CPU/frame | out {shape}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", required=True, help="URL RTSP atau file video")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--every", type=int, default=15, help="Decode 1 dari N frame (FRAME_SKIP)")
+    parser.add_argument("--decode-width", type=int, default=960)
+    args = parser.parse_args()
+
+    os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'rtsp_transport;tcp'
+
+    run("opencv read() semua frame", cv2.VideoCapture(args.url, cv2.CAP_FFMPEG), args.duration, args.every, False)
+    run("opencv grab()/retrieve()", cv2.VideoCapture(args.url, cv2.CAP_FFMPEG), args.duration, args.every, True)
+
+    if av is None:
+        print("PyAV tidak terpasang, skenario pyav dilewati (pip install av).")
+    else:
+        run("pyav resolusi penuh", PyAVSource(args.url), args.duration, args.every, True)
+        run(f"pyav scale ke {args.decode_width}px", PyAVSource(args.url, decode_width=args.decode_width),
+            args.duration, args.every, True)
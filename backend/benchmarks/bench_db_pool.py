@@ -0,0 +1,61 @@
+# benchmarks/bench_db_pool.py
+"""
+Latensi GET /api/dashboard/summary-today dengan dan tanpa pool koneksi PostgreSQL.
+Request dijalankan lewat Flask test client (tanpa HTTP server) dengan token super_admin.
+
+Contoh:
+    python benchmarks/bench_db_pool.py --requests 200 --concurrency 4
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app
+from db import db_config
+from utils.jwt_utils import create_access_token
+
+def run(label, total, concurrency, token):
+    def one(_):
+        client = app.test_client()
+        client.set_cookie("access_token", token)
+        started = time.perf_counter()
+        resp = client.get("/api/dashboard/summary-today")
+        elapsed = (time.perf_counter() - started) * 1000
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code}: {resp.get_data(as_text=True)}")
+        return elapsed
+
+    one(None)  # warmup (pool: membuat koneksi pertama)
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        latencies = sorted(ex.map(one, range(total)))
+    wall = time.perf_counter() - wall
+
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<10} | n={total} c={concurrency} | mean {statistics.mean(latencies):7.1f} ms | "
+          f"p50 {statistics.median(latencies):7.1f} ms | p95 {p95:7.1f} ms | {total / wall:6.1f} req/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": "0", "role": "super_admin"})
+
+    db_config.set_pool_enabled(False)
+    run("no-pool", args.requests, args.concurrency, token)
+
+    db_config.set_pool_enabled(True)
+    run("pool", args.requests, args.concurrency, token)
+    print(f"pool stats: {db_config.pool_stats()}")
@@ -0,0 +1,86 @@
+# benchmarks/bench_inference_backends.py
+"""
+Membandingkan backend inferensi (PyTorch .pt vs ONNX Runtime vs OpenVINO) pada folder frame contoh:
+  - latensi per frame (p50 / p95 / rata-rata) dan frame/detik pada --batch tertentu
+  - paritas akurasi terhadap model pertama (referensi): deteksi dicocokkan per kelas dengan IoU >= --iou,
+    dilaporkan recall / precision terhadap referensi, rata-rata IoU dan selisih confidence.
+
+Contoh:
+    python benchmarks/bench_inference_backends.py --frames samples/ \\
+        --models model/ppe_detection_yolov12.pt model/ppe_detection_yolov12.onnx model/ppe_detection_yolov12_openvino_model
+    python benchmarks/bench_inference_backends.py --frames samples/ --models a.pt a.onnx --batch 4 --threads 2
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import statistics
+
+from tools._eval import load_dir_frames, match, run_model
+
+def load_frames(folder, limit):
+    frames = [f for _, f in load_dir_frames(folder, limit) if f is not None]
+    if not frames:
+        raise SystemExit(f"Tidak ada gambar di {folder}")
+    return frames
+
+def parity(reference, outputs, iou_threshold):
+    pairs, n_ref, n_cand = [], 0, 0
+    for ref, cand in zip(reference, outputs):
+        n_ref += len(ref)
+        n_cand += len(cand)
+        pairs.extend(match(ref, cand, iou_threshold))
+    matched = len(pairs)
+    return {
+        "recall": matched / n_ref if n_ref else 1.0,
+        "precision": matched / n_cand if n_cand else 1.0,
+        "mean_iou": statistics.mean(p[0] for p in pairs) if pairs else 0.0,
+        "mean_conf_diff": statistics.mean(p[1] for p in pairs) if pairs else 0.0,
+        "detections": n_cand,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", required=True, help="Folder gambar contoh (frame CCTV)")
+    parser.add_argument("--models", nargs="+", required=True, help="Path model; yang pertama menjadi referensi paritas")
+    parser.add_argument("--limit", type=int, default=200, help="Maksimum jumlah frame (0 = semua)")
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU minimum agar dua deteksi dianggap sama")
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=0, help="Batasi thread torch / ONNX Runtime / OpenVINO")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        # Harus sebelum torch / onnxruntime dimuat
+        os.environ["OMP_NUM_THREADS"] = os.environ["MKL_NUM_THREADS"] = str(args.threads)
+        from core.inference_pool import pin_process
+        pin_process(args.threads)
+
+    frames = load_frames(args.frames, args.limit)
+    print(f"{len(frames)} frame dari {args.frames}, batch {args.batch}, conf {args.conf}\n")
+    print(f"{'model':<50} | {'p50':>7} | {'p95':>7} | {'mean':>7} | {'fps':>7} | "
+          f"{'recall':>6} | {'prec':>6} | {'IoU':>5} | {'dconf':>6} | det")
+
+    reference = None
+    ref_names = None
+    for path in args.models:
+        detector, outputs, latencies, fps = run_model(path, frames, args.conf, args.batch, args.warmup)
+        ordered = sorted(latencies)
+        row = (f"{path[-50:]:<50} | {statistics.median(ordered):7.1f} | {ordered[int(len(ordered) * 0.95)]:7.1f} | "
+               f"{statistics.mean(ordered):7.1f} | {fps:7.2f}")
+        if reference is None:
+            reference, ref_names = outputs, detector.names
+            print(f"{row} | {'(referensi)':>38} | {sum(len(o) for o in outputs)}")
+            continue
+        p = parity(reference, outputs, args.iou)
+        print(f"{row} | {p['recall']:6.3f} | {p['precision']:6.3f} | {p['mean_iou']:5.3f} | "
+              f"{p['mean_conf_diff']:6.3f} | {p['detections']}")
+        if detector.names != ref_names:
+            print(f"  PERINGATAN: nama kelas berbeda dari referensi: {detector.names}")
@@ -0,0 +1,100 @@
+# benchmarks/bench_inference_pool.py
+"""
+Sweep ukuran inference pool x thread torch per member untuk mencari throughput optimum di host ini (CPU).
+Setiap kombinasi menjalankan N proses member yang di-pin ke set core masing-masing (sama seperti
+workers/inference_pool.py), masing-masing memanggil detect terus-menerus pada frame yang sama.
+
+Contoh:
+    python benchmarks/bench_inference_pool.py --sizes 1 2 4 8 --threads 1 2 4 --duration 20
+    python benchmarks/bench_inference_pool.py --source sample.jpg --oversubscribe   # termasuk size x threads > core
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import multiprocessing as mp
+import statistics
+import time
+
+from core.inference_pool import physical_cores, plan_members, format_cpus
+
+def _member(threads, cpus, source, duration, results, ready, go):
+    # Env thread harus di-set sebelum torch di-import (proses spawn baru)
+    os.environ["OMP_NUM_THREADS"] = os.environ["MKL_NUM_THREADS"] = str(threads)
+    from core.inference_pool import pin_process
+    pin_process(threads, cpus)
+
+    from config import MODEL_PATH
+    from core.detector import LocalDetector
+    from benchmarks.bench_inference_server import load_frame
+    detector = LocalDetector(MODEL_PATH, 'cpu')
+    frame = load_frame(source)
+    detector.detect(0, frame, 0.5)  # warmup
+    ready.release()
+    go.wait()
+
+    latencies = []
+    end = time.time() + duration
+    while time.time() < end:
+        started = time.perf_counter()
+        detector.detect(0, frame, 0.5)
+        latencies.append((time.perf_counter() - started) * 1000)
+    results.put(latencies)
+
+def run_combo(size, threads, source, duration):
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    ready = ctx.Semaphore(0)
+    go = ctx.Event()
+    core_sets = plan_members(size, threads)
+    procs = [ctx.Process(target=_member, args=(threads, cpus, source, duration, results, ready, go))
+             for cpus in core_sets]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.acquire()
+
+    go.set()
+    latencies = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    frames = sum(len(l) for l in latencies)
+    merged = sorted(x for l in latencies for x in l)
+    p50 = statistics.median(merged) if merged else 0.0
+    p95 = merged[int(len(merged) * 0.95)] if merged else 0.0
+    fps = frames / duration
+    pinned = " ".join(f"[{format_cpus(c)}]" for c in core_sets) if any(core_sets) else "tanpa pinning"
+    print(f"{size:>4} x {threads:<3} | {fps:8.2f} frame/s | {fps / size:6.2f} per member | "
+          f"p50 {p50:7.1f} ms | p95 {p95:7.1f} ms | {pinned}")
+    return fps
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--source", default=None, help="Gambar contoh (default: noise 2560x1440)")
+    parser.add_argument("--oversubscribe", action="store_true", help="Jalankan juga kombinasi size x threads > core fisik")
+    args = parser.parse_args()
+
+    cores = physical_cores()
+    print(f"Core fisik: {cores}")
+    print("size x thr | throughput        | per member       | latensi")
+    best = None
+    for size in args.sizes:
+        for threads in args.threads:
+            if size * threads > cores and not args.oversubscribe:
+                continue
+            fps = run_combo(size, threads, args.source, args.duration)
+            if best is None or fps > best[0]:
+                best = (fps, size, threads)
+
+    if best:
+        print(f"\nOptimum: INFERENCE_POOL_SIZE={best[1]} INFERENCE_POOL_THREADS={best[2]} ({best[0]:.2f} frame/s)")
@@ -0,0 +1,123 @@
+# benchmarks/bench_inference_server.py
+"""
+Membandingkan throughput (frame/detik) dan total RSS antara:
+  - layout lama : N proses, masing-masing memuat model YOLO sendiri (model.track per frame)
+  - layout baru : 1 inference server (batch dinamis) + N proses client ringan
+
+Contoh:
+    python benchmarks/bench_inference_server.py --cameras 8 --duration 30 --source sample.jpg
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import multiprocessing as mp
+import subprocess
+import time
+import cv2
+import numpy as np
+import psutil
+
+def load_frame(source, width=2560, height=1440):
+    if source:
+        frame = cv2.imread(source)
+        if frame is None:
+            raise SystemExit(f"Tidak bisa membaca gambar: {source}")
+        return frame
+    # Tanpa sumber gambar: noise (tidak ada objek, tapi biaya inferensi tetap sama)
+    return np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+
+def _camera_local(cctv_id, source, duration, counter, ready, go):
+    from config import MODEL_PATH
+    from core.detector import LocalDetector
+    detector = LocalDetector(MODEL_PATH, 'cpu')
+    frame = load_frame(source)
+    detector.detect(cctv_id, frame, 0.5)  # warmup
+    ready.release()
+    go.wait()
+    end = time.time() + duration
+    while time.time() < end:
+        detector.detect(cctv_id, frame, 0.5)
+        with counter.get_lock():
+            counter.value += 1
+    time.sleep(1.0)  # beri waktu pengukuran RSS sebelum proses keluar
+
+def _camera_client(cctv_id, source, duration, counter, ready, go, address):
+    from core.inference_client import InferenceClient
+    client = InferenceClient(address)
+    frame = load_frame(source)
+    client.detect(cctv_id, frame, 0.5)  # warmup + handshake
+    ready.release()
+    go.wait()
+    end = time.time() + duration
+    while time.time() < end:
+        client.detect(cctv_id, frame, 0.5)
+        with counter.get_lock():
+            counter.value += 1
+    time.sleep(1.0)
+
+def _wait_for_server(address, timeout=120):
+    from utils import ipc
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            ipc.connect(address, timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise SystemExit("Inference server tidak siap.")
+
+def run_layout(name, target, extra_args, cameras, source, duration, extra_pids=()):
+    ctx = mp.get_context("spawn")
+    counter = ctx.Value("i", 0)
+    ready = ctx.Semaphore(0)
+    go = ctx.Event()
+    procs = [ctx.Process(target=target, args=(i + 1, source, duration, counter, ready, go, *extra_args))
+             for i in range(cameras)]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.acquire()
+
+    go.set()
+    time.sleep(duration * 0.8)
+    pids = [p.pid for p in procs] + list(extra_pids)
+    rss_mb = sum(psutil.Process(pid).memory_info().rss for pid in pids if psutil.pid_exists(pid)) / 1024 / 1024
+    for p in procs:
+        p.join()
+
+    fps = counter.value / duration
+    print(f"{name:<28} | cameras {cameras:>3} | {fps:8.2f} frame/s | {fps / cameras:6.2f} per cam | RSS {rss_mb:8.0f} MB")
+    return fps, rss_mb
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--source", default=None, help="Gambar contoh (default: noise 2560x1440)")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-latency-ms", type=float, default=30)
+    parser.add_argument("--address", default="/tmp/cctv_inference_bench.sock")
+    args = parser.parse_args()
+
+    run_layout("one-model-per-process", _camera_local, (), args.cameras, args.source, args.duration)
+
+    server = subprocess.Popen([
+        sys.executable, os.path.join(backend_dir, "workers", "inference_server.py"),
+        "--address", args.address,
+        "--max-batch", str(args.max_batch),
+        "--max-latency-ms", str(args.max_latency_ms),
+    ], cwd=backend_dir)
+    try:
+        _wait_for_server(args.address)
+        run_layout("shared-inference-server", _camera_client, (args.address,), args.cameras,
+                   args.source, args.duration, extra_pids=(server.pid,))
+    finally:
+        server.terminate()
+        server.wait()
@@ -0,0 +1,67 @@
+# benchmarks/bench_roi_crop.py
+"""
+Waktu inferensi YOLO pada frame penuh vs crop ROI dengan berbagai rasio luas (area crop / area frame).
+Crop diambil di tengah frame dengan aspek yang sama, persis seperti worker memotong bounding box gabungan ROI.
+
+Contoh:
+    python benchmarks/bench_roi_crop.py --source sample_1440p.jpg --iterations 30
+    python benchmarks/bench_roi_crop.py --ratios 1 0.5 0.25 0.1 --device cuda
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import statistics
+import time
+import cv2
+import numpy as np
+
+from config import MODEL_PATH, CONFIDENCE_THRESHOLD
+from core.detector import LocalDetector
+
+def center_crop(frame, ratio):
+    h, w = frame.shape[:2]
+    side = ratio ** 0.5
+    cw, ch = max(32, int(w * side)), max(32, int(h * side))
+    x1, y1 = (w - cw) // 2, (h - ch) // 2
+    return frame[y1:y1 + ch, x1:x1 + cw]
+
+def run(detector, frame, iterations):
+    detector.detect(0, frame, CONFIDENCE_THRESHOLD)  # warmup
+    times = []
+    count = 0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        count = len(detector.detect(0, frame, CONFIDENCE_THRESHOLD))
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", help="Gambar uji (default: noise 2560x1440)")
+    parser.add_argument("--ratios", type=float, nargs="+", default=[1.0, 0.75, 0.5, 0.25, 0.1])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    if args.source:
+        frame = cv2.imread(args.source)
+        if frame is None:
+            raise SystemExit(f"Tidak bisa membaca gambar: {args.source}")
+    else:
+        frame = np.random.randint(0, 255, (1440, 2560, 3), dtype=np.uint8)
+
+    detector = LocalDetector(MODEL_PATH, args.device)
+    baseline = None
+    print(f"{'rasio area':>10} | {'input':>11} | {'median ms':>9} | {'speedup':>7} | deteksi")
+    for ratio in args.ratios:
+        crop = center_crop(frame, ratio)
+        ms, count = run(detector, crop, args.iterations)
+        baseline = baseline or ms
+        print(f"{ratio:10.2f} | {crop.shape[1]:>5}x{crop.shape[0]:<5} | {ms:9.1f} | {baseline / ms:6.2f}x | {count}")
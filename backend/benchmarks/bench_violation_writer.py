@@ -0,0 +1,65 @@
+# benchmarks/bench_violation_writer.py
+"""
+Throughput penulisan pelanggaran: 2 statement per baris (cara lama) vs batch execute_values (ViolationBatchWriter).
+
+Data sintetis ditulis ke violation_detection + violation_daily_log dalam transaksi yang di-ROLLBACK
+di akhir setiap skenario, jadi aman dijalankan di DB development. Pakai --commit untuk menyertakan biaya COMMIT
+per baris (cara lama) / per batch (baru) — data benar-benar tersimpan.
+
+Contoh:
+    python benchmarks/bench_violation_writer.py --cctv-id 1 --class-name no_helmet --rows 1000 --batch 200
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import time
+
+import services.config_service as config_service
+from db.db_config import get_connection
+from core.violation_writer import insert_violations, _resolve_class_ids
+
+def make_records(n, cctv_id, class_name):
+    now = time.time()
+    return [
+        {"cctv_id": cctv_id, "class_name": class_name, "public_url": f"bench://{i}.jpg", "detected_at": now - i}
+        for i in range(n)
+    ]
+
+def run(label, records, chunk, commit):
+    class_ids = _resolve_class_ids(records)
+    conn = get_connection()
+    cur = conn.cursor()
+    started = time.perf_counter()
+    try:
+        for i in range(0, len(records), chunk):
+            insert_violations(cur, records[i:i + chunk], class_ids)
+            if commit:
+                conn.commit()
+        elapsed = time.perf_counter() - started
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+    print(f"{label:<28} | {len(records)} baris | {elapsed * 1000:8.1f} ms | {len(records) / elapsed:8.1f} rows/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cctv-id", type=int, required=True)
+    parser.add_argument("--class-name", required=True, help="Nama kelas yang ada di object_class")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--commit", action="store_true", help="COMMIT setiap baris/batch (data tersimpan)")
+    args = parser.parse_args()
+
+    config_service.load_object_classes(force_refresh=True)
+    records = make_records(args.rows, args.cctv_id, args.class_name)
+
+    run("per baris (2 statement)", records, 1, args.commit)
+    run(f"batch {args.batch}", records, args.batch, args.commit)
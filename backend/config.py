@@ -7,7 +7,11 @@ from shared_state import state
 load_dotenv()
 
 # --- Model dan Pengaturan Umum ---
-MODEL_PATH = "model/ppe_detection_yolov12.pt"
+# .pt (PyTorch), .onnx (ONNX Runtime, termasuk INT8 hasil tools/quantize_model.py) atau folder
+# *_openvino_model/ hasil tools/export_model.py
+MODEL_PATH = os.getenv("MODEL_PATH", "model/ppe_detection_yolov12.pt")
+# "auto" = dipilih dari MODEL_PATH; "torch" | "onnx" | "openvino" untuk memaksa backend tertentu
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "auto")
 CCTV_RATIO = (1920, 1080)
 
 CONFIDENCE_THRESHOLD = state.detection_settings['confidence_threshold']
@@ -17,6 +21,65 @@ FRAME_SKIP = state.detection_settings['frame_skip']
 QUEUE_SIZE = state.detection_settings['queue_size']
 PADDING_PERCENT = state.detection_settings['padding_percent']
 TARGET_MAX_WIDTH = state.detection_settings['target_max_width']
+# 0 = pakai FRAME_SKIP (berbasis jumlah frame), > 0 = sampling berbasis waktu (frame deteksi per detik)
+TARGET_DETECTION_FPS = float(os.getenv("TARGET_DETECTION_FPS", state.detection_settings.get('target_detection_fps', 0)))
+
+# Konstanta di atas hanya snapshot saat import (default shared_state, sebelum load_detection_settings dijalankan).
+# Worker membaca nilai live dengan detection_setting() dari snapshot settings miliknya, yang diganti
+# saat admin mengubah detection_settings (hot-reload lewat services/config_bus.py).
+_SETTING_DEFAULTS = dict(state.detection_settings)
+# Env var yang selalu menang atas nilai di DB (dibaca sekali saat import)
+_SETTING_ENV_OVERRIDES = {
+    key: float(os.environ[env_name])
+    for key, env_name in {'target_detection_fps': "TARGET_DETECTION_FPS"}.items()
+    if os.environ.get(env_name)
+}
+
+def detection_setting(key, settings=None):
+    """Nilai detection setting dari `settings` (default: state.detection_settings); key yang tidak ada di DB memakai default."""
+    if key in _SETTING_ENV_OVERRIDES:
+        return _SETTING_ENV_OVERRIDES[key]
+    if settings is None:
+        settings = state.detection_settings
+    return settings.get(key, _SETTING_DEFAULTS.get(key))
+
+# --- Pipeline Pelanggaran (upload + log DB di thread pool tetap, bukan Thread per event) ---
+VIOLATION_QUEUE_SIZE = int(os.getenv("VIOLATION_QUEUE_SIZE", 100))
+VIOLATION_WORKERS = int(os.getenv("VIOLATION_WORKERS", 2))
+VIOLATION_QUEUE_POLICY = os.getenv("VIOLATION_QUEUE_POLICY", "coalesce")  # "coalesce" | "drop_oldest"
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", 1))
+# Batch writer DB: pelanggaran dikumpulkan maksimal DELAY ms / MAX baris lalu ditulis dalam satu transaksi
+VIOLATION_BATCH_MAX = int(os.getenv("VIOLATION_BATCH_MAX", 200))
+VIOLATION_BATCH_DELAY_MS = float(os.getenv("VIOLATION_BATCH_DELAY_MS", 300))
+# Spool lokal (SQLite WAL): pelanggaran disimpan ke disk dulu agar tidak hilang saat Supabase/PostgreSQL down
+VIOLATION_SPOOL_ENABLED = os.getenv("VIOLATION_SPOOL_ENABLED", "1").lower() not in ("0", "false", "no")
+VIOLATION_SPOOL_PATH = os.getenv(
+    "VIOLATION_SPOOL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "spool", "violations.db")
+)
+
+# --- Transport Frame Preview (Redis Stream cctv_frames:{id}, dibatasi MAXLEN ~) ---
+FRAME_STREAM_MAXLEN = int(os.getenv("FRAME_STREAM_MAXLEN", 30))
+
+# --- ROI Crop Inference (per kamera lewat area.roi_crop) ---
+# Crop ROI yang menutupi lebih dari rasio ini dari frame tetap dideteksi pada frame penuh (tidak ada penghematan)
+ROI_CROP_MAX_RATIO = float(os.getenv("ROI_CROP_MAX_RATIO", 0.8))
+
+# --- Capture ---
+# "grab" = frame yang dilewati hanya di-grab (tanpa decode ke BGR), "read" = perilaku lama cap.read() setiap frame
+CAPTURE_MODE = os.getenv("CAPTURE_MODE", "grab")
+
+# --- Inference Server (satu model dipakai bersama oleh semua worker kamera) ---
+# INFERENCE_MODE: "local" = tiap worker memuat model sendiri, "server" = kirim frame ke workers/inference_server.py,
+# "pool" = workers/inference_pool.py (beberapa inference server yang di-pin ke core, kamera dibagi oleh scheduler)
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "local")
+INFERENCE_SERVER_ADDR = os.getenv(
+    "INFERENCE_SERVER_ADDR", "127.0.0.1:7860" if os.name == 'nt' else "/tmp/cctv_inference.sock"
+)
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", 8))
+INFERENCE_MAX_LATENCY_MS = float(os.getenv("INFERENCE_MAX_LATENCY_MS", 30))
+# Inference pool: jumlah member dan thread torch per member (0 = otomatis dari jumlah core fisik)
+INFERENCE_POOL_SIZE = int(os.getenv("INFERENCE_POOL_SIZE", 0))
+INFERENCE_POOL_THREADS = int(os.getenv("INFERENCE_POOL_THREADS", 0))
 
 # --- Supabase Configuration ---
 SUPABASE_URL = os.getenv("SUPABASE_URL")
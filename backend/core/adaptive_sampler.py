@@ -0,0 +1,78 @@
+# backend/core/adaptive_sampler.py
+import time
+
+# Key di detection_settings (tabel detection_settings, nilai float) beserta default-nya
+ADAPTIVE_SETTINGS = {
+    'adaptive_sampling_enabled': 0,     # 1 = fps deteksi per kamera diatur controller ini
+    'adaptive_min_fps': 0.5,            # batas bawah (juga saat host sangat sibuk)
+    'adaptive_max_fps': 5,              # batas atas saat scene ramai
+    'adaptive_idle_fps': 1,             # scene kosong (tidak ada track, tidak ada cooldown pelanggaran)
+    'adaptive_cpu_budget': 85,          # % CPU host; di atas ini semua kamera mundur
+    'adaptive_latency_budget_ms': 250,  # latensi deteksi per frame; di atas ini kamera ini mundur
+}
+
+class AdaptiveSampler:
+    """
+    Controller fps deteksi per kamera.
+    - Aktivitas: ada objek ter-track atau pelanggaran masih dalam cooldown -> adaptive_max_fps,
+      scene kosong -> adaptive_idle_fps.
+    - Beban: jika CPU host atau latensi deteksi melewati budget, faktor backoff turun (x0.8),
+      dan pulih perlahan (x1.1) saat kembali di bawah budget.
+    fps naik seketika saat ada aktivitas, turun bertahap supaya tidak berosilasi.
+    """
+    def __init__(self, update_interval=1.0):
+        self.update_interval = update_interval
+        self.enabled = False
+        self.settings = dict(ADAPTIVE_SETTINGS)
+        self.fps = float(ADAPTIVE_SETTINGS['adaptive_max_fps'])
+        self.backoff = 1.0
+        self.active = False
+        self.cpu = None
+        self.latency_ms = None
+        self._updated_at = 0.0
+        self._active_until = 0.0
+
+    def apply_settings(self, settings):
+        """Baca parameter dari detection_settings (key yang tidak ada memakai default)."""
+        self.settings = {key: float(settings.get(key, default)) for key, default in ADAPTIVE_SETTINGS.items()}
+        self.enabled = bool(self.settings['adaptive_sampling_enabled'])
+
+    def observe(self, active, latency_ms=None, cpu_percent=None, now=None):
+        """Dipanggil setelah setiap frame diproses; fps dihitung ulang paling sering tiap update_interval detik."""
+        now = now or time.time()
+        if active:
+            # Aktivitas "menempel" satu interval agar satu frame kosong di tengah keramaian tidak menurunkan fps
+            self._active_until = now + self.update_interval
+        if latency_ms is not None:
+            self.latency_ms = latency_ms if self.latency_ms is None else 0.8 * self.latency_ms + 0.2 * latency_ms
+        if cpu_percent is not None:
+            self.cpu = cpu_percent
+        if now - self._updated_at < self.update_interval:
+            return self.fps
+        self._updated_at = now
+
+        s = self.settings
+        over_budget = (
+            (self.cpu is not None and self.cpu > s['adaptive_cpu_budget'])
+            or (self.latency_ms is not None and self.latency_ms > s['adaptive_latency_budget_ms'])
+        )
+        self.backoff = max(0.1, self.backoff * 0.8) if over_budget else min(1.0, self.backoff * 1.1)
+
+        self.active = now < self._active_until
+        base = s['adaptive_max_fps'] if self.active else s['adaptive_idle_fps']
+        target = min(max(base * self.backoff, s['adaptive_min_fps']), s['adaptive_max_fps'])
+        self.fps = target if target > self.fps else max(target, self.fps * 0.8)
+        return self.fps
+
+    def should_sample(self, now, last_sampled_at):
+        return now - last_sampled_at >= 1.0 / self.fps
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "fps": round(self.fps, 2),
+            "active": self.active,
+            "backoff": round(self.backoff, 2),
+            "host_cpu": self.cpu,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+        }
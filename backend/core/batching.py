@@ -0,0 +1,116 @@
+# backend/core/batching.py
+import time
+import queue
+import logging
+from threading import Thread, Event, Lock
+
+class _BatchRequest:
+    __slots__ = ("cctv_id", "frame", "options", "submitted_at", "done", "result", "error")
+
+    def __init__(self, cctv_id, frame, options):
+        self.cctv_id = cctv_id
+        self.frame = frame
+        self.options = options
+        self.submitted_at = time.perf_counter()
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+class BatchCollector:
+    """
+    Mengumpulkan frame dari banyak kamera menjadi satu batch dinamis.
+    Batch dikirim ke infer_fn saat jumlahnya mencapai max_batch ATAU saat request
+    tertua sudah menunggu max_latency_ms, mana yang lebih dulu.
+
+    infer_fn(requests) menerima list _BatchRequest dan mengembalikan list hasil dengan urutan sama.
+    """
+    def __init__(self, infer_fn, max_batch=8, max_latency_ms=30, name="BATCH"):
+        self.infer_fn = infer_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_latency = max_latency_ms / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._stop = Event()
+        self._thread = None
+        self._stats_lock = Lock()
+        self._stats = {"batches": 0, "frames": 0, "wait_ms_total": 0.0, "infer_ms_total": 0.0, "errors": 0}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = Thread(target=self._run, daemon=True, name=f"{self.name}-Collector")
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def submit(self, cctv_id, frame, timeout=10.0, **options):
+        """Blocking sampai hasil untuk frame ini tersedia (dipanggil dari thread per kamera)."""
+        req = _BatchRequest(cctv_id, frame, options)
+        self._queue.put(req)
+        if not req.done.wait(timeout):
+            raise TimeoutError(f"[{self.name}] Inference timeout untuk CCTV {cctv_id}")
+        if req.error is not None:
+            raise req.error
+        return req.result
+
+    def _collect(self):
+        first = self._queue.get(timeout=0.5)
+        batch = [first]
+        deadline = first.submitted_at + self.max_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        logging.info(f"[{self.name}] Collector started (max_batch={self.max_batch}, max_latency={self.max_latency * 1000:.0f} ms)")
+        while not self._stop.is_set():
+            try:
+                batch = self._collect()
+            except queue.Empty:
+                continue
+
+            started = time.perf_counter()
+            try:
+                results = self.infer_fn(batch)
+                for req, res in zip(batch, results):
+                    req.result = res
+            except Exception as e:
+                logging.error(f"[{self.name}] Batch inference gagal ({len(batch)} frame): {e}")
+                for req in batch:
+                    req.error = e
+            finished = time.perf_counter()
+
+            with self._stats_lock:
+                self._stats["batches"] += 1
+                self._stats["frames"] += len(batch)
+                self._stats["wait_ms_total"] += sum(started - r.submitted_at for r in batch) * 1000
+                self._stats["infer_ms_total"] += (finished - started) * 1000
+                if any(r.error is not None for r in batch):
+                    self._stats["errors"] += 1
+
+            for req in batch:
+                req.done.set()
+
+    def stats(self):
+        with self._stats_lock:
+            s = dict(self._stats)
+        frames = max(s["frames"], 1)
+        batches = max(s["batches"], 1)
+        return {
+            "batches": s["batches"],
+            "frames": s["frames"],
+            "errors": s["errors"],
+            "avg_batch_size": round(s["frames"] / batches, 2),
+            "avg_wait_ms": round(s["wait_ms_total"] / frames, 2),
+            "avg_infer_ms": round(s["infer_ms_total"] / batches, 2),
+            # Total waktu predict; selisih antar dua pembacaan / selisih waktu = utilisasi
+            "busy_ms": round(s["infer_ms_total"], 1),
+            "queue_depth": self._queue.qsize(),
+        }
@@ -1,8 +1,12 @@
+import time
 import datetime
 import logging
+from threading import Lock
 from typing import Set
 from db.db_config import get_connection
 from shared_state import state
+from utils.redis_client import get_redis
+from services.config_bus import publish_config_change, SCOPE_SCHEDULE
 
 logging.basicConfig(level=logging.INFO)
 
@@ -14,34 +18,167 @@ WEEKDAY_MAP = {
 def _current_wib_time():
     return datetime.datetime.now().astimezone(datetime.timezone(datetime.timedelta(hours=7)))
 
-def is_cctv_active_now(cctv_id: int) -> bool:
-    """
-    Cek apakah CCTV dengan ID ini sedang dalam jadwal aktif saat ini (WIB).
-    Dipanggil oleh detection.py sebelum proses frame.
+# Key Redis yang di-INCR setiap kali jadwal kamera disimpan (sinyal invalidasi cache)
+SCHEDULE_VERSION_KEY = "cctv_schedule_version:{}"
+_DAY_SECONDS = 24 * 3600
+
+def _time_to_seconds(t):
+    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6
+
+class ScheduleCache:
     """
-    now = _current_wib_time()
-    current_day = now.weekday()  
-    db_day = (current_day + 1) % 7 
-    current_time = now.time()
+    Jadwal satu CCTV di memori: interval aktif per hari (detik sejak tengah malam, WIB).
+    is_active_now() dijawab tanpa query DB; hasilnya bahkan di-cache sampai transisi
+    berikutnya (next_transition) sehingga sebagian besar panggilan hanya membandingkan waktu.
 
-    query = """
-        SELECT 1 FROM cctv_scheduler 
-        WHERE cctv_id = %s 
-          AND day_of_week = %s 
-          AND is_active = TRUE
-          AND start_time <= %s 
-          AND end_time >= %s
-        LIMIT 1
+    Data dimuat ulang bila TTL habis atau versi di Redis berubah (POST /cctv-schedules/<id>).
     """
+    def __init__(self, cctv_id, ttl=300, version_check_interval=5):
+        self.cctv_id = int(cctv_id)
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self.intervals = {day: [] for day in range(7)}  # day_of_week DB (0 = minggu)
+        self.loaded_at = 0.0
+        self.version = None
+        self._version_checked_at = 0.0
+        self._state = False
+        self._state_valid_until = 0.0
+        self._next_transition = None
+        self._lock = Lock()
+
+    def load(self):
+        query = """
+            SELECT day_of_week, start_time, end_time
+            FROM cctv_scheduler
+            WHERE cctv_id = %s AND is_active = TRUE
+        """
+        try:
+            conn = get_connection()
+            try:
+                cur = conn.cursor()
+                cur.execute(query, (self.cctv_id,))
+                rows = cur.fetchall()
+                cur.close()
+            finally:
+                conn.close()
+        except Exception as e:
+            # Pertahankan jadwal lama; coba lagi pada siklus berikutnya
+            logging.error(f"[SCHEDULER] Error loading schedule for CCTV {self.cctv_id}: {e}")
+            self.loaded_at = time.time() - self.ttl + 30
+            return False
+
+        intervals = {day: [] for day in range(7)}
+        for day, start, end in rows:
+            start_s, end_s = _time_to_seconds(start), _time_to_seconds(end)
+            if end_s == 0 and start_s > 0:
+                # Baris hasil pemecahan crossover tengah malam: "start -> 00:00" berarti sampai akhir hari
+                end_s = _DAY_SECONDS
+            if end_s >= start_s:
+                intervals[int(day) % 7].append((start_s, end_s))
+        for day in intervals:
+            intervals[day].sort()
+
+        self.intervals = intervals
+        self.loaded_at = time.time()
+        self._state_valid_until = 0.0
+        logging.info(f"[SCHEDULER] Schedule CCTV {self.cctv_id} dimuat ({len(rows)} interval).")
+        return True
+
+    def invalidate(self):
+        self.loaded_at = 0.0
+        self._state_valid_until = 0.0
+
+    def _check_version(self, now_ts):
+        if now_ts - self._version_checked_at < self.version_check_interval:
+            return
+        self._version_checked_at = now_ts
+        try:
+            version = get_redis().get(SCHEDULE_VERSION_KEY.format(self.cctv_id))
+        except Exception:
+            return  # Redis mati: cukup andalkan TTL
+        if version != self.version:
+            if self.version is not None:
+                logging.info(f"[SCHEDULER] Jadwal CCTV {self.cctv_id} berubah, reload cache.")
+                self.invalidate()
+            self.version = version
+
+    def _active_at(self, dt):
+        day = (dt.weekday() + 1) % 7
+        t = _time_to_seconds(dt.time())
+        return any(start <= t <= end for start, end in self.intervals[day])
+
+    def next_transition(self, now=None):
+        """Waktu (WIB) saat status aktif/tidak aktif berikutnya berubah; None jika tidak pernah berubah."""
+        now = now or _current_wib_time()
+        current = self._active_at(now)
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        candidates = []
+        for offset in range(8):
+            day_start = midnight + datetime.timedelta(days=offset)
+            day = (day_start.weekday() + 1) % 7
+            for start, end in self.intervals[day]:
+                candidates.append(day_start + datetime.timedelta(seconds=start))
+                # Interval inklusif: tidak aktif mulai sesaat setelah end
+                candidates.append(day_start + datetime.timedelta(seconds=end, microseconds=1))
+        for candidate in sorted(c for c in candidates if c > now):
+            if self._active_at(candidate) != current:
+                return candidate
+        return None
 
+    def is_active_now(self) -> bool:
+        now_ts = time.time()
+        with self._lock:
+            self._check_version(now_ts)
+            if now_ts - self.loaded_at > self.ttl:
+                self.load()
+            if now_ts < self._state_valid_until:
+                return self._state
+
+            now = _current_wib_time()
+            self._state = self._active_at(now)
+            self._next_transition = self.next_transition(now)
+            valid_until = now_ts + self.ttl
+            if self._next_transition is not None:
+                valid_until = min(valid_until, self._next_transition.timestamp())
+            self._state_valid_until = valid_until
+            return self._state
+
+    def status(self):
+        return {
+            "active": self._state,
+            "next_transition": self._next_transition.isoformat() if self._next_transition else None,
+            "intervals": sum(len(v) for v in self.intervals.values()),
+            "loaded_at": self.loaded_at,
+        }
+
+_schedule_caches = {}
+_schedule_caches_lock = Lock()
+
+def get_schedule_cache(cctv_id: int) -> ScheduleCache:
+    with _schedule_caches_lock:
+        cache = _schedule_caches.get(int(cctv_id))
+        if cache is None:
+            cache = ScheduleCache(cctv_id)
+            _schedule_caches[int(cctv_id)] = cache
+        return cache
+
+def bump_schedule_version(cctv_id: int):
+    """
+    Dipanggil setelah jadwal disimpan agar cache di semua worker memuat ulang: langsung lewat config bus,
+    dan versi per kamera tetap di-INCR untuk ScheduleCache di proses yang tidak berlangganan config bus.
+    """
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(query, (cctv_id, db_day, current_time, current_time))
-                return cur.fetchone() is not None
+        get_redis().incr(SCHEDULE_VERSION_KEY.format(cctv_id))
     except Exception as e:
-        logging.error(f"[SCHEDULER] Error checking schedule for CCTV {cctv_id}: {e}")
-        return False 
+        logging.warning(f"[SCHEDULER] Gagal mengirim sinyal invalidasi jadwal CCTV {cctv_id}: {e}")
+    publish_config_change(get_redis(), SCOPE_SCHEDULE, cctv_id)
+
+def is_cctv_active_now(cctv_id: int) -> bool:
+    """
+    Cek apakah CCTV dengan ID ini sedang dalam jadwal aktif saat ini (WIB).
+    Dijawab dari ScheduleCache di memori (tidak lagi query DB per panggilan).
+    """
+    return get_schedule_cache(cctv_id).is_active_now()
 
 def get_active_cctv_ids_now() -> Set[int]:
     now = _current_wib_time()
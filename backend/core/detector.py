@@ -0,0 +1,77 @@
+# backend/core/detector.py
+import numpy as np
+from core.batching import BatchCollector
+from core.inference_backends import load_backend
+
+# Format hasil deteksi (belum di-track): satu baris per objek
+# [x1, y1, x2, y2, conf, cls_id]
+DETECTION_COLUMNS = 6
+
+def empty_detections():
+    return np.zeros((0, DETECTION_COLUMNS), dtype=np.float32)
+
+def results_to_detections(result):
+    """Konversi satu ultralytics Results menjadi array deteksi polos."""
+    boxes = result.boxes.cpu().numpy()
+    if len(boxes) == 0:
+        return empty_detections()
+    return np.ascontiguousarray(
+        np.column_stack([boxes.xyxy, boxes.conf, boxes.cls]), dtype=np.float32
+    )
+
+class LocalDetector:
+    """
+    Model YOLO milik satu proses worker. Hanya melakukan deteksi; tracking dilakukan terpisah
+    per kamera oleh core.tracker.CameraTracker. Backend (PyTorch .pt, ONNX Runtime, OpenVINO)
+    dipilih dari MODEL_PATH / MODEL_BACKEND, lihat core.inference_backends.
+    """
+    def __init__(self, model_path, device='cpu', backend="auto"):
+        self.device = device
+        self.backend = load_backend(model_path, device, backend)
+        self.names = self.backend.names
+
+    def detect_batch(self, frames, conf, imgsz=None):
+        return self.backend.predict(frames, conf, imgsz)
+
+    def detect(self, cctv_id, frame, conf, imgsz=None):
+        return self.detect_batch([frame], conf, imgsz)[0]
+
+    def describe(self):
+        return self.backend.describe()
+
+def detect_requests(detector, batch):
+    """
+    Jalankan satu batch _BatchRequest (BatchCollector) pada detector: request dikelompokkan per imgsz
+    (satu predict per ukuran input), threshold tiap kelompok = conf terendah, filter per kamera sesudahnya.
+    Return list deteksi dengan urutan sama seperti batch.
+    """
+    groups = {}
+    for k, req in enumerate(batch):
+        groups.setdefault(req.options.get("imgsz"), []).append(k)
+    results = [None] * len(batch)
+    for imgsz, indices in groups.items():
+        conf_floor = min(batch[k].options["conf"] for k in indices)
+        outputs = detector.detect_batch([batch[k].frame for k in indices], conf_floor, imgsz)
+        for k, dets in zip(indices, outputs):
+            results[k] = dets[dets[:, 4] >= batch[k].options["conf"]]
+    return results
+
+class BatchedDetector:
+    """
+    Satu LocalDetector dipakai bersama semua kamera di satu proses host (workers/worker_host.py).
+    detect() dari thread tiap kamera dikumpulkan BatchCollector menjadi satu predict per batch,
+    sama seperti inference server tetapi tanpa socket.
+    """
+    def __init__(self, detector, max_batch=8, max_latency_ms=30):
+        self.detector = detector
+        self.names = detector.names
+        self.collector = BatchCollector(self._infer_batch, max_batch, max_latency_ms, name="HOST-INFER").start()
+
+    def _infer_batch(self, batch):
+        return detect_requests(self.detector, batch)
+
+    def detect(self, cctv_id, frame, conf, imgsz=None):
+        return self.collector.submit(cctv_id, frame, conf=conf, imgsz=imgsz)
+
+    def stats(self):
+        return self.collector.stats()
@@ -0,0 +1,204 @@
+# backend/core/frame_ring.py
+import time
+import logging
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+# Layout header (int64): magic, slots, height, width, channels, write_seq, read_seq, lease_slot,
+#                        overwrites, drops, writes, reads
+_MAGIC = 0x43435456  # "CCTV"
+_H_MAGIC, _H_SLOTS, _H_HEIGHT, _H_WIDTH, _H_CHANNELS = 0, 1, 2, 3, 4
+_H_WRITE_SEQ, _H_READ_SEQ, _H_LEASE = 5, 6, 7
+_H_OVERWRITES, _H_DROPS, _H_WRITES, _H_READS = 8, 9, 10, 11
+_HEADER_LEN = 16
+_WRITING = -1  # nilai slot_seq saat slot sedang ditulis
+
+def _align(n, to=64):
+    return (n + to - 1) // to * to
+
+class FrameLease:
+    """Frame yang sedang dipinjam reader. Selama belum di-release, writer tidak akan menimpa slot ini."""
+    __slots__ = ("ring", "slot", "seq", "frame", "timestamp")
+
+    def __init__(self, ring, slot, seq, frame, timestamp):
+        self.ring, self.slot, self.seq, self.frame, self.timestamp = ring, slot, seq, frame, timestamp
+
+    def release(self):
+        self.ring.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class SharedFrameRing:
+    """
+    Ring buffer frame dengan slot tetap yang dialokasikan sekali di multiprocessing.shared_memory.
+    Capture menulis langsung ke slot (cap.retrieve(slot)), deteksi / anotasi / encode JPEG
+    membaca memori yang sama tanpa frame.copy().
+
+    Satu writer dan satu reader, boleh di proses berbeda (attach() dengan nama yang sama).
+    Serah terima memakai nomor urut per slot: writer menandai slot _WRITING selama menulis,
+    reader mengunci satu slot lewat header lease sehingga writer melewati slot tersebut.
+    """
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.name = shm.name
+        self.header = np.ndarray((_HEADER_LEN,), dtype=np.int64, buffer=shm.buf, offset=0)
+        slots = int(self.header[_H_SLOTS])
+        self.shape = (int(self.header[_H_HEIGHT]), int(self.header[_H_WIDTH]), int(self.header[_H_CHANNELS]))
+        self.slots = slots
+
+        offset = _HEADER_LEN * 8
+        self.slot_seq = np.ndarray((slots,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += slots * 8
+        self.slot_ts = np.ndarray((slots,), dtype=np.float64, buffer=shm.buf, offset=offset)
+        offset = _align(offset + slots * 8)
+        self.frames = np.ndarray((slots, *self.shape), dtype=np.uint8, buffer=shm.buf, offset=offset)
+        self._last_read_seq = int(self.header[_H_READ_SEQ])
+
+    @staticmethod
+    def _size_for(shape, slots):
+        control = _align(_HEADER_LEN * 8 + slots * 16)
+        return control + slots * int(np.prod(shape))
+
+    @classmethod
+    def create(cls, shape, slots, name=None):
+        shape = tuple(int(x) for x in shape)
+        if len(shape) == 2:
+            shape = (*shape, 1)
+        size = cls._size_for(shape, slots)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Sisa dari worker yang mati lewat os._exit (tidak sempat unlink)
+            logging.warning(f"[RING] Shared memory {name} sudah ada, dibuat ulang.")
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((_HEADER_LEN,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_H_MAGIC] = _MAGIC
+        header[_H_SLOTS] = slots
+        header[_H_HEIGHT], header[_H_WIDTH], header[_H_CHANNELS] = shape
+        header[_H_LEASE] = -1
+        ring = cls(shm, owner=True)
+        ring.slot_seq[:] = 0
+        ring.slot_ts[:] = 0.0
+        del header
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        shm = shared_memory.SharedMemory(name=name)
+        # Python < 3.13 ikut mendaftarkan segmen yang hanya di-attach ke resource_tracker,
+        # yang akan meng-unlink segmen milik proses lain saat proses ini keluar.
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        if int(np.ndarray((1,), dtype=np.int64, buffer=shm.buf)[0]) != _MAGIC:
+            shm.close()
+            raise ValueError(f"Shared memory {name} bukan SharedFrameRing.")
+        return cls(shm, owner=False)
+
+    # --- Writer ---
+    def begin_write(self):
+        """Pilih slot berikutnya yang tidak sedang dipinjam reader. Return (slot, array slot)."""
+        next_seq = int(self.header[_H_WRITE_SEQ]) + 1
+        for i in range(self.slots):
+            slot = (next_seq + i) % self.slots
+            if int(self.header[_H_LEASE]) == slot:
+                continue
+            previous = int(self.slot_seq[slot])
+            self.slot_seq[slot] = _WRITING
+            if int(self.header[_H_LEASE]) == slot:
+                # Reader mengunci slot ini tepat di antara dua pengecekan: kembalikan dan cari slot lain
+                self.slot_seq[slot] = previous
+                continue
+            if previous > int(self.header[_H_READ_SEQ]):
+                self.header[_H_OVERWRITES] += 1  # frame ini belum pernah dibaca
+            return slot, self.frames[slot]
+        raise RuntimeError("[RING] Tidak ada slot bebas (slots terlalu sedikit).")
+
+    def commit_write(self, slot, timestamp=None):
+        seq = int(self.header[_H_WRITE_SEQ]) + 1
+        self.slot_ts[slot] = timestamp if timestamp is not None else time.time()
+        self.slot_seq[slot] = seq
+        self.header[_H_WRITE_SEQ] = seq
+        self.header[_H_WRITES] += 1
+        return seq
+
+    def abort_write(self, slot):
+        """Batalkan begin_write (mis. decode gagal); slot dianggap kosong."""
+        self.slot_seq[slot] = 0
+
+    def write(self, frame, timestamp=None):
+        """Salin frame ke slot (dipakai jika decoder tidak bisa menulis langsung ke slot)."""
+        slot, buf = self.begin_write()
+        np.copyto(buf, frame.reshape(buf.shape))
+        return self.commit_write(slot, timestamp)
+
+    # --- Reader ---
+    def acquire_latest(self):
+        """Pinjam frame terbaru yang belum dibaca. Return FrameLease atau None."""
+        for _ in range(self.slots * 2):
+            latest = int(self.header[_H_WRITE_SEQ])
+            if latest <= self._last_read_seq:
+                return None
+            slot = int(np.argmax(self.slot_seq))
+            seq = int(self.slot_seq[slot])
+            if seq <= self._last_read_seq:
+                return None
+
+            self.header[_H_LEASE] = slot
+            if int(self.slot_seq[slot]) != seq:
+                # Writer mulai menulis slot ini sebelum lease terpasang: coba lagi
+                self.header[_H_LEASE] = -1
+                continue
+
+            skipped = seq - self._last_read_seq - 1
+            if skipped > 0 and self._last_read_seq > 0:
+                self.header[_H_DROPS] += skipped
+            self._last_read_seq = seq
+            self.header[_H_READ_SEQ] = seq
+            self.header[_H_READS] += 1
+            return FrameLease(self, slot, seq, self.frames[slot], float(self.slot_ts[slot]))
+        return None
+
+    def release(self, lease):
+        if int(self.header[_H_LEASE]) == lease.slot:
+            self.header[_H_LEASE] = -1
+
+    # --- Monitoring ---
+    def stats(self):
+        write_seq = int(self.header[_H_WRITE_SEQ])
+        latest_ts = float(self.slot_ts.max()) if write_seq else 0.0
+        return {
+            "shape": list(self.shape),
+            "slots": self.slots,
+            "writes": int(self.header[_H_WRITES]),
+            "reads": int(self.header[_H_READS]),
+            "drops": int(self.header[_H_DROPS]),
+            "overwrites": int(self.header[_H_OVERWRITES]),
+            "pending": max(0, write_seq - int(self.header[_H_READ_SEQ])),
+            "slot_age_ms": round((time.time() - latest_ts) * 1000, 1) if latest_ts else None,
+        }
+
+    def close(self):
+        # Lepas semua view numpy sebelum menutup buffer shared memory
+        self.header = self.slot_seq = self.slot_ts = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # Masih ada view frame yang dipegang thread lain; memori dibebaskan saat view tersebut hilang
+            logging.warning(f"[RING] {self.name} ditutup saat frame masih dipakai.")
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
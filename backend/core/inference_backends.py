@@ -0,0 +1,332 @@
+# backend/core/inference_backends.py
+import os
+import ast
+import glob
+from collections import OrderedDict
+import logging
+import cv2
+import numpy as np
+
+# Sama dengan default ultralytics predict agar hasil backend ekspor setara dengan .pt
+NMS_IOU = 0.7
+MAX_DET = 300
+LETTERBOX_COLOR = 114
+
+IMGSZ_STRIDE = 32
+IMGSZ_MIN, IMGSZ_MAX = 160, 1920
+LETTERBOX_CACHE_SIZE = 16
+
+def normalize_imgsz(value):
+    """imgsz per kamera (area.imgsz) -> kelipatan stride di [IMGSZ_MIN, IMGSZ_MAX], atau None (default model)."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    if value <= 0:
+        return None
+    value = -(-value // IMGSZ_STRIDE) * IMGSZ_STRIDE
+    return max(IMGSZ_MIN, min(IMGSZ_MAX, value))
+
+class Letterbox:
+    """
+    Parameter letterbox untuk satu pasangan (resolusi sumber, imgsz), dihitung sekali (seperti LetterBox
+    ultralytics, auto=False). Buffer tujuan dialokasikan sekali dan padding-nya sudah terisi, sehingga
+    setiap frame hanya satu cv2.resize langsung ke area tengah buffer.
+    """
+    def __init__(self, src_shape, imgsz):
+        h, w = src_shape
+        target_h, target_w = imgsz
+        self.gain = min(target_h / h, target_w / w)
+        self.size = (int(round(w * self.gain)), int(round(h * self.gain)))
+        new_w, new_h = self.size
+        pad_x, pad_y = (target_w - new_w) / 2, (target_h - new_h) / 2
+        top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+        self.pad = (left, top)
+        self.resize = self.size != (w, h)
+        self.buffer = np.full((target_h, target_w, 3), LETTERBOX_COLOR, dtype=np.uint8)
+        self.region = self.buffer[top:top + new_h, left:left + new_w]
+
+    def __call__(self, frame):
+        """Return buffer letterbox (dipakai ulang: salin / konversi sebelum frame berikutnya)."""
+        if not self.resize:
+            self.region[...] = frame
+            return self.buffer
+        out = cv2.resize(frame, self.size, dst=self.region, interpolation=cv2.INTER_LINEAR)
+        if out is not self.region:
+            # Binding OpenCV mengalokasikan ulang (dst tidak kompatibel): salin ke buffer
+            self.region[...] = out
+        return self.buffer
+
+class LetterboxCache:
+    """Letterbox per (resolusi sumber, imgsz); LRU kecil karena kamera / crop ROI hanya punya beberapa resolusi."""
+    def __init__(self, max_entries=LETTERBOX_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+
+    def get(self, src_shape, imgsz):
+        key = (tuple(src_shape), tuple(imgsz))
+        item = self._items.get(key)
+        if item is None:
+            item = self._items[key] = Letterbox(src_shape, imgsz)
+            if len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        else:
+            self._items.move_to_end(key)
+        return item
+
+    def __len__(self):
+        return len(self._items)
+
+def to_blob(frames, imgsz, dtype=np.float32, cache=None, out=None):
+    """
+    Frame BGR -> tensor input model ekspor (RGB NCHW [0, 1]). Dipakai backend ONNX / OpenVINO dan kalibrasi
+    kuantisasi (tools/quantize_model.py) agar statistik aktivasi sama dengan saat inferensi.
+    `cache` (LetterboxCache) dan `out` (array (>= len(frames), 3, h, w)) dipakai ulang antar panggilan.
+    Return (blob, [(gain, pad, shape asli), ...]).
+    """
+    if out is None:
+        out = np.empty((len(frames), 3) + tuple(imgsz), dtype=dtype)
+    meta = []
+    for i, frame in enumerate(frames):
+        lb = cache.get(frame.shape[:2], imgsz) if cache is not None else Letterbox(frame.shape[:2], imgsz)
+        img = lb(frame)
+        np.multiply(img[..., ::-1].transpose(2, 0, 1), 1 / 255.0, out=out[i], casting="unsafe")
+        meta.append((lb.gain, lb.pad, frame.shape[:2]))
+    return out, meta
+
+def parse_meta(value):
+    """Metadata ekspor ultralytics disimpan sebagai string repr ('{0: "helmet", ...}', '[640, 640]')."""
+    if isinstance(value, str):
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+    return value
+
+def static_dim(dim):
+    return dim if isinstance(dim, int) and dim > 0 else None
+
+class TorchBackend:
+    """Model .pt lewat ultralytics/PyTorch (perilaku lama). half hanya berlaku di CUDA."""
+    name = "torch"
+
+    def __init__(self, model_path, device='cpu'):
+        from ultralytics import YOLO
+        self.device = device
+        self.model = YOLO(model_path).to(device)
+        self.names = self.model.names
+        self.batch_size = None
+
+    def predict(self, frames, conf, imgsz=None):
+        from core.detector import results_to_detections
+        # Preprocessing (letterbox) dilakukan ultralytics; imgsz None = ukuran default model
+        options = {"imgsz": imgsz} if imgsz else {}
+        results = self.model.predict(
+            frames,
+            conf=conf,
+            half=(self.device == 'cuda'),
+            verbose=False,
+            **options
+        )
+        return [results_to_detections(r) for r in results]
+
+    def describe(self):
+        return {"backend": self.name, "device": self.device}
+
+class ExportedBackend:
+    """
+    Dasar backend untuk model hasil tools/export_model.py (ONNX / OpenVINO): letterbox + normalisasi di numpy,
+    lalu postprocess output YOLO (B, 4 + nc, N) -> filter conf -> NMS per kelas -> skala ke frame asli.
+    Model fixed batch dijalankan per potongan batch_size (sisa diisi padding), model dynamic sekaligus.
+    imgsz per kamera hanya berlaku untuk model dengan H/W dinamis (export --dynamic); model fixed shape
+    selalu memakai ukuran ekspornya. Letterbox dan blob input di-cache per resolusi, bukan dibuat per frame.
+    """
+    name = "exported"
+
+    def __init__(self, names, imgsz, batch_size, input_dtype=np.float32, dynamic_shape=False):
+        self.names = {int(k): v for k, v in names.items()} if isinstance(names, dict) else dict(enumerate(names))
+        self.imgsz = tuple(imgsz)
+        self.batch_size = batch_size  # None = dynamic
+        self.input_dtype = input_dtype
+        self.dynamic_shape = dynamic_shape
+        self.letterboxes = LetterboxCache()
+        self._blobs = {}
+        self._warned_imgsz = set()
+
+    def _run(self, blob):
+        raise NotImplementedError
+
+    def _input_size(self, imgsz):
+        imgsz = normalize_imgsz(imgsz)
+        if imgsz is None or (imgsz, imgsz) == self.imgsz:
+            return self.imgsz
+        if self.dynamic_shape:
+            return (imgsz, imgsz)
+        if imgsz not in self._warned_imgsz:
+            self._warned_imgsz.add(imgsz)
+            logging.warning(f"imgsz {imgsz} diabaikan: model {self.name} fixed shape {self.imgsz} "
+                            f"(ekspor ulang dengan --dynamic)")
+        return self.imgsz
+
+    def _preprocess(self, frames, size, rows):
+        # Satu blob per (jumlah baris, ukuran input); dipakai ulang selama backend hidup
+        key = (rows, size)
+        out = self._blobs.get(key)
+        if out is None:
+            out = self._blobs[key] = np.empty((rows, 3) + size, dtype=self.input_dtype)
+        return to_blob(frames, size, self.input_dtype, cache=self.letterboxes, out=out)
+
+    def _postprocess(self, pred, conf, gain, pad, shape):
+        from core.detector import empty_detections
+        if pred.ndim == 2 and pred.shape[-1] == 6 and pred.shape[0] != 6:
+            # Diekspor dengan nms=True: (max_det, 6) xyxy, conf, cls
+            dets = pred[pred[:, 4] >= conf].astype(np.float32)
+        else:
+            pred = pred.T  # (N, 4 + nc)
+            scores = pred[:, 4:]
+            cls = scores.argmax(1)
+            confs = scores[np.arange(len(cls)), cls]
+            keep = confs >= conf
+            if not keep.any():
+                return empty_detections()
+            xywh, confs, cls = pred[keep, :4], confs[keep], cls[keep]
+            # cv2 NMS memakai (x, y, w, h) kiri-atas; batched = NMS terpisah per kelas (agnostic=False)
+            tlwh = xywh.copy()
+            tlwh[:, :2] -= xywh[:, 2:] / 2
+            idx = cv2.dnn.NMSBoxesBatched(tlwh.tolist(), confs.tolist(), cls.tolist(), conf, NMS_IOU)
+            idx = np.asarray(idx, dtype=np.int64).reshape(-1)
+            if len(idx) == 0:
+                return empty_detections()
+            idx = idx[np.argsort(-confs[idx])][:MAX_DET]
+            dets = np.empty((len(idx), 6), dtype=np.float32)
+            dets[:, 0:2] = tlwh[idx, :2]
+            dets[:, 2:4] = tlwh[idx, :2] + tlwh[idx, 2:4]
+            dets[:, 4] = confs[idx]
+            dets[:, 5] = cls[idx]
+        if len(dets) == 0:
+            return empty_detections()
+        dets[:, [0, 2]] = ((dets[:, [0, 2]] - pad[0]) / gain).clip(0, shape[1])
+        dets[:, [1, 3]] = ((dets[:, [1, 3]] - pad[1]) / gain).clip(0, shape[0])
+        return np.ascontiguousarray(dets)
+
+    def predict(self, frames, conf, imgsz=None):
+        outputs = []
+        size = self._input_size(imgsz)
+        step = self.batch_size or max(1, len(frames))
+        for start in range(0, len(frames), step):
+            chunk = frames[start:start + step]
+            blob, meta = self._preprocess(chunk, size, self.batch_size or len(chunk))
+            if len(chunk) < len(blob):
+                # Model fixed batch: sisa slot diisi nol, hasilnya dibuang
+                blob[len(chunk):] = 0
+            preds = self._run(blob)
+            for pred, (gain, pad, shape) in zip(preds, meta):
+                outputs.append(self._postprocess(pred, conf, gain, pad, shape))
+        return outputs
+
+    def describe(self):
+        return {"backend": self.name, "imgsz": list(self.imgsz), "batch": self.batch_size or "dynamic",
+                "dynamic_shape": self.dynamic_shape, "letterbox_cache": len(self.letterboxes)}
+
+class OnnxBackend(ExportedBackend):
+    """
+    Model .onnx lewat ONNX Runtime. Jumlah thread intra-op mengikuti OMP_NUM_THREADS
+    (di-set inference pool per member), sehingga backend ini juga menghormati pinning pool.
+    """
+    name = "onnx"
+
+    def __init__(self, model_path, device='cpu'):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        threads = int(os.getenv("OMP_NUM_THREADS", 0))
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        providers = ["CPUExecutionProvider"]
+        if device == 'cuda' and "CUDAExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=providers)
+        self.input = self.session.get_inputs()[0]
+        self.output_name = self.session.get_outputs()[0].name
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        batch, _, h, w = self.input.shape
+        imgsz = parse_meta(meta.get("imgsz")) or [static_dim(h), static_dim(w)]
+        if None in imgsz:
+            raise ValueError(f"imgsz tidak diketahui untuk {model_path} (metadata 'imgsz' tidak ada, input dinamis)")
+        names = parse_meta(meta.get("names", "{}"))
+        dtype = np.float16 if self.input.type == "tensor(float16)" else np.float32
+        dynamic_shape = static_dim(h) is None or static_dim(w) is None
+        super().__init__(names, imgsz, static_dim(batch), dtype, dynamic_shape)
+        self.providers = self.session.get_providers()
+
+    def _run(self, blob):
+        return self.session.run([self.output_name], {self.input.name: blob})[0]
+
+    def describe(self):
+        return {**super().describe(), "providers": self.providers,
+                "threads": self.session.get_session_options().intra_op_num_threads}
+
+class OpenVinoBackend(ExportedBackend):
+    """Model OpenVINO IR (folder *_openvino_model/ hasil export, atau file .xml di dalamnya) di CPU."""
+    name = "openvino"
+
+    def __init__(self, model_path, device='cpu'):
+        import yaml
+        import openvino as ov
+        model_dir = model_path if os.path.isdir(model_path) else os.path.dirname(model_path)
+        xml = model_path
+        if os.path.isdir(model_path):
+            candidates = sorted(glob.glob(os.path.join(model_path, "*.xml")))
+            if not candidates:
+                raise ValueError(f"Tidak ada file .xml di {model_path}")
+            xml = candidates[0]
+        meta = {}
+        meta_path = os.path.join(model_dir, "metadata.yaml")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = yaml.safe_load(f) or {}
+
+        core = ov.Core()
+        model = core.read_model(xml)
+        shape = model.inputs[0].get_partial_shape()
+        batch = shape[0].get_length() if shape[0].is_static else None
+        imgsz = meta.get("imgsz") or [shape[2].get_length(), shape[3].get_length()]
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        threads = int(os.getenv("OMP_NUM_THREADS", 0))
+        if threads > 0:
+            config["INFERENCE_NUM_THREADS"] = threads
+        self.compiled = core.compile_model(model, "CPU", config)
+        self.request = self.compiled.create_infer_request()
+        super().__init__(meta.get("names", {}), imgsz, batch,
+                         dynamic_shape=not (shape[2].is_static and shape[3].is_static))
+
+    def _run(self, blob):
+        self.request.infer({0: blob})
+        return self.request.get_output_tensor(0).data
+
+def resolve_backend(model_path, backend="auto"):
+    """'auto' memilih dari path: folder / .xml -> openvino, .onnx -> onnx, selain itu torch (.pt)."""
+    if backend and backend != "auto":
+        return backend
+    if os.path.isdir(model_path) or model_path.endswith(".xml"):
+        return "openvino"
+    if model_path.endswith(".onnx"):
+        return "onnx"
+    return "torch"
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "onnx": OnnxBackend,
+    "openvino": OpenVinoBackend,
+}
+
+def load_backend(model_path, device='cpu', backend="auto"):
+    name = resolve_backend(model_path, backend)
+    if name not in BACKENDS:
+        raise ValueError(f"MODEL_BACKEND tidak dikenal: {name} (pilihan: auto, {', '.join(BACKENDS)})")
+    instance = BACKENDS[name](model_path, device)
+    logging.info(f"Model {model_path} dimuat: {instance.describe()}")
+    return instance
@@ -0,0 +1,70 @@
+# backend/core/inference_client.py
+import logging
+import cv2
+import numpy as np
+
+from utils import ipc
+from core.detector import DETECTION_COLUMNS, empty_detections
+
+class InferenceClient:
+    """
+    Pengganti LocalDetector yang mengirim frame ke workers/inference_server.py.
+    Frame diperkecil dulu ke sisi terpanjang max(send_size, imgsz kamera) (model toh me-letterbox ke ukuran itu),
+    sehingga yang lewat socket hanya ~1 MB, lalu koordinat box dikembalikan ke resolusi asli.
+    Hasilnya deteksi polos; tracking dilakukan worker dengan core.tracker.CameraTracker.
+    """
+    def __init__(self, address, send_size=640, timeout=10.0):
+        self.address = address
+        self.send_size = send_size
+        self.timeout = timeout
+        self.sock = None
+        self.names = {}
+
+    def _ensure_connected(self):
+        if self.sock is not None:
+            return
+        self.sock = ipc.connect(self.address, timeout=self.timeout)
+        ipc.send_message(self.sock, {"op": "hello"})
+        header, _ = ipc.recv_message(self.sock)
+        self.names = {int(k): v for k, v in header.get("names", {}).items()}
+        logging.info(f"[INFER CLIENT] Terhubung ke inference server {self.address} ({len(self.names)} kelas)")
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            finally:
+                self.sock = None
+
+    def detect(self, cctv_id, frame, conf, imgsz=None):
+        h, w = frame.shape[:2]
+        scale = min(1.0, max(self.send_size, imgsz or 0) / max(h, w))
+        if scale < 1.0:
+            small = cv2.resize(frame, (int(round(w * scale)), int(round(h * scale))), interpolation=cv2.INTER_LINEAR)
+        else:
+            small = np.ascontiguousarray(frame)
+
+        try:
+            self._ensure_connected()
+            ipc.send_message(self.sock, {
+                "op": "detect",
+                "cctv_id": cctv_id,
+                "conf": conf,
+                "imgsz": imgsz,
+                "shape": list(small.shape),
+            }, small)
+            header, payload = ipc.recv_message(self.sock)
+        except Exception:
+            # Socket rusak: tutup agar panggilan berikutnya reconnect
+            self.close()
+            raise
+
+        if header.get("error"):
+            raise RuntimeError(f"Inference server error: {header['error']}")
+        if not payload:
+            return empty_detections()
+
+        dets = np.frombuffer(payload, dtype=np.float32).reshape(-1, DETECTION_COLUMNS).copy()
+        if scale < 1.0:
+            dets[:, :4] /= scale
+        return dets
@@ -0,0 +1,235 @@
+# backend/core/inference_pool.py
+import os
+import time
+import logging
+import psutil
+
+from utils import ipc
+from core.inference_client import InferenceClient
+
+# Kamera dianggap masih aktif di member jika mengirim frame dalam N detik terakhir (dilaporkan stats member)
+ACTIVE_CAMERA_SECONDS = 30
+
+def parse_cpus(spec):
+    """'0-3,8,9' -> [0, 1, 2, 3, 8, 9]. Kosong / None -> []."""
+    cpus = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+def format_cpus(cpus):
+    return ",".join(str(c) for c in cpus)
+
+def physical_cores():
+    return psutil.cpu_count(logical=False) or os.cpu_count() or 1
+
+def available_cpus():
+    """CPU logis yang boleh dipakai proses ini (menghormati taskset / cgroup cpuset)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def resolve_pool_shape(pool_size=0, threads=0):
+    """
+    Ukuran pool & thread torch per member dari core fisik (0 = otomatis):
+    keduanya 0 -> 2 thread per member; hanya satu yang diisi -> yang lain mengisi sisa core fisik.
+    """
+    physical = physical_cores()
+    if pool_size <= 0 and threads <= 0:
+        threads = min(2, physical)
+    if threads <= 0:
+        threads = max(1, physical // pool_size)
+    if pool_size <= 0:
+        pool_size = max(1, physical // threads)
+    return pool_size, threads
+
+def plan_members(pool_size, threads):
+    """
+    Bagi CPU logis menjadi pool_size set berurutan (satu set per member, tidak saling tumpang tindih).
+    Dengan SMT setiap set mendapat sibling-nya juga, jumlah thread torch tetap `threads`.
+    Return list CPU set; list kosong per member jika CPU lebih sedikit dari member (tanpa pinning).
+    """
+    cpus = available_cpus()
+    per_member = len(cpus) // pool_size
+    if per_member == 0:
+        return [[] for _ in range(pool_size)]
+    return [cpus[k * per_member:(k + 1) * per_member] for k in range(pool_size)]
+
+def pin_process(threads=0, cpus=None):
+    """
+    Dipanggil di awal proses member sebelum model dimuat: affinity ke `cpus` dan thread intra-op torch = `threads`.
+    OMP_NUM_THREADS / MKL_NUM_THREADS sebaiknya juga di-set di env sebelum torch di-import (dilakukan pool).
+    """
+    if cpus:
+        try:
+            psutil.Process().cpu_affinity(list(cpus))
+        except (AttributeError, psutil.Error, OSError) as e:
+            # macOS tidak mendukung affinity; cukup batasi jumlah thread
+            logging.warning(f"[POOL] Affinity {format_cpus(cpus)} tidak bisa diterapkan: {e}")
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # Sudah ada operasi paralel yang berjalan
+
+def member_address(base, index):
+    """Alamat member ke-index dari alamat pool: /tmp/x.sock -> /tmp/x.0.sock, host:7860 -> host:7861."""
+    family, addr = ipc.parse_address(base)
+    if isinstance(addr, tuple):
+        host, port = addr
+        return f"{host}:{port + 1 + index}"
+    root, ext = os.path.splitext(addr)
+    return f"{root}.{index}{ext}"
+
+class PoolMember:
+    """Kondisi satu proses member (diisi oleh workers/inference_pool.py)."""
+    def __init__(self, index, address, cpus, threads):
+        self.index = index
+        self.address = address
+        self.cpus = cpus
+        self.threads = threads
+        self.process = None
+        self.restarts = 0
+        self.ready = False
+        self.stats = {}
+        self.utilization = 0.0
+        self._busy_sample = None
+
+    def update_stats(self, stats, now):
+        """Utilisasi = porsi waktu dinding yang dipakai predict sejak sampel sebelumnya."""
+        busy_ms = stats.get("busy_ms", 0.0)
+        if self._busy_sample is not None:
+            prev_busy, prev_at = self._busy_sample
+            elapsed_ms = (now - prev_at) * 1000
+            if elapsed_ms > 0 and busy_ms >= prev_busy:
+                self.utilization = min(1.0, (busy_ms - prev_busy) / elapsed_ms)
+        self._busy_sample = (busy_ms, now)
+        self.stats = stats
+        self.ready = True
+
+    def mark_down(self):
+        self.ready = False
+        self.utilization = 0.0
+        self._busy_sample = None
+
+    def active_cameras(self):
+        return set(self.stats.get("camera_ids", [])) if self.ready else set()
+
+    def summary(self):
+        return {
+            "index": self.index,
+            "address": self.address,
+            "cpus": format_cpus(self.cpus),
+            "threads": self.threads,
+            "pid": self.process.pid if self.process is not None else None,
+            "ready": self.ready,
+            "restarts": self.restarts,
+            "utilization": round(self.utilization, 3),
+            "cameras": len(self.active_cameras()),
+            "avg_batch_size": self.stats.get("avg_batch_size"),
+            "avg_infer_ms": self.stats.get("avg_infer_ms"),
+            "queue_depth": self.stats.get("queue_depth"),
+        }
+
+class PoolScheduler:
+    """
+    Penempatan kamera ke member. Kamera tetap di member yang sama selama member itu hidup (batch per member stabil);
+    kamera baru atau yang member-nya gagal dipindah ke member siap dengan kamera aktif paling sedikit,
+    lalu utilisasi terendah. Kamera dihitung aktif jika baru di-assign (assignment_ttl) atau masih mengirim frame.
+    """
+    def __init__(self, members, assignment_ttl=60):
+        self.members = members
+        self.assignment_ttl = assignment_ttl
+        self.assignments = {}  # cctv_id -> (index member, waktu assign)
+
+    def _camera_counts(self, now):
+        counts = {m.index: m.active_cameras() for m in self.members}
+        for cctv_id, (index, assigned_at) in list(self.assignments.items()):
+            if now - assigned_at < self.assignment_ttl:
+                counts[index].add(cctv_id)
+            elif cctv_id not in counts[index]:
+                # Kamera berhenti mengirim frame (worker mati / dipindah): lupakan
+                del self.assignments[cctv_id]
+        return {index: len(ids) for index, ids in counts.items()}
+
+    def assign(self, cctv_id, failed=None, now=None):
+        """Return PoolMember untuk kamera ini, atau None jika belum ada member yang siap."""
+        now = now or time.time()
+        current = self.assignments.get(cctv_id)
+        if current is not None:
+            member = self.members[current[0]]
+            if member.ready and member.index != failed:
+                self.assignments[cctv_id] = (member.index, now)
+                return member
+            self.assignments.pop(cctv_id, None)
+
+        candidates = [m for m in self.members if m.ready and m.index != failed]
+        if not candidates:
+            candidates = [m for m in self.members if m.ready]
+        if not candidates:
+            return None
+        counts = self._camera_counts(now)
+        member = min(candidates, key=lambda m: (counts[m.index], m.utilization, m.index))
+        self.assignments[cctv_id] = (member.index, now)
+        return member
+
+class PoolInferenceClient:
+    """
+    Pengganti InferenceClient untuk INFERENCE_MODE=pool: minta member ke pool manager (op "assign"),
+    lalu kirim frame langsung ke member tersebut. Jika member gagal, assign ulang pada panggilan berikutnya.
+    """
+    def __init__(self, address, timeout=10.0, **client_options):
+        self.address = address
+        self.timeout = timeout
+        self.client_options = client_options
+        self.client = None
+        self.member = None
+        self._failed_member = None
+        self._names = {}
+
+    @property
+    def names(self):
+        """Nama kelas terakhir dari member; tidak ikut hilang saat member gagal (preview masih menggambar last_tracks)."""
+        if self.client is not None and self.client.names:
+            return self.client.names
+        return self._names
+
+    def _assign(self, cctv_id):
+        sock = ipc.connect(self.address, timeout=self.timeout)
+        try:
+            ipc.send_message(sock, {"op": "assign", "cctv_id": cctv_id, "failed": self._failed_member})
+            header, _ = ipc.recv_message(sock)
+        finally:
+            sock.close()
+        if header.get("error"):
+            raise RuntimeError(f"Inference pool error: {header['error']}")
+        self.member = header["member"]
+        self.client = InferenceClient(header["address"], timeout=self.timeout, **self.client_options)
+        self._failed_member = None
+        logging.info(f"[POOL CLIENT] CCTV {cctv_id} -> member {self.member} ({header['address']})")
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+    def detect(self, cctv_id, frame, conf, imgsz=None):
+        if self.client is None:
+            self._assign(cctv_id)
+        try:
+            detections = self.client.detect(cctv_id, frame, conf, imgsz)
+        except Exception:
+            self._failed_member = self.member
+            self.close()
+            raise
+        self._names = self.client.names or self._names
+        return detections
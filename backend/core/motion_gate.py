@@ -0,0 +1,95 @@
+# backend/core/motion_gate.py
+import time
+import cv2
+import numpy as np
+
+# Key di detection_settings (tabel detection_settings, nilai float) beserta default-nya
+MOTION_SETTINGS = {
+    'motion_gate_enabled': 0,         # 1 = lewati detektor jika scene tidak berubah
+    'motion_threshold': 0.005,        # fraksi piksel ROI yang berubah agar dianggap ada gerakan
+    'motion_pixel_delta': 25,         # selisih grayscale minimal agar satu piksel dihitung berubah
+    'motion_keyframe_seconds': 2.0,   # deteksi dipaksa paling lambat tiap N detik (tracker tidak basi)
+}
+
+class MotionGate:
+    """
+    Gate murah sebelum YOLO: frame diperkecil ke lebar `width`, grayscale + blur, lalu dibandingkan dengan
+    frame referensi (frame terakhir yang dideteksi) hanya di dalam mask ROI. Jika fraksi piksel yang berubah
+    di bawah threshold, detektor dilewati; keyframe dipaksa setiap keyframe_seconds.
+    Referensi = frame terakhir yang dideteksi (bukan frame sebelumnya) supaya gerakan lambat tetap terakumulasi.
+    Referensi baru diganti lewat mark_detected() setelah deteksi sukses; jika detektor gagal, frame berikutnya
+    tetap dibandingkan dengan referensi lama sehingga deteksi dicoba lagi, bukan dilewati.
+    """
+    def __init__(self, width=160):
+        self.width = width
+        self.enabled = False
+        self.threshold = MOTION_SETTINGS['motion_threshold']
+        self.pixel_delta = MOTION_SETTINGS['motion_pixel_delta']
+        self.keyframe_seconds = MOTION_SETTINGS['motion_keyframe_seconds']
+        self._reference = None
+        self._last_detect_at = 0.0
+        self._pending = None
+        self._mask_source = None
+        self._mask = None
+        self.checked = 0
+        self.skipped = 0
+        self.last_change_ratio = None
+
+    def apply_settings(self, settings):
+        """Baca parameter dari detection_settings (key yang tidak ada memakai default)."""
+        self.enabled = bool(settings.get('motion_gate_enabled', MOTION_SETTINGS['motion_gate_enabled']))
+        self.threshold = float(settings.get('motion_threshold', MOTION_SETTINGS['motion_threshold']))
+        self.pixel_delta = int(settings.get('motion_pixel_delta', MOTION_SETTINGS['motion_pixel_delta']))
+        self.keyframe_seconds = float(settings.get('motion_keyframe_seconds', MOTION_SETTINGS['motion_keyframe_seconds']))
+
+    def _small_mask(self, roi_mask, size):
+        # Mask ROI versi kecil, dibuat ulang hanya jika RoiMask diganti
+        if self._mask_source is not roi_mask or self._mask is None or self._mask.shape[::-1] != size:
+            self._mask_source = roi_mask
+            if roi_mask is None or roi_mask.bounds is None:
+                self._mask = np.ones(size[::-1], dtype=bool)
+            else:
+                self._mask = cv2.resize((roi_mask.mask > 0).astype(np.uint8), size, interpolation=cv2.INTER_NEAREST) > 0
+        return self._mask
+
+    def should_detect(self, frame, roi_mask=None, now=None):
+        """True jika detektor harus dijalankan untuk frame ini."""
+        now = now or time.time()
+        if not self.enabled:
+            return True
+
+        h, w = frame.shape[:2]
+        size = (self.width, max(1, int(h * self.width / w)))
+        small = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+        mask = self._small_mask(roi_mask, size)
+        self.checked += 1
+
+        keyframe = now - self._last_detect_at >= self.keyframe_seconds
+        if self._reference is not None and self._reference.shape == small.shape:
+            changed = (cv2.absdiff(small, self._reference) > self.pixel_delta) & mask
+            self.last_change_ratio = float(changed.sum()) / max(int(mask.sum()), 1)
+            if self.last_change_ratio < self.threshold and not keyframe:
+                self.skipped += 1
+                return False
+
+        self._pending = (small, now)
+        return True
+
+    def mark_detected(self, now=None):
+        """Dipanggil setelah detektor sukses untuk frame yang diloloskan should_detect(): jadikan referensi."""
+        if self._pending is None:
+            return
+        self._reference, checked_at = self._pending
+        self._last_detect_at = now or checked_at
+        self._pending = None
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skipped / self.checked, 3) if self.checked else None,
+            "last_change_ratio": round(self.last_change_ratio, 4) if self.last_change_ratio is not None else None,
+            "threshold": self.threshold,
+        }
@@ -0,0 +1,90 @@
+# backend/core/roi_mask.py
+import cv2
+import numpy as np
+from threading import Lock
+
+class RoiMask:
+    """
+    Label mask ROI satu kamera pada satu resolusi frame: setiap piksel berisi index ROI + 1 (0 = di luar ROI).
+    Jika ROI bertumpuk, ROI yang lebih awal di daftar menang (sama dengan urutan cek point_in_polygon lama).
+    Keanggotaan semua deteksi dalam satu frame = satu lookup fancy-index NumPy.
+    """
+    def __init__(self, regions, json_width, json_height, width, height):
+        self.regions = regions
+        self.width = width
+        self.height = height
+        # Titik ROI tersimpan dalam koordinat gambar editor (json_width x json_height)
+        self.scale_x = width / (json_width or width)
+        self.scale_y = height / (json_height or height)
+        self.allowed = [frozenset(r.get("allowed_violations", [])) for r in regions]
+        self._polygons = {}
+
+        dtype = np.uint8 if len(regions) < 255 else np.uint16
+        self.mask = np.zeros((height, width), dtype=dtype)
+        for idx in reversed(range(len(regions))):
+            cv2.fillPoly(self.mask, [self.polygons()[idx]], idx + 1)
+
+        # Bounding box gabungan semua ROI (x1, y1, x2, y2) di koordinat frame, None jika tidak ada ROI
+        ys, xs = np.nonzero(self.mask)
+        self.bounds = (int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1) if len(xs) else None
+
+    def polygons(self, scale=1.0):
+        """Polygon ROI (int32, siap untuk cv2) pada resolusi frame x scale, di-cache per scale."""
+        pts = self._polygons.get(scale)
+        if pts is None:
+            pts = [
+                (r["points"] * [self.scale_x * scale, self.scale_y * scale]).astype(np.int32).reshape((-1, 1, 2))
+                for r in self.regions
+            ]
+            self._polygons[scale] = pts
+        return pts
+
+    def crop_box(self, margin=0.05):
+        """
+        Bounding box gabungan ROI + margin (fraksi lebar/tinggi box) untuk inferensi ter-crop,
+        dibulatkan ke kelipatan 32 (stride YOLO) dan di-clip ke frame. None jika tidak ada ROI.
+        """
+        if self.bounds is None:
+            return None
+        x1, y1, x2, y2 = self.bounds
+        pad_x, pad_y = int((x2 - x1) * margin), int((y2 - y1) * margin)
+        x1, y1 = max(0, x1 - pad_x), max(0, y1 - pad_y)
+        x2, y2 = min(self.width, x2 + pad_x), min(self.height, y2 + pad_y)
+        x2 = min(self.width, x1 + -(-(x2 - x1) // 32) * 32)
+        y2 = min(self.height, y1 + -(-(y2 - y1) // 32) * 32)
+        return x1, y1, x2, y2
+
+    @property
+    def area_ratio(self):
+        """Luas crop_box() dibanding luas frame (1.0 = tidak ada penghematan)."""
+        box = self.crop_box()
+        if box is None:
+            return 0.0
+        return (box[2] - box[0]) * (box[3] - box[1]) / float(self.width * self.height)
+
+    def lookup(self, boxes):
+        """boxes Nx4 (x1, y1, x2, y2) koordinat frame -> array index ROI per box (-1 = di luar semua ROI)."""
+        boxes = np.asarray(boxes)
+        if len(boxes) == 0:
+            return np.empty(0, dtype=np.int32)
+        cx = ((boxes[:, 0] + boxes[:, 2]) / 2).astype(np.int32).clip(0, self.width - 1)
+        cy = ((boxes[:, 1] + boxes[:, 3]) / 2).astype(np.int32).clip(0, self.height - 1)
+        return self.mask[cy, cx].astype(np.int32) - 1
+
+_masks = {}
+_masks_lock = Lock()
+
+def get_roi_mask(cctv_id, cctv_cfg, width, height):
+    """
+    RoiMask kamera untuk resolusi ini. Dibangun ulang hanya jika list ROI di config diganti
+    (config di-load ulang setelah cctv_data.area berubah) atau resolusi stream berubah.
+    """
+    regions = cctv_cfg.get("roi", [])
+    with _masks_lock:
+        cached = _masks.get(cctv_id)
+        if cached is not None and cached.regions is regions and (cached.width, cached.height) == (width, height):
+            return cached
+    mask = RoiMask(regions, cctv_cfg.get("json_width"), cctv_cfg.get("json_height"), width, height)
+    with _masks_lock:
+        _masks[cctv_id] = mask
+    return mask
@@ -0,0 +1,58 @@
+# backend/core/tracker.py
+import types
+import yaml
+import numpy as np
+from ultralytics.trackers.byte_tracker import BYTETracker
+from ultralytics.utils.checks import check_yaml
+
+# Hasil tracker: [x1, y1, x2, y2, conf, cls_id, track_id]
+TRACK_COLUMNS = 7
+
+def empty_tracks():
+    return np.zeros((0, TRACK_COLUMNS), dtype=np.float32)
+
+def _load_tracker_cfg(tracker_yaml):
+    with open(check_yaml(tracker_yaml)) as f:
+        return types.SimpleNamespace(**yaml.safe_load(f))
+
+class _TrackInput:
+    """Adapter minimal agar array numpy bisa diumpankan ke BYTETracker ultralytics."""
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy, self.conf, self.cls = xyxy, conf, cls
+
+    @property
+    def xywh(self):
+        xywh = self.xyxy.copy()
+        xywh[:, 2:] = self.xyxy[:, 2:] - self.xyxy[:, :2]
+        xywh[:, :2] = self.xyxy[:, :2] + xywh[:, 2:] / 2
+        return xywh
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __getitem__(self, idx):
+        return _TrackInput(self.xyxy[idx], self.conf[idx], self.cls[idx])
+
+class CameraTracker:
+    """
+    Tracker ByteTrack milik satu kamera, terpisah dari model YOLO.
+    Input: array deteksi polos dari model.predict [x1, y1, x2, y2, conf, cls_id].
+    Output: array [x1, y1, x2, y2, conf, cls_id, track_id] untuk objek yang sudah punya track.
+    """
+    def __init__(self, tracker_yaml="bytetrack.yaml", frame_rate=30, cfg=None):
+        self.cfg = cfg or _load_tracker_cfg(tracker_yaml)
+        self.frame_rate = frame_rate
+        self.tracker = BYTETracker(self.cfg, frame_rate=frame_rate)
+
+    def update(self, detections):
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+        tracks = self.tracker.update(
+            _TrackInput(detections[:, :4], detections[:, 4], detections[:, 5])
+        )
+        if len(tracks) == 0:
+            return empty_tracks()
+        # BYTETracker: [x1, y1, x2, y2, track_id, score, cls, idx]
+        return np.ascontiguousarray(tracks[:, [0, 1, 2, 3, 5, 6, 4]], dtype=np.float32)
+
+    def reset(self):
+        self.tracker.reset()
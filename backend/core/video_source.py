@@ -0,0 +1,106 @@
+# backend/core/video_source.py
+import cv2
+import logging
+import numpy as np
+
+try:
+    import av  # PyAV (opsional): decode FFmpeg dengan scale + konversi warna di dalam decoder
+except ImportError:
+    av = None
+
+CAPTURE_BACKENDS = ("opencv", "pyav")
+
+class PyAVSource:
+    """
+    Sumber video berbasis PyAV dengan API yang sama seperti cv2.VideoCapture
+    (isOpened / grab / retrieve / read / release), sehingga capture_loop tidak perlu tahu bedanya.
+
+    retrieve() melakukan scale + konversi ke BGR sekaligus di swscale ke resolusi decode_width,
+    bukan ke resolusi asli kamera. Frame resolusi penuh hanya dibuat bila diminta lewat
+    full_frame_handle() (dipakai process_detection untuk crop pelanggaran).
+    """
+    def __init__(self, url, decode_width=None, timeout=5.0):
+        if av is None:
+            raise RuntimeError("PyAV belum terpasang (pip install av).")
+        self.url = url
+        self.decode_width = int(decode_width) if decode_width else None
+        self.container = av.open(url, options={"rtsp_transport": "tcp"}, timeout=timeout)
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        self._frames = self.container.decode(self.stream)
+        self._frame = None
+        self._size = None
+
+    def isOpened(self):
+        return self.container is not None
+
+    def _output_size(self, frame):
+        if self._size is None or self._size[2] != (frame.width, frame.height):
+            if self.decode_width and frame.width > self.decode_width:
+                w = self.decode_width
+                h = int(round(frame.height * w / frame.width)) // 2 * 2
+            else:
+                w, h = frame.width, frame.height
+            self._size = (w, h, (frame.width, frame.height))
+        return self._size[0], self._size[1]
+
+    def grab(self):
+        try:
+            self._frame = next(self._frames)
+            return True
+        except (StopIteration, av.error.FFmpegError) as e:
+            logging.warning(f"[PYAV] Gagal decode frame: {e}")
+            self._frame = None
+            return False
+
+    def retrieve(self, image=None):
+        if self._frame is None:
+            return False, None
+        w, h = self._output_size(self._frame)
+        frame = self._frame.reformat(width=w, height=h, format="bgr24").to_ndarray()
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def full_frame_handle(self):
+        """Callable yang mengembalikan frame BGR resolusi penuh dari frame terakhir (dibuat saat dipanggil)."""
+        frame = self._frame
+        if frame is None or self.decode_width is None or frame.width <= self.decode_width:
+            return None
+        return lambda: frame.to_ndarray(format="bgr24")
+
+    def release(self):
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+
+def open_video_source(urls, backend="opencv", decode_width=None):
+    """
+    Membuka stream dari daftar URL kandidat (mis. rtsps lalu fallback rtsp).
+    Mengembalikan cv2.VideoCapture atau PyAVSource; None jika semua kandidat gagal.
+    """
+    if backend == "pyav" and av is None:
+        logging.warning("[CAPTURE] PyAV tidak tersedia, kembali ke backend opencv.")
+        backend = "opencv"
+
+    for url in urls:
+        logging.info(f"[CAPTURE] ({backend}) Connecting to: {url}")
+        if backend == "pyav":
+            try:
+                return PyAVSource(url, decode_width=decode_width)
+            except Exception as e:
+                logging.warning(f"[CAPTURE] PyAV gagal membuka {url}: {e}")
+                continue
+
+        cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+        if cap.isOpened():
+            if decode_width:
+                logging.info("[CAPTURE] decode_width diabaikan pada backend opencv (gunakan backend pyav).")
+            return cap
+    return None
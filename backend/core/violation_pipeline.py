@@ -0,0 +1,166 @@
+# backend/core/violation_pipeline.py
+import time
+import logging
+from collections import deque
+from threading import Thread, Condition, Lock
+
+POLICIES = ("drop_oldest", "coalesce")
+
+class _Job:
+    __slots__ = ("key", "payload", "enqueued_at", "created_at")
+
+    def __init__(self, key, payload, created_at):
+        self.key = key
+        self.payload = payload
+        self.created_at = created_at
+        self.enqueued_at = time.time()
+
+class BoundedWorkQueue:
+    """
+    Antrian terbatas yang dikuras oleh sejumlah thread worker tetap (tidak ada Thread baru per event).
+    submit() tidak pernah blocking: saat antrian penuh, kebijakan backpressure diterapkan.
+
+    policy:
+      - "drop_oldest": event tertua dibuang untuk memberi tempat event baru
+      - "coalesce"   : saat penuh, event dengan key yang sama (mis. cctv + track + kelas) yang masih
+                       antre diganti event terbaru; bila tidak ada, yang tertua dibuang
+
+    on_coalesced(payload_lama) dipanggil (di luar lock) untuk payload yang digantikan, mis. untuk
+    membersihkan sumber daya miliknya. measure_latency=False jika handler hanya menyerahkan pekerjaan
+    ke tahap berikutnya; latensi lalu dicatat pemanggil lewat record_latency() saat benar-benar selesai.
+    """
+    def __init__(self, name, handler, workers=2, maxsize=100, policy="drop_oldest",
+                 measure_latency=True, on_coalesced=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Policy tidak dikenal: {policy}")
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.measure_latency = measure_latency
+        self.on_coalesced = on_coalesced
+        self._queue = deque()
+        self._pending_by_key = {}
+        self._cond = Condition(Lock())
+        self._threads = []
+        self._stopping = False
+        self._latencies = deque(maxlen=500)
+        self._stats = {
+            "submitted": 0, "processed": 0, "failed": 0, "dropped": 0, "coalesced": 0, "max_depth": 0
+        }
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return self
+            for i in range(self.workers):
+                t = Thread(target=self._run, daemon=True, name=f"{self.name}-{i}")
+                t.start()
+                self._threads.append(t)
+        logging.info(f"[{self.name}] {self.workers} worker siap (maxsize={self.maxsize}, policy={self.policy})")
+        return self
+
+    def submit(self, payload, key=None, created_at=None):
+        """Masukkan event ke antrian. Return False jika event lain harus dibuang karena penuh."""
+        accepted_without_drop = True
+        coalesced, replaced = False, None
+        with self._cond:
+            self._stats["submitted"] += 1
+            full = len(self._queue) >= self.maxsize
+            if full and self.policy == "coalesce" and key is not None and key in self._pending_by_key:
+                job = self._pending_by_key[key]
+                replaced, job.payload = job.payload, payload
+                job.created_at = created_at or time.time()
+                self._stats["coalesced"] += 1
+                coalesced = True
+            else:
+                if full:
+                    dropped = self._queue.popleft()
+                    if dropped.key is not None:
+                        self._pending_by_key.pop(dropped.key, None)
+                    self._stats["dropped"] += 1
+                    accepted_without_drop = False
+
+                job = _Job(key, payload, created_at or time.time())
+                self._queue.append(job)
+                if key is not None:
+                    self._pending_by_key[key] = job
+                self._stats["max_depth"] = max(self._stats["max_depth"], len(self._queue))
+                self._cond.notify()
+
+        if coalesced and self.on_coalesced is not None:
+            try:
+                self.on_coalesced(replaced)
+            except Exception as e:
+                logging.error(f"[{self.name}] on_coalesced gagal: {e}")
+        if not accepted_without_drop:
+            logging.warning(f"[{self.name}] Antrian penuh ({self.maxsize}), event tertua dibuang.")
+        return accepted_without_drop
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                job = self._queue.popleft()
+                if job.key is not None and self._pending_by_key.get(job.key) is job:
+                    del self._pending_by_key[job.key]
+
+            try:
+                self.handler(job.payload)
+                ok = True
+            except Exception as e:
+                ok = False
+                logging.error(f"[{self.name}] Gagal memproses event: {e}")
+
+            with self._cond:
+                if ok:
+                    self._stats["processed"] += 1
+                    if self.measure_latency:
+                        self._latencies.append(time.time() - job.created_at)
+                else:
+                    self._stats["failed"] += 1
+
+    def record_latency(self, seconds):
+        """Catat latensi end-to-end dari luar (dipakai bila measure_latency=False)."""
+        with self._cond:
+            self._latencies.append(seconds)
+
+    def stop(self, timeout=5.0):
+        """Tunggu antrian habis (maksimal timeout detik) lalu hentikan worker."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        deadline = time.time() + timeout
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.time()))
+
+    def stats(self):
+        with self._cond:
+            s = dict(self._stats)
+            s["depth"] = len(self._queue)
+            latencies = sorted(self._latencies)
+        s["latency_ms_avg"] = round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None
+        s["latency_ms_p95"] = round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1) if latencies else None
+        s["policy"] = self.policy
+        s["maxsize"] = self.maxsize
+        return s
+
+_queues = {}
+_queues_lock = Lock()
+
+def get_queue(name, handler, **kwargs):
+    """Satu BoundedWorkQueue per nama per proses, dibuat & dijalankan saat pertama dipakai."""
+    with _queues_lock:
+        q = _queues.get(name)
+        if q is None:
+            q = BoundedWorkQueue(name, handler, **kwargs).start()
+            _queues[name] = q
+        return q
+
+def all_stats():
+    with _queues_lock:
+        return {name: q.stats() for name, q in _queues.items()}
@@ -2,79 +2,138 @@ import time
 import cv2
 import datetime
 import numpy as np
-from threading import Thread
 import logging
 from services import notification_service
 from shared_state import state
 from services.cloud_storage import upload_violation_image
 from utils.helpers import point_in_polygon
-from db.db_config import get_connection
+from core.violation_pipeline import get_queue
+from core.violation_spool import get_spool, SpoolDrainer
+from core.violation_writer import get_writer, stop_writer
 from config import (
-    CONFIDENCE_THRESHOLD, COOLDOWN, TARGET_MAX_WIDTH, PADDING_PERCENT 
+    detection_setting,
+    VIOLATION_QUEUE_SIZE, VIOLATION_WORKERS, VIOLATION_QUEUE_POLICY, EMAIL_WORKERS,
+    VIOLATION_SPOOL_ENABLED, VIOLATION_SPOOL_PATH, VIOLATION_BATCH_MAX, VIOLATION_BATCH_DELAY_MS
     )
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def log_violation_async(cctv_id, class_name, public_url, image_bytes):
+# Tinggi strip label putih di bawah crop pelanggaran (dipotong lagi oleh tools/quantize_model.py)
+POLAROID_LABEL_HEIGHT = 80
+
+def _on_violation_committed(record, violation_id):
+    """Dipanggil batch writer setelah COMMIT: hapus dari spool lalu antrekan email."""
+    if record.get("spool_id") is not None:
+        violation_spool().complete(record["spool_id"])
+    if record.get("created_at") is not None:
+        # Latensi antrian diukur sampai baris benar-benar tercatat, bukan saat diserahkan ke writer
+        violation_queue().record_latency(time.time() - record["created_at"])
+    logging.info(f"[DB LOG] SUCCESS → Violation ID: {violation_id} | CCTV {record['cctv_id']} | {record['class_name']}")
+
+    # Kirim email otomatis lewat antrian email (worker tetap)
+    if state.GLOBAL_EMAIL_CONFIG.get('enable_auto_email', False): 
+        email_queue().submit(violation_id)
+        logging.info(f"[EMAIL] Notifikasi otomatis diantrekan (Violation ID: {violation_id})")
+
+def _on_violation_failed(record, error):
+    logging.error(f"[CCTV {record['cctv_id']}] LOG GAGAL: {error}")
+    if record.get("spool_id") is not None:
+        violation_spool().fail(record["spool_id"], error)
+
+def _on_violation_coalesced(event):
+    """Event lama digantikan event terbaru dengan key sama: baris spool-nya tidak akan dikirim lagi."""
+    if event.get("spool_id") is not None and event.get("claim_token") is not None:
+        violation_spool().discard(event["spool_id"], event["claim_token"])
+
+def violation_writer():
+    return get_writer(
+        max_batch=VIOLATION_BATCH_MAX, max_delay_ms=VIOLATION_BATCH_DELAY_MS,
+        on_committed=_on_violation_committed, on_failed=_on_violation_failed
+    )
+
+def upload_and_log_violation(event):
     """
-    Fungsi yang menjalankan semua I/O berat (DB log, Daily log, Email) di thread background.
+    Handler pipeline: upload gambar ke Supabase lalu serahkan ke batch writer DB
+    (dipanggil oleh worker antrian & drainer spool). Raise hanya jika upload gagal;
+    hasil INSERT dilaporkan lewat callback writer. Baris spool baru dihapus setelah COMMIT.
     """
-    conn = None
-    cur = None
+    cctv_id, class_name = event["cctv_id"], event["class_name"]
+    spool_id = event.get("spool_id")
+    detected_at = event.get("detected_at") or time.time()
+    if spool_id is not None and event.get("claim_token") is not None:
+        # Claim bisa sudah habis dan diambil drainer selama event menunggu di antrian: jangan kirim dua kali
+        token = violation_spool().take(spool_id, event["claim_token"])
+        if token is None:
+            logging.info(f"[SPOOL] Spool id {spool_id} sudah diproses pihak lain, event dilewati")
+            return
+        event["claim_token"] = token
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        # Insert violation_detection
-        cur.execute("""
-            INSERT INTO violation_detection (id_cctv, id_violation, image, timestamp)
-            VALUES (%s, (SELECT id FROM object_class WHERE name=%s LIMIT 1), %s, NOW() AT TIME ZONE 'Asia/Jakarta')
-            RETURNING id;
-        """, (cctv_id, class_name, public_url))
-        violation_id = cur.fetchone()[0] # Dapatkan ID untuk notifikasi
-
-        # Update violation_daily_log
-        cur.execute("""
-            INSERT INTO violation_daily_log (log_date, id_cctv, id_violation, total_violation, latest_update)
-            VALUES (CURRENT_DATE AT TIME ZONE 'Asia/Jakarta', %s, 
-                    (SELECT id FROM object_class WHERE name=%s LIMIT 1), 1, NOW() AT TIME ZONE 'Asia/Jakarta')
-            ON CONFLICT (log_date, id_cctv, id_violation)
-            DO UPDATE SET 
-                total_violation = violation_daily_log.total_violation + 1,
-                latest_update = EXCLUDED.latest_update;
-        """, (cctv_id, class_name))
-
-        conn.commit()
-        logging.info(f"[DB LOG] SUCCESS → Violation ID: {violation_id} | Daily log updated")
-
-        # Kirim email otomatis (Sudah di thread terpisah)
-        if state.GLOBAL_EMAIL_CONFIG.get('enable_auto_email', False): 
-            Thread(target=notification_service.notify_user_by_violation_id, 
-                   args=(violation_id,), daemon=True).start()
-            logging.info(f"[EMAIL] Notifikasi otomatis dikirim (Violation ID: {violation_id})")
-
+        public_url = event.get("public_url")
+        if not public_url:
+            # --- BLOKIR PALING LAMA ---
+            public_url = upload_violation_image(
+                event["image_bytes"], cctv_id, class_name, datetime.datetime.fromtimestamp(detected_at)
+            )
+            if spool_id is not None:
+                # Simpan URL agar retry berikutnya tidak meng-upload ulang
+                violation_spool().mark_uploaded(spool_id, public_url)
     except Exception as e:
-        logging.error(f"[DB LOG] GAGAL: {e}")
-    finally:
-        if cur: cur.close()
-        if conn: conn.close()
-
-def upload_and_log_violation(cctv_id, class_name, image_bytes):
-    """Mengelola Upload Supabase dan memanggil log DB asinkron."""
+        logging.error(f"[CCTV {cctv_id}] UPLOAD GAGAL: {e}")
+        if spool_id is not None:
+            violation_spool().fail(spool_id, e)
+        raise
+
+    violation_writer().add({
+        "cctv_id": cctv_id, "class_name": class_name, "public_url": public_url,
+        "detected_at": detected_at, "spool_id": spool_id, "created_at": event.get("created_at")
+    })
+
+def shutdown_violation_pipeline():
+    """Flush pelanggaran yang masih menunggu di batch writer (dipanggil saat worker berhenti)."""
+    stop_writer()
+
+def violation_spool():
+    return get_spool(VIOLATION_SPOOL_PATH)
+
+def start_spool_drainer():
+    """Jalankan drainer spool proses ini (no-op jika spool dimatikan). Return SpoolDrainer atau None."""
+    if not VIOLATION_SPOOL_ENABLED:
+        return None
+    return SpoolDrainer(violation_spool(), upload_and_log_violation).start()
+
+def spool_stats():
+    if not VIOLATION_SPOOL_ENABLED:
+        return {"enabled": False}
     try:
-        # --- BLOKIR PALING LAMA ---
-        public_url = upload_violation_image(image_bytes, cctv_id, class_name)
-        
-        # Panggil I/O DB di thread baru, ini adalah thread utama I/O yang lambat
-        Thread(target=log_violation_async, 
-               args=(cctv_id, class_name, public_url, image_bytes), 
-               daemon=True).start()
+        return violation_spool().stats()
     except Exception as e:
-        logging.error(f"[CCTV {cctv_id}] UPLOAD GAGAL/LOG GAGAL: {e}")
+        return {"error": str(e)}
+
+def violation_queue():
+    return get_queue(
+        "VIOLATION", upload_and_log_violation,
+        workers=VIOLATION_WORKERS, maxsize=VIOLATION_QUEUE_SIZE, policy=VIOLATION_QUEUE_POLICY,
+        measure_latency=False, on_coalesced=_on_violation_coalesced
+    )
 
-def process_detection(cctv_id, frame, annotated, x1, y1, x2, y2, cls_id, conf, track_id, model, tracked_violations):
+def email_queue():
+    return get_queue(
+        "EMAIL", notification_service.notify_user_by_violation_id,
+        workers=EMAIL_WORKERS, maxsize=50, policy="drop_oldest"
+    )
+
+def process_detection(cctv_id, frame, annotated, x1, y1, x2, y2, cls_id, conf, track_id, model, tracked_violations,
+                      full_frame=None, roi_index=None, cctv_cfg=None, settings=None):
+    """
+    full_frame (opsional): callable yang mengembalikan frame resolusi penuh bila frame deteksi
+    sudah diperkecil saat decode (backend pyav). Crop pelanggaran diambil dari frame penuh tersebut.
+    roi_index (opsional): index ROI hasil lookup RoiMask (-1 = di luar ROI); jika diberikan,
+    point_in_polygon per region dilewati.
+    settings (opsional): snapshot detection_settings milik worker (hot-reload); default state.detection_settings.
+    """
     # 1. Ambil Config & Metadata
-    cctv_cfg = state.cctv_configs.get(cctv_id, {})
+    if cctv_cfg is None:
+        cctv_cfg = state.cctv_configs.get(cctv_id, {})
     roi_regions = cctv_cfg.get("roi", []) # Gunakan key 'roi' sesuai cctv_services.py
     location = cctv_cfg.get("location", "Unknown Location") # Definisi location di sini
     
@@ -82,10 +141,24 @@ def process_detection(cctv_id, frame, annotated, x1, y1, x2, y2, cls_id, conf, t
     class_info = state.OBJECT_CLASS_CACHE.get(class_name, {})
     class_db_id = class_info.get("id")
     
-    center = ((x1 + x2) // 2, (y1 + y2) // 2)
+    h, w = frame.shape[:2]
 
     # 2. Cari ROI target dan Filter Pelanggaran per ROI
     target_roi = None
+    if roi_index is not None:
+        # Sudah di-lookup lewat label mask oleh worker
+        if roi_index < 0:
+            return
+        target_roi = roi_regions[roi_index]
+        if class_db_id not in target_roi.get("allowed_violations", []):
+            return
+        roi_regions = []
+
+    # Titik ROI tersimpan dalam koordinat gambar editor (json_width x json_height),
+    # jadi pusat box dikonversi dulu dari resolusi frame deteksi ke ruang koordinat tersebut
+    json_w = cctv_cfg.get("json_width") or w
+    json_h = cctv_cfg.get("json_height") or h
+    center = ((x1 + x2) / 2 * json_w / w, (y1 + y2) / 2 * json_h / h)
     for region in roi_regions:
         if point_in_polygon(center, region["points"]):
             # Cek apakah class ID ini diizinkan melanggar di ROI khusus ini
@@ -101,32 +174,40 @@ def process_detection(cctv_id, frame, annotated, x1, y1, x2, y2, cls_id, conf, t
         return # Objek di luar semua area pantauan ROI
 
     # 3. Validasi Confidence & Cooldown
-    if conf < CONFIDENCE_THRESHOLD:
+    if conf < detection_setting('confidence_threshold', settings):
         return
 
     now = time.time()
     data = tracked_violations.setdefault(track_id, {"last_times": {}})
     last_time = data["last_times"].get(class_name, 0)
     
-    if now - last_time < COOLDOWN:
+    if now - last_time < detection_setting('cooldown_seconds', settings):
         return
     
     # --- 4. Visual Processing (Crop & Polaroid) ---
-    h, w = frame.shape[:2]
-    pad_w = int((x2 - x1) * PADDING_PERCENT)
-    pad_h = int((y2 - y1) * PADDING_PERCENT)
+    if full_frame is not None:
+        full = full_frame()
+        sx, sy = full.shape[1] / w, full.shape[0] / h
+        x1, x2 = int(x1 * sx), int(x2 * sx)
+        y1, y2 = int(y1 * sy), int(y2 * sy)
+        frame = full
+        h, w = frame.shape[:2]
+    padding = detection_setting('padding_percent', settings)
+    pad_w = int((x2 - x1) * padding)
+    pad_h = int((y2 - y1) * padding)
     x1e, y1e = max(0, x1 - pad_w), max(0, y1 - pad_h)
     x2e, y2e = min(w, x2 + pad_w), min(h, y2 + pad_h)
     
     crop = frame[y1e:y2e, x1e:x2e]
     if crop.size == 0: return
 
-    if crop.shape[1] < TARGET_MAX_WIDTH:
-        scale = TARGET_MAX_WIDTH / crop.shape[1]
-        crop = cv2.resize(crop, (TARGET_MAX_WIDTH, int(crop.shape[0] * scale)))
+    target_width = int(detection_setting('target_max_width', settings))
+    if crop.shape[1] < target_width:
+        scale = target_width / crop.shape[1]
+        crop = cv2.resize(crop, (target_width, int(crop.shape[0] * scale)))
 
     # Tambahkan Label Informasi pada Polaroid
-    label_height = 80
+    label_height = POLAROID_LABEL_HEIGHT
     polaroid = np.ones((crop.shape[0] + label_height, crop.shape[1], 3), dtype=np.uint8) * 255
     polaroid[:crop.shape[0], :] = crop
 
@@ -146,8 +227,18 @@ def process_detection(cctv_id, frame, annotated, x1, y1, x2, y2, cls_id, conf, t
     success, buffer = cv2.imencode(".jpg", polaroid, [cv2.IMWRITE_JPEG_QUALITY, 85])
     if success:
         data["last_times"][class_name] = now 
-        image_bytes = buffer.tobytes()
-        # Jalankan I/O berat di background thread
-        Thread(target=upload_and_log_violation, 
-               args=(cctv_id, class_name, image_bytes), 
-               daemon=True).start()
\ No newline at end of file
+        event = {
+            "cctv_id": cctv_id, "class_name": class_name, "image_bytes": buffer.tobytes(),
+            "track_id": track_id, "detected_at": now, "created_at": now
+        }
+        # Tulis ke spool lokal dulu (insert SQLite, tanpa jaringan) agar event selamat walau upload/DB gagal
+        if VIOLATION_SPOOL_ENABLED:
+            try:
+                event["spool_id"], event["claim_token"] = violation_spool().put(
+                    cctv_id, class_name, event["image_bytes"], detected_at=now, track_id=track_id
+                )
+            except Exception as e:
+                logging.error(f"[SPOOL] Gagal menulis spool, event hanya diantrekan di memori: {e}")
+        # I/O berat (upload + DB) dikerjakan worker antrian; loop deteksi tidak pernah menunggu.
+        # Event yang terbuang dari antrian tetap ada di spool dan dikirim oleh drainer setelah claim habis.
+        violation_queue().submit(event, key=(cctv_id, track_id, class_name), created_at=now)
\ No newline at end of file
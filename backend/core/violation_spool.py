@@ -0,0 +1,250 @@
+# backend/core/violation_spool.py
+import os
+import time
+import random
+import sqlite3
+import logging
+from threading import Thread, Event, Lock
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS violation_spool (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    cctv_id         INTEGER NOT NULL,
+    class_name      TEXT    NOT NULL,
+    track_id        INTEGER,
+    detected_at     REAL    NOT NULL,
+    image           BLOB    NOT NULL,
+    public_url      TEXT,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL    NOT NULL DEFAULT 0,
+    claimed_until   REAL    NOT NULL DEFAULT 0,
+    last_error      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_violation_spool_due ON violation_spool (next_attempt_at, claimed_until);
+"""
+
+class ViolationSpool:
+    """
+    Spool lokal (SQLite mode WAL) untuk pelanggaran yang belum tercatat di PostgreSQL.
+
+    Alur: process_detection menulis JPEG + metadata ke sini dulu, baru upload Supabase dan
+    INSERT dijalankan oleh worker antrian. Baris hanya dihapus setelah tercatat di DB;
+    jika gagal, baris dijadwalkan ulang dengan exponential backoff dan diambil oleh drainer.
+    public_url disimpan setelah upload sukses sehingga retry tidak meng-upload ulang.
+
+    Claim: nilai claimed_until sekaligus menjadi token pemilik. Siapa pun yang akan memproses baris
+    (worker antrian, drainer, replay) wajib take() dengan token miliknya; jika claim sudah berpindah
+    (mis. habis lalu diambil drainer), take() gagal dan event dilewati sehingga tidak terkirim dua kali.
+    """
+    def __init__(self, path, base_backoff=5.0, max_backoff=600.0):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def put(self, cctv_id, class_name, image_bytes, detected_at=None, track_id=None, claim_seconds=300):
+        """
+        Simpan pelanggaran baru. Baris langsung di-claim selama claim_seconds karena akan dikirim
+        lewat antrian di memori; drainer baru mengambilnya bila claim habis (mis. event dibuang antrian).
+        Return (spool_id, claim_token).
+        """
+        now = time.time()
+        token = now + claim_seconds
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO violation_spool (cctv_id, class_name, track_id, detected_at, image, next_attempt_at, claimed_until) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cctv_id, class_name, track_id, detected_at or now, sqlite3.Binary(image_bytes), now, token)
+            )
+            return cur.lastrowid, token
+
+    def take(self, spool_id, token, claim_seconds=300):
+        """
+        Ambil alih claim secara atomik sebelum memproses baris: berhasil hanya jika claimed_until masih
+        sama dengan token milik pemanggil. Return token baru (claim diperpanjang), atau None jika claim
+        sudah berpindah ke proses lain / baris sudah selesai.
+        """
+        new_token = max(time.time() + claim_seconds, token + 1e-3)
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE violation_spool SET claimed_until = ? WHERE id = ? AND claimed_until = ?",
+                (new_token, spool_id, token)
+            )
+        return new_token if cur.rowcount == 1 else None
+
+    def discard(self, spool_id, token):
+        """Hapus baris yang event-nya digantikan (coalesce), hanya jika claim masih milik pemanggil."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM violation_spool WHERE id = ? AND claimed_until = ?", (spool_id, token)
+            )
+        return cur.rowcount == 1
+
+    def claim_due(self, limit=20, claim_seconds=120):
+        """Ambil baris yang sudah jatuh tempo dan tidak sedang di-claim."""
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE: file spool dipakai bersama oleh semua worker, claim harus atomik antar proses
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, cctv_id, class_name, track_id, detected_at, image, public_url, attempts "
+                    "FROM violation_spool WHERE next_attempt_at <= ? AND claimed_until <= ? "
+                    "ORDER BY detected_at LIMIT ?",
+                    (now, now, limit)
+                ).fetchall()
+                token = now + claim_seconds
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE violation_spool SET claimed_until = ? WHERE id = ?",
+                        [(token, r[0]) for r in rows]
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        keys = ("spool_id", "cctv_id", "class_name", "track_id", "detected_at", "image_bytes", "public_url", "attempts")
+        return [dict(zip(keys, r), claim_token=token) for r in rows]
+
+    def mark_uploaded(self, spool_id, public_url):
+        with self._lock:
+            self._conn.execute("UPDATE violation_spool SET public_url = ? WHERE id = ?", (public_url, spool_id))
+
+    def complete(self, spool_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM violation_spool WHERE id = ?", (spool_id,))
+
+    def fail(self, spool_id, error):
+        """Jadwalkan ulang dengan exponential backoff (+ jitter) dan lepas claim."""
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM violation_spool WHERE id = ?", (spool_id,)).fetchone()
+            if row is None:
+                return
+            attempts = row[0] + 1
+            delay = min(self.max_backoff, self.base_backoff * (2 ** (attempts - 1)))
+            delay *= random.uniform(0.8, 1.2)
+            self._conn.execute(
+                "UPDATE violation_spool SET attempts = ?, next_attempt_at = ?, claimed_until = 0, last_error = ? "
+                "WHERE id = ?",
+                (attempts, time.time() + delay, str(error)[:500], spool_id)
+            )
+
+    def release_claims(self, force=False):
+        """
+        Hapus backoff agar baris langsung bisa diproses (replay). Baris yang sedang di-claim proses lain
+        (claim belum habis) tidak disentuh, kecuali force=True: hanya aman jika semua worker berhenti.
+        Return jumlah baris yang dilepas.
+        """
+        with self._lock:
+            if force:
+                cur = self._conn.execute("UPDATE violation_spool SET claimed_until = 0, next_attempt_at = 0")
+            else:
+                cur = self._conn.execute(
+                    "UPDATE violation_spool SET claimed_until = 0, next_attempt_at = 0 WHERE claimed_until <= ?",
+                    (time.time(),)
+                )
+            return cur.rowcount
+
+    def list(self, limit=50):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, cctv_id, class_name, detected_at, attempts, public_url IS NOT NULL, last_error "
+                "FROM violation_spool ORDER BY detected_at LIMIT ?", (limit,)
+            ).fetchall()
+
+    def sample_images(self, limit=100):
+        """JPEG acak dari spool (read-only, tidak menyentuh claim) untuk kalibrasi / evaluasi model."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT image FROM violation_spool ORDER BY RANDOM() LIMIT ?", (limit,)
+            ).fetchall()
+        return [bytes(row[0]) for row in rows]
+
+    def purge(self, older_than_seconds):
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM violation_spool WHERE detected_at < ?", (time.time() - older_than_seconds,)
+            )
+            return cur.rowcount
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            pending, oldest, retrying, due = self._conn.execute(
+                "SELECT COUNT(*), MIN(detected_at), "
+                "COALESCE(SUM(attempts > 0), 0), COALESCE(SUM(next_attempt_at <= ? AND claimed_until <= ?), 0) "
+                "FROM violation_spool", (now, now)
+            ).fetchone()
+        return {
+            "path": self.path,
+            "pending": pending,
+            "retrying": retrying,
+            "due": due,
+            "oldest_age_s": round(now - oldest, 1) if oldest else None,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class SpoolDrainer:
+    """
+    Thread latar yang mengirim ulang baris spool yang jatuh tempo (gagal sebelumnya, atau dibuang antrian).
+    deliver(event) harus raise jika gagal; baris lalu dijadwalkan ulang dengan backoff.
+    """
+    def __init__(self, spool, deliver, interval=2.0, batch=20):
+        self.spool = spool
+        self.deliver = deliver
+        self.interval = interval
+        self.batch = batch
+        self._stop = Event()
+        self._thread = None
+        self.delivered = 0
+        self.failed = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = Thread(target=self._run, daemon=True, name="SpoolDrainer")
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                events = self.spool.claim_due(self.batch)
+            except Exception as e:
+                logging.error(f"[SPOOL] Gagal membaca spool: {e}")
+                events = []
+
+            for event in events:
+                if self._stop.is_set():
+                    break
+                try:
+                    self.deliver(event)
+                    self.delivered += 1
+                except Exception as e:
+                    self.failed += 1
+                    logging.warning(f"[SPOOL] Retry #{event['attempts'] + 1} gagal (spool id {event['spool_id']}): {e}")
+
+            # Batch penuh = kemungkinan masih ada backlog, langsung lanjut tanpa menunggu
+            if len(events) < self.batch:
+                self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+
+_spool = None
+_spool_lock = Lock()
+
+def get_spool(path):
+    global _spool
+    with _spool_lock:
+        if _spool is None:
+            _spool = ViolationSpool(path)
+            logging.info(f"[SPOOL] Menggunakan spool {path}")
+        return _spool
@@ -0,0 +1,230 @@
+# backend/core/violation_writer.py
+import time
+import logging
+import datetime
+from collections import defaultdict, deque
+from threading import Thread, Condition, Lock
+from psycopg2.extras import execute_values
+
+import services.config_service as config_service
+from shared_state import state
+from db.db_config import get_connection
+
+# Asia/Jakarta tidak memakai DST, cukup offset tetap (sama dengan AT TIME ZONE 'Asia/Jakarta' di query)
+JAKARTA_TZ = datetime.timezone(datetime.timedelta(hours=7), "Asia/Jakarta")
+
+def _resolve_class_ids(records):
+    """Nama kelas -> id dari OBJECT_CLASS_CACHE (refresh sekali dari DB jika ada kelas yang belum dikenal)."""
+    names = {r["class_name"] for r in records}
+    if any(name not in state.OBJECT_CLASS_CACHE for name in names):
+        config_service.load_object_classes(force_refresh=True)
+    return {name: state.OBJECT_CLASS_CACHE.get(name, {}).get("id") for name in names}
+
+def insert_violations(cur, records, class_ids):
+    """
+    Tulis satu batch pelanggaran dengan 2 statement: satu INSERT multi-row (RETURNING id) ke
+    violation_detection dan satu upsert teragregasi ke violation_daily_log. Return list id sesuai urutan records.
+    """
+    rows = [
+        (r["cctv_id"], class_ids[r["class_name"]], r["public_url"], r["detected_at"])
+        for r in records
+    ]
+    result = execute_values(
+        cur,
+        "INSERT INTO violation_detection (id_cctv, id_violation, image, timestamp) VALUES %s RETURNING id",
+        rows,
+        template="(%s, %s, %s, to_timestamp(%s) AT TIME ZONE 'Asia/Jakarta')",
+        page_size=len(rows),
+        fetch=True
+    )
+
+    # ON CONFLICT tidak boleh menyentuh baris yang sama dua kali dalam satu statement -> agregasi dulu
+    daily = defaultdict(int)
+    for cctv_id, class_id, _, detected_at in rows:
+        log_date = datetime.datetime.fromtimestamp(detected_at, JAKARTA_TZ).date()
+        daily[(log_date, cctv_id, class_id)] += 1
+    execute_values(
+        cur,
+        """
+        INSERT INTO violation_daily_log (log_date, id_cctv, id_violation, total_violation, latest_update)
+        VALUES %s
+        ON CONFLICT (log_date, id_cctv, id_violation)
+        DO UPDATE SET
+            total_violation = violation_daily_log.total_violation + EXCLUDED.total_violation,
+            latest_update = EXCLUDED.latest_update;
+        """,
+        [(d, c, v, n) for (d, c, v), n in daily.items()],
+        template="(%s, %s, %s, %s, NOW() AT TIME ZONE 'Asia/Jakarta')",
+        page_size=len(daily)
+    )
+    return [row[0] for row in result]
+
+class ViolationBatchWriter:
+    """
+    Mengumpulkan pelanggaran selama max_delay_ms (atau sampai max_batch) lalu menulisnya dalam satu transaksi.
+    Flush terjadi karena ukuran, waktu, atau shutdown (stop()).
+
+    on_committed(record, violation_id) dipanggil per record setelah COMMIT,
+    on_failed(record, error) dipanggil per record jika batch gagal (spool yang akan mencoba ulang).
+    """
+    def __init__(self, max_batch=200, max_delay_ms=300, on_committed=None, on_failed=None, name="VIOLATION-WRITER"):
+        self.max_batch = max(1, int(max_batch))
+        self.max_delay = max(0.0, max_delay_ms / 1000.0)
+        self.on_committed = on_committed
+        self.on_failed = on_failed
+        self.name = name
+        self._pending = []
+        self._oldest_at = None
+        self._cond = Condition(Lock())
+        self._flush_lock = Lock()
+        self._thread = None
+        self._stopping = False
+        self._flush_durations = deque(maxlen=100)
+        self._stats = {
+            "rows": 0, "batches": 0, "failed_rows": 0, "failed_batches": 0,
+            "flush_size": 0, "flush_time": 0, "flush_shutdown": 0, "write_s_total": 0.0
+        }
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, daemon=True, name=self.name)
+                self._thread.start()
+        return self
+
+    def add(self, record):
+        """record: dict cctv_id, class_name, public_url, detected_at (epoch) + field bebas untuk callback."""
+        with self._cond:
+            if not self._pending:
+                self._oldest_at = time.monotonic()
+            self._pending.append(record)
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if len(self._pending) >= self.max_batch:
+                        reason = "flush_size"
+                        break
+                    if self._pending:
+                        remaining = self._oldest_at + self.max_delay - time.monotonic()
+                        if remaining <= 0:
+                            reason = "flush_time"
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                else:
+                    return
+            self.flush(reason)
+
+    def flush(self, reason="flush_time"):
+        """Tulis semua record yang tertunda (sinkron). Dipanggil thread writer, stop(), atau tool replay."""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            while batch:
+                chunk, batch = batch[:self.max_batch], batch[self.max_batch:]
+                self._write(chunk, reason)
+
+    def _write(self, records, reason):
+        started = time.perf_counter()
+        conn = cur = None
+        try:
+            class_ids = _resolve_class_ids(records)
+            unknown = [r for r in records if class_ids[r["class_name"]] is None]
+            if unknown:
+                for r in unknown:
+                    self._fail(r, ValueError(f"Kelas '{r['class_name']}' tidak ada di object_class"))
+                records = [r for r in records if class_ids[r["class_name"]] is not None]
+                if not records:
+                    return
+
+            conn = get_connection()
+            cur = conn.cursor()
+            ids = insert_violations(cur, records, class_ids)
+            conn.commit()
+        except Exception as e:
+            if conn: conn.rollback()
+            logging.error(f"[{self.name}] Batch {len(records)} pelanggaran gagal ditulis: {e}")
+            with self._cond:
+                self._stats["failed_batches"] += 1
+            for r in records:
+                self._fail(r, e)
+            return
+        finally:
+            if cur: cur.close()
+            if conn: conn.close()
+
+        elapsed = time.perf_counter() - started
+        with self._cond:
+            self._stats["rows"] += len(records)
+            self._stats["batches"] += 1
+            self._stats[reason] += 1
+            self._stats["write_s_total"] += elapsed
+            self._flush_durations.append((len(records), elapsed))
+        logging.info(f"[DB LOG] {len(records)} pelanggaran ditulis dalam {elapsed * 1000:.1f} ms ({reason})")
+
+        if self.on_committed:
+            for r, violation_id in zip(records, ids):
+                try:
+                    self.on_committed(r, violation_id)
+                except Exception as e:
+                    logging.error(f"[{self.name}] Callback commit gagal: {e}")
+
+    def _fail(self, record, error):
+        with self._cond:
+            self._stats["failed_rows"] += 1
+        if self.on_failed:
+            try:
+                self.on_failed(record, error)
+            except Exception as e:
+                logging.error(f"[{self.name}] Callback gagal: {e}")
+
+    def stop(self, timeout=5.0):
+        """Hentikan thread writer lalu flush sisa record (shutdown)."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush("flush_shutdown")
+
+    def stats(self):
+        with self._cond:
+            s = dict(self._stats)
+            s["pending"] = len(self._pending)
+            recent = list(self._flush_durations)
+        write_s = s.pop("write_s_total")
+        recent_rows = sum(n for n, _ in recent)
+        recent_s = sum(t for _, t in recent)
+        s["avg_batch"] = round(s["rows"] / s["batches"], 1) if s["batches"] else None
+        s["rows_per_sec"] = round(s["rows"] / write_s, 1) if write_s else None
+        s["recent_rows_per_sec"] = round(recent_rows / recent_s, 1) if recent_s else None
+        s["max_batch"] = self.max_batch
+        s["max_delay_ms"] = int(self.max_delay * 1000)
+        return s
+
+_writer = None
+_writer_lock = Lock()
+
+def get_writer(**kwargs):
+    """Satu ViolationBatchWriter per proses, dibuat & dijalankan saat pertama dipakai."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ViolationBatchWriter(**kwargs).start()
+        return _writer
+
+def writer_stats():
+    with _writer_lock:
+        return _writer.stats() if _writer is not None else None
+
+def stop_writer():
+    with _writer_lock:
+        writer = _writer
+    if writer is not None:
+        writer.stop()
@@ -1,18 +1,285 @@
 import psycopg2
 import os
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from threading import Condition, Lock
+from psycopg2 import extensions
 from dotenv import load_dotenv
 
 # Load environment variables dari file .env
 load_dotenv()
 
-# --- PostgreSQL Connection ---
-def get_connection():
-    return psycopg2.connect(
+# --- Pool Configuration ---
+DB_POOL_ENABLED = os.getenv("DB_POOL_ENABLED", "1").lower() not in ("0", "false", "no")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+DB_POOL_HEALTH_CHECK_IDLE = float(os.getenv("DB_POOL_HEALTH_CHECK_IDLE", 30))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", 300))
+
+def _connect_params():
+    return dict(
         host=os.getenv("DB_HOST"),
         database=os.getenv("DB_NAME"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
         port=os.getenv("DB_PORT"),
-        sslmode="require"  
+        sslmode=os.getenv("DB_SSLMODE", "require")
     )
 
+class PoolTimeout(Exception):
+    pass
+
+class PooledConnection(extensions.connection):
+    """
+    Koneksi psycopg2 biasa, hanya saja close() mengembalikannya ke pool.
+    Dengan begitu semua pemanggil lama (conn = get_connection() ... conn.close()) otomatis memakai pool.
+    """
+    _pool = None
+
+    def close(self):
+        pool = self._pool
+        if pool is not None:
+            pool._release(self)
+        else:
+            super().close()
+
+    def _close_physical(self):
+        self._pool = None
+        super().close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # psycopg2: commit/rollback; pool: sekaligus kembalikan koneksi
+        try:
+            return super().__exit__(exc_type, exc_value, traceback)
+        finally:
+            self.close()
+
+class ConnectionPool:
+    """
+    Pool koneksi PostgreSQL thread-safe per proses (API Flask, worker, scheduler, orchestrator).
+    - min/max ukuran pool, checkout menunggu maksimal timeout detik saat pool penuh
+    - health check saat checkout (SELECT 1 untuk koneksi yang lama idle)
+    - koneksi yang tidak pernah di-close oleh pemanggil terdeteksi lewat weakref dan slotnya dikembalikan
+    """
+    def __init__(self, minconn, maxconn, timeout=10, health_check_idle=30, max_idle=300):
+        self.minconn = max(0, minconn)
+        self.maxconn = max(1, maxconn)
+        self.timeout = timeout
+        self.health_check_idle = health_check_idle
+        self.max_idle = max_idle
+        self._cond = Condition(Lock())
+        self._idle = []  # list (conn, idle_since)
+        self._checked_out = {}
+        self._lost_keys = deque()  # diisi callback weakref (tanpa lock, bisa terpanggil kapan saja oleh GC)
+        self._total = 0
+        self._stats = {
+            "created": 0, "broken": 0, "leaked": 0, "timeouts": 0, "checkouts": 0,
+            "wait_ms_total": 0.0, "wait_ms_max": 0.0
+        }
+
+    def _new_connection(self):
+        conn = psycopg2.connect(connection_factory=PooledConnection, **_connect_params())
+        conn._pool = self
+        self._stats["created"] += 1
+        return conn
+
+    def _is_healthy(self, conn, idle_since):
+        if conn.closed or conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if time.time() - idle_since < self.health_check_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn._close_physical()
+        except Exception:
+            pass
+
+    def _reap_lost(self):
+        # Harus dipanggil dengan self._cond terkunci
+        while self._lost_keys:
+            key = self._lost_keys.popleft()
+            if self._checked_out.pop(key, None) is not None:
+                self._total -= 1
+                self._stats["leaked"] += 1
+
+    def get(self):
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        while True:
+            conn = idle_since = None
+            create = False
+            with self._cond:
+                self._reap_lost()
+                while True:
+                    if self._idle:
+                        conn, idle_since = self._idle.pop()
+                        break
+                    if self._total < self.maxconn:
+                        self._total += 1
+                        create = True
+                        break
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"Tidak ada koneksi DB tersedia dalam {self.timeout} detik (max={self.maxconn}).")
+                    self._cond.wait(min(remaining, 1.0))
+                    self._reap_lost()
+
+            if create:
+                try:
+                    conn = self._new_connection()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(conn, idle_since):
+                self._discard(conn)
+                with self._cond:
+                    self._total -= 1
+                    self._stats["broken"] += 1
+                continue
+
+            waited = (time.perf_counter() - started) * 1000
+            with self._cond:
+                key = id(conn)
+                self._checked_out[key] = weakref.ref(conn, lambda _ref, key=key, lost=self._lost_keys: lost.append(key))
+                self._stats["checkouts"] += 1
+                self._stats["wait_ms_total"] += waited
+                self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], waited)
+            return conn
+
+    def _release(self, conn):
+        with self._cond:
+            if id(conn) not in self._checked_out:
+                return  # sudah dikembalikan sebelumnya (close() dipanggil dua kali)
+
+        healthy = True
+        try:
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if conn.autocommit:
+                conn.autocommit = False
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            if self._checked_out.pop(id(conn), None) is None:
+                return
+            now = time.time()
+            if healthy and not conn.closed:
+                # Buang koneksi idle terlama di atas minconn agar pool menyusut saat sepi
+                while len(self._idle) > self.minconn and now - self._idle[0][1] > self.max_idle:
+                    stale, _ = self._idle.pop(0)
+                    self._discard(stale)
+                    self._total -= 1
+                self._idle.append((conn, now))
+            else:
+                self._discard(conn)
+                self._total -= 1
+                self._stats["broken"] += 1
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            for conn, _ in self._idle:
+                self._discard(conn)
+                self._total -= 1
+            self._idle.clear()
+
+    def stats(self):
+        with self._cond:
+            self._reap_lost()
+            s = dict(self._stats)
+            in_use = len(self._checked_out)
+            idle = len(self._idle)
+        checkouts = max(s["checkouts"], 1)
+        return {
+            "enabled": True,
+            "min": self.minconn,
+            "max": self.maxconn,
+            "in_use": in_use,
+            "idle": idle,
+            "created": s["created"],
+            "broken": s["broken"],
+            "leaked": s["leaked"],
+            "timeouts": s["timeouts"],
+            "checkouts": s["checkouts"],
+            "wait_ms_avg": round(s["wait_ms_total"] / checkouts, 3),
+            "wait_ms_max": round(s["wait_ms_max"], 3),
+        }
+
+_pool = None
+_pool_pid = None
+_pool_lock = Lock()
+_pool_enabled = DB_POOL_ENABLED
+
+def get_pool():
+    """Pool milik proses ini (dibuat ulang jika proses hasil fork)."""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool(
+                    DB_POOL_MIN, DB_POOL_MAX, timeout=DB_POOL_TIMEOUT,
+                    health_check_idle=DB_POOL_HEALTH_CHECK_IDLE, max_idle=DB_POOL_MAX_IDLE
+                )
+                _pool_pid = os.getpid()
+    return _pool
+
+def set_pool_enabled(enabled: bool):
+    """Dipakai benchmark untuk membandingkan dengan/ tanpa pool."""
+    global _pool_enabled
+    _pool_enabled = enabled
+
+def pool_stats():
+    if not _pool_enabled:
+        return {"enabled": False}
+    return get_pool().stats()
+
+# --- PostgreSQL Connection ---
+def get_connection():
+    """
+    Koneksi dari pool proses ini. Pemanggil tetap memanggil conn.close() seperti biasa,
+    yang sekarang mengembalikan koneksi ke pool alih-alih memutus TCP + TLS.
+    """
+    if _pool_enabled:
+        return get_pool().get()
+    return psycopg2.connect(**_connect_params())
+
+@contextmanager
+def db_cursor(cursor_factory=None):
+    """Context manager: pinjam koneksi, commit jika sukses / rollback jika error, lalu kembalikan."""
+    conn = get_connection()
+    cur = None
+    try:
+        cur = conn.cursor(cursor_factory=cursor_factory)
+        yield cur
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if cur is not None:
+            cur.close()
+        conn.close()
+
+def get_listen_connection():
+    """
+    Koneksi khusus di luar pool untuk LISTEN/NOTIFY (autocommit, dipegang selamanya oleh satu thread).
+    Tidak boleh dikembalikan ke pool: sesi LISTEN melekat pada koneksi fisik.
+    """
+    conn = psycopg2.connect(**_connect_params())
+    conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    return conn
@@ -9,6 +9,12 @@ from psycopg2.extras import RealDictCursor, execute_batch
 
 from db.db_config import get_connection
 from utils.auth import require_role
+from core.video_source import CAPTURE_BACKENDS
+from core.inference_backends import IMGSZ_STRIDE, IMGSZ_MIN, IMGSZ_MAX
+from core.cctv_scheduler import bump_schedule_version
+from services.cctv_services import notify_cctv_changed
+from services.config_bus import publish_config_change, SCOPE_CCTV
+from utils.redis_client import get_redis
 import config as config
 
 cctv_bp = Blueprint('cctv', __name__, url_prefix='/api')
@@ -30,6 +36,35 @@ def is_valid_ip(ip_address):
     except:
         return False
 
+# --- Helper: Validasi opsi capture per kamera (kolom capture_backend & decode_width) ---
+def validate_capture_options(data):
+    """Mengembalikan pesan error, atau None jika valid."""
+    backend = data.get('capture_backend')
+    if backend is not None and backend not in CAPTURE_BACKENDS:
+        return f"Invalid capture_backend (must be one of: {', '.join(CAPTURE_BACKENDS)})"
+    decode_width = data.get('decode_width')
+    if decode_width not in (None, ''):
+        try:
+            if int(decode_width) < 160:
+                return "decode_width must be at least 160 pixels"
+        except (TypeError, ValueError):
+            return "decode_width must be an integer"
+    return None
+
+# --- Helper: Validasi opsi inferensi di area (roi_crop, imgsz) ---
+def validate_area_options(area):
+    """Mengembalikan pesan error, atau None jika valid."""
+    imgsz = area.get('imgsz')
+    if imgsz in (None, '', 0):
+        return None
+    try:
+        imgsz = int(imgsz)
+    except (TypeError, ValueError):
+        return "area.imgsz must be an integer"
+    if imgsz % IMGSZ_STRIDE or not IMGSZ_MIN <= imgsz <= IMGSZ_MAX:
+        return f"area.imgsz must be a multiple of {IMGSZ_STRIDE} between {IMGSZ_MIN} and {IMGSZ_MAX}"
+    return None
+
 # --- Helper: Menghapus dan menyimpan jadwal CCTV ---
 def save_cctv_schedules(conn, cur, cctv_id, schedules):
     """Menghapus jadwal lama dan menyimpan jadwal baru secara satu per satu hari."""
@@ -94,6 +129,26 @@ def add_new_cctv():
                 return jsonify({"error": "Invalid ROI format"}), 400
         except json.JSONDecodeError:
             return jsonify({"error": "Invalid JSON in area"}), 400
+        area_error = validate_area_options(roi_json)
+        if area_error:
+            return jsonify({"error": area_error}), 400
+
+    capture_error = validate_capture_options(data)
+    if capture_error:
+        return jsonify({"error": capture_error}), 400
+
+    # Kolom opsional hanya disertakan jika dikirim (kompatibel dengan skema lama)
+    columns = ['name', 'ip_address', 'port', 'token', 'location', 'area', 'enabled']
+    values = [
+        data['name'], data['ip_address'], data['port'], data['token'],
+        data.get('location'),
+        json.dumps(roi_json) if roi_json else None,
+        data.get('enabled', False)
+    ]
+    for key in ('capture_backend', 'decode_width'):
+        if data.get(key) not in (None, ''):
+            columns.append(key)
+            values.append(data[key])
         
     conn = None
     cur = None
@@ -102,17 +157,13 @@ def add_new_cctv():
         cur = conn.cursor(cursor_factory=RealDictCursor)
 
         # Simpan langsung ke database dalam bentuk JSON string (Psycopg2 akan menangani JSONB)
-        cur.execute("""
-            INSERT INTO cctv_data (name, ip_address, port, token, location, area, enabled)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        cur.execute(f"""
+            INSERT INTO cctv_data ({', '.join(columns)})
+            VALUES ({', '.join(['%s'] * len(values))})
             RETURNING id
-        """, (
-            data['name'], data['ip_address'], data['port'], data['token'],
-            data.get('location'), 
-            json.dumps(roi_json) if roi_json else None,
-            data.get('enabled', False)
-        ))
+        """, values)
         cctv_id = cur.fetchone()['id']
+        notify_cctv_changed(cur, cctv_id)
         conn.commit()
 
         return jsonify({
@@ -237,12 +288,25 @@ def update_cctv(cctv_id):
         if 'area' in data:
             try:
                 roi_json = json.loads(data['area']) if isinstance(data['area'], str) else data['area']
+                area_error = validate_area_options(roi_json) if isinstance(roi_json, dict) else None
+                if area_error:
+                    return jsonify({"error": area_error}), 400
                 update_fields.append("area = %s")
                 update_values.append(json.dumps(roi_json))
                 needs_restart = True 
             except Exception as e:
                 return jsonify({"error": f"Invalid ROI JSON: {str(e)}"}), 400
 
+        if 'capture_backend' in data or 'decode_width' in data:
+            capture_error = validate_capture_options(data)
+            if capture_error:
+                return jsonify({"error": capture_error}), 400
+            for key in ('capture_backend', 'decode_width'):
+                if key in data:
+                    update_fields.append(f"{key} = %s")
+                    update_values.append(data[key] if data[key] != '' else None)
+                    needs_restart = True
+
         if 'schedules' in data:
             save_cctv_schedules(conn, cur, cctv_id, data['schedules'])
 
@@ -253,8 +317,15 @@ def update_cctv(cctv_id):
         update_values.append(cctv_id)
         cur.execute(update_query, update_values)
         updated_cctv = cur.fetchone()
+        # pm2_manager: start/stop/rename worker segera setelah commit
+        notify_cctv_changed(cur, cctv_id)
         conn.commit()
 
+        # Worker kamera ini memuat ulang ROI / roi_crop / koneksi stream tanpa restart proses
+        publish_config_change(get_redis(), SCOPE_CCTV, cctv_id)
+        if 'schedules' in data:
+            bump_schedule_version(cctv_id)
+
         return jsonify(updated_cctv), 200
     except Exception as e:
         if conn: conn.rollback()
@@ -287,6 +358,7 @@ def delete_cctv(cctv_id):
 
         # 3. Hapus dari DB (Tabel Induk)
         cur.execute("DELETE FROM cctv_data WHERE id = %s", (cctv_id,))
+        notify_cctv_changed(cur, cctv_id)
         conn.commit()
         
         return jsonify({"success": True}), 200
@@ -384,6 +456,7 @@ def cctv_schedules(cctv_id):
                     execute_batch(cur, insert_query, data)
 
             conn.commit()
+            bump_schedule_version(cctv_id)
             return jsonify({"success": True})
         except Exception as e:
             conn.rollback()
@@ -1,24 +1,33 @@
 import cv2
-import time
+import json
 import logging
-import redis
 import numpy as np
 
 from flask import Blueprint, request, Response, jsonify
 from psycopg2.extras import RealDictCursor
 
-from db.db_config import get_connection
+from db.db_config import get_connection, pool_stats
 from utils.auth import require_role
+from utils.redis_client import get_redis
+from services.frame_hub import get_frame_hub
+from services.frame_transport import RENDITIONS, DEFAULT_RENDITION
+from services.config_bus import publish_config_change, SCOPE_SETTINGS
 import services.config_service as config_service
 from shared_state import state
 
-r = redis.Redis(host='localhost', port=6379, db=0)
+r = get_redis()
+frame_hub = get_frame_hub(r)
 misc_bp = Blueprint('misc', __name__, url_prefix='/api')
 
 @misc_bp.route("/video-feed")
 @require_role(['super_admin', 'report_viewer', 'viewer'])
 def video_feed():
     cctv_id = int(request.args.get("id", 1))
+    # Rendition (thumb/medium/full) & kualitas JPEG yang diminta; diteruskan ke worker lewat key presence viewer
+    size = request.args.get("size", DEFAULT_RENDITION)
+    if size not in RENDITIONS:
+        return jsonify({"error": f"size harus salah satu dari: {', '.join(RENDITIONS)}"}), 400
+    quality = min(max(request.args.get("quality", 80, type=int), 30), 95)
 
     def gen():
         # Menyiapkan frame placeholder jika kamera offline
@@ -30,24 +39,40 @@ def video_feed():
         _, placeholder_jpeg = cv2.imencode('.jpg', placeholder_disconnected)
         placeholder_bytes = placeholder_jpeg.tobytes()
 
-        while True:
-            # Mengambil byte gambar dari Redis berdasarkan ID CCTV
-            # Key format: cctv_frame:[id] (sesuai dengan yang di-set di worker)
-            frame_bytes = r.get(f"cctv_frame:{cctv_id}")
+        # Semua viewer kamera ini berbagi satu pembaca Redis di FrameHub; hanya frame baru yang dikirim,
+        # placeholder dikirim jika worker tidak mengirim frame (mati / stream putus)
+        for frame_bytes in frame_hub.stream(cctv_id, placeholder_bytes, size=size, quality=quality):
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
 
-            if frame_bytes:
-                # Jika data ada di Redis, kirim ke frontend
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            else:
-                # Jika data kosong (worker mati atau key expired), kirim placeholder
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + placeholder_bytes + b'\r\n')
+    return Response(gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
-            # Berikan sedikit jeda untuk mengontrol FPS stream (sekitar 10-15 FPS)
-            time.sleep(0.07)
+@misc_bp.route("/video-feed/stats")
+@require_role(['super_admin'])
+def video_feed_stats():
+    """Jumlah viewer, umur frame terakhir, dan client lambat yang diputus per kamera (proses API ini)."""
+    return jsonify(frame_hub.stats())
 
-    return Response(gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
+@misc_bp.route("/worker-status")
+@require_role(['super_admin'])
+def worker_status():
+    """Status terakhir setiap worker CCTV (ring buffer, counter frame, dll) yang dipublikasikan ke Redis."""
+    statuses = []
+    try:
+        keys = sorted(r.scan_iter("cctv_worker_status:*"))
+        for raw in r.mget(keys) if keys else []:
+            if raw:
+                statuses.append(json.loads(raw))
+    except Exception as e:
+        logging.error(f"[WORKER STATUS] Gagal membaca status dari Redis: {e}")
+        return jsonify({"error": str(e)}), 500
+    return jsonify(sorted(statuses, key=lambda s: s.get("cctv_id", 0)))
+
+@misc_bp.route("/db-pool-stats")
+@require_role(['super_admin'])
+def db_pool_stats():
+    """Metrik pool koneksi PostgreSQL milik proses API (in-use, idle, created, broken, wait time)."""
+    return jsonify(pool_stats())
 
 @misc_bp.route('/settings', methods=['GET', 'POST'])
 @require_role(['super_admin'])
@@ -138,9 +163,10 @@ def detection_settings():
                 """, (item['value'], item['key']))
             conn.commit()
             
-            # Reload ke memory
+            # Reload ke memory, lalu beri tahu semua worker (hot-reload, tanpa restart PM2)
             from services.config_service import load_detection_settings
             load_detection_settings()
+            publish_config_change(r, SCOPE_SETTINGS)
             
             return jsonify({"success": True})
     finally:
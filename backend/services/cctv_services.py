@@ -3,6 +3,7 @@ import numpy as np
 from psycopg2.extras import RealDictCursor 
 from shared_state import state
 from db.db_config import get_connection
+from core.inference_backends import normalize_imgsz
 
 # --- Fetch CCTV aktif dari database ---
 def get_all_active_cctv():
@@ -14,6 +15,28 @@ def get_all_active_cctv():
     conn.close()
     return rows
 
+# --- Notifikasi perubahan cctv_data (LISTEN/NOTIFY) ---
+# Payload = id CCTV. NOTIFY bersifat transaksional: baru terkirim ke listener (pm2_manager) saat COMMIT.
+CCTV_NOTIFY_CHANNEL = "cctv_changed"
+
+def notify_cctv_changed(cur, cctv_id):
+    """Dipanggil di dalam transaksi yang mengubah cctv_data, sebelum commit."""
+    cur.execute("SELECT pg_notify(%s, %s)", (CCTV_NOTIFY_CHANNEL, str(cctv_id)))
+
+# --- Status proses CCTV (kolom yang dibutuhkan orchestrator saja) ---
+def get_cctv_process_rows(cctv_ids=None):
+    """id, name, enabled semua CCTV, atau hanya cctv_ids (termasuk yang disabled agar bisa dihentikan)."""
+    conn = get_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    if cctv_ids is None:
+        cursor.execute("SELECT id, name, enabled FROM cctv_data ORDER BY id ASC;")
+    else:
+        cursor.execute("SELECT id, name, enabled FROM cctv_data WHERE id = ANY(%s) ORDER BY id ASC;", (list(cctv_ids),))
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return rows
+
 # --- Load ROI dari Supabase Storage ---
 def load_roi_from_db(area_data):
     if not area_data:
@@ -58,7 +81,14 @@ def load_all_cctv_configs():
             "ip_address": cctv.get("ip_address"),
             "port": cctv.get("port"),
             "token": cctv.get("token"),
-            "location": cctv.get("location")
+            "location": cctv.get("location"),
+            # Backend capture per kamera: "opencv" (default) atau "pyav" (scale di decoder ke decode_width)
+            "capture_backend": cctv.get("capture_backend") or "opencv",
+            "decode_width": cctv.get("decode_width"),
+            # area.roi_crop = true: inferensi hanya pada bounding box gabungan ROI, bukan frame penuh
+            "roi_crop": bool(area_data.get("roi_crop")) if isinstance(area_data, dict) else False,
+            # area.imgsz: ukuran input model per kamera (kecil untuk kamera dekat, besar untuk yang jauh)
+            "imgsz": normalize_imgsz(area_data.get("imgsz")) if isinstance(area_data, dict) else None
         }
     return configs
     
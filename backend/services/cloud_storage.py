@@ -13,7 +13,8 @@ except Exception as e:
     supabase = None
 
 # --- FUNGSI UNTUK MENAMBAHKAN GAMBAR KE SUPABASE STORAGE ---
-def upload_violation_image(image_bytes: bytes, cctv_id: int, violation_type: str) -> str:
+def upload_violation_image(image_bytes: bytes, cctv_id: int, violation_type: str,
+                           captured_at: datetime.datetime = None) -> str:
     if supabase is None:
         raise RuntimeError("Supabase client belum diinisialisasi.")
 
@@ -21,7 +22,8 @@ def upload_violation_image(image_bytes: bytes, cctv_id: int, violation_type: str
     # gmt7 = datetime.timezone(datetime.timedelta(hours=7), "GMT+7")
     # now = datetime.datetime.now(gmt7)
 
-    now = datetime.datetime.now()
+    # captured_at: waktu deteksi asli (mis. saat dikirim ulang dari spool), default sekarang
+    now = captured_at or datetime.datetime.now()
     date_path = now.strftime("%Y/%m/%d")
     unique_name = f"{violation_type}_{now:%H%M%S}_{uuid.uuid4().hex[:8]}.jpg"
     file_path = f"cctv/{cctv_id}/{date_path}/{unique_name}"
@@ -0,0 +1,130 @@
+# backend/services/config_bus.py
+import json
+import logging
+import time
+from threading import Thread, Event
+
+# Satu channel pub/sub untuk semua perubahan konfigurasi + key versi global.
+# Versi di-INCR sebelum PUBLISH sehingga worker yang sempat terputus dari pub/sub tetap tahu ada perubahan.
+CONFIG_CHANNEL = "cctv_config_updates"
+CONFIG_VERSION_KEY = "cctv_config_version"
+
+# Scope perubahan
+SCOPE_SETTINGS = "detection_settings"   # tabel detection_settings (berlaku untuk semua kamera)
+SCOPE_CCTV = "cctv"                     # baris cctv_data satu kamera (area/ROI, roi_crop, imgsz, koneksi stream)
+SCOPE_SCHEDULE = "schedule"             # cctv_scheduler satu kamera
+ALL_SCOPES = frozenset((SCOPE_SETTINGS, SCOPE_CCTV, SCOPE_SCHEDULE))
+
+def publish_config_change(redis, scope, cctv_id=None):
+    """
+    Dipanggil API setelah commit DB. cctv_id None = perubahan global.
+    Kegagalan hanya di-log: worker tetap memuat konfigurasi terbaru saat start berikutnya.
+    """
+    try:
+        version = redis.incr(CONFIG_VERSION_KEY)
+        redis.publish(CONFIG_CHANNEL, json.dumps({"scope": scope, "cctv_id": cctv_id, "version": version}))
+        return version
+    except Exception as e:
+        logging.warning(f"[CONFIG BUS] Gagal publish perubahan {scope} (CCTV {cctv_id}): {e}")
+        return None
+
+class ConfigWatcher:
+    """
+    Thread listener di worker: subscribe CONFIG_CHANNEL dan memanggil on_change(scopes) untuk perubahan yang
+    berlaku bagi kamera ini. on_change berjalan di thread ini (boleh query DB), bukan di loop deteksi.
+
+    Setiap poll_interval detik versi global dibandingkan dengan versi terakhir yang terlihat; jika ada lompatan
+    (pesan hilang saat reconnect / Redis restart), semua scope dimuat ulang.
+    """
+    def __init__(self, redis, cctv_id, on_change, poll_interval=5.0):
+        self.redis = redis
+        self.cctv_id = int(cctv_id)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.version = None
+        self.messages = 0
+        self.reloads = 0
+        self.errors = 0
+        self.last_reload_at = None
+        self._stop = Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = Thread(target=self._run, daemon=True, name=f"ConfigWatcher-{self.cctv_id}")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _current_version(self):
+        value = self.redis.get(CONFIG_VERSION_KEY)
+        return int(value) if value is not None else 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CONFIG_CHANNEL)
+                # Subscribe dulu baru cek versi: perubahan di antara keduanya tidak mungkin terlewat
+                self._check_version()
+                last_poll = time.time()
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None and message.get("type") == "message":
+                        self._handle(message["data"])
+                    if time.time() - last_poll >= self.poll_interval:
+                        last_poll = time.time()
+                        self._check_version()
+            except Exception as e:
+                self.errors += 1
+                logging.warning(f"[CONFIG BUS] CCTV {self.cctv_id}: listener error, reconnect: {e}")
+                self._stop.wait(2)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def _handle(self, data):
+        try:
+            message = json.loads(data)
+            version = int(message["version"])
+        except (TypeError, ValueError, KeyError):
+            return
+        self.messages += 1
+        gap = self.version is not None and version > self.version + 1
+        self.version = max(self.version or 0, version)
+        if gap:
+            self._fire(ALL_SCOPES)
+            return
+        cctv_id = message.get("cctv_id")
+        if cctv_id is None or int(cctv_id) == self.cctv_id:
+            self._fire({message.get("scope")})
+
+    def _check_version(self):
+        version = self._current_version()
+        if self.version is not None and version > self.version:
+            logging.info(f"[CONFIG BUS] CCTV {self.cctv_id}: versi {self.version} -> {version} tanpa pesan, reload penuh.")
+            self._fire(ALL_SCOPES)
+        self.version = version
+
+    def _fire(self, scopes):
+        try:
+            self.on_change(frozenset(scopes))
+            self.reloads += 1
+            self.last_reload_at = time.time()
+        except Exception as e:
+            self.errors += 1
+            logging.error(f"[CONFIG BUS] CCTV {self.cctv_id}: gagal menerapkan perubahan {sorted(scopes)}: {e}")
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "messages": self.messages,
+            "reloads": self.reloads,
+            "errors": self.errors,
+            "last_reload_at": self.last_reload_at,
+        }
@@ -0,0 +1,224 @@
+# backend/services/frame_hub.py
+import time
+import logging
+from collections import Counter
+from threading import Thread, Condition, Lock
+
+from services.frame_transport import FrameReader, publish_viewer_presence, RENDITIONS, DEFAULT_RENDITION
+
+class CameraChannel:
+    """
+    Frame terakhir satu kamera + nomor urut. Satu thread pembaca Redis Stream per kamera mengisi channel ini,
+    semua generator HTTP menunggu di condition yang sama dan hanya mengirim frame dengan seq baru.
+    """
+    def __init__(self, cctv_id, size, redis_client, idle_linger=30.0, presence_ttl=5.0):
+        self.cctv_id = cctv_id
+        self.size = size
+        self.redis = redis_client
+        self.idle_linger = idle_linger
+        self.presence_ttl = presence_ttl
+        self.presence_interval = presence_ttl / 3
+        self.cond = Condition(Lock())
+        self.frame = None
+        self.seq = 0
+        self.updated_at = 0.0
+        self.captured_at = None
+        self.detections = 0
+        self.missed = 0
+        self.viewers = 0
+        # kualitas JPEG yang diminta viewer -> diteruskan ke worker lewat key presence
+        self.requests = Counter()
+        self._presence_at = 0.0
+        self.last_viewer_at = time.time()
+        self.frames_in = 0
+        self.frames_out = 0
+        self.slow_dropped = 0
+        self.closed = False
+        self._thread = None
+
+    def start(self):
+        self._thread = Thread(target=self._run, daemon=True, name=f"FrameHub-{self.cctv_id}-{self.size}")
+        self._thread.start()
+        return self
+
+    def _publish(self, msg):
+        with self.cond:
+            self.frame = msg.frame
+            self.seq += 1
+            self.captured_at = msg.captured_at
+            self.detections = msg.detections
+            self.updated_at = time.time()
+            self.frames_in += 1
+            self.cond.notify_all()
+
+    def _idle(self):
+        with self.cond:
+            if self.viewers == 0 and time.time() - self.last_viewer_at > self.idle_linger:
+                self.closed = True
+                return True
+        return False
+
+    def _refresh_presence(self):
+        now = time.time()
+        if now - self._presence_at < self.presence_interval:
+            return
+        with self.cond:
+            viewers = self.viewers
+            quality = max(self.requests, default=80)
+        if not viewers:
+            return
+        self._presence_at = now
+        try:
+            publish_viewer_presence(self.redis, self.cctv_id, self.size, viewers, quality, ttl=self.presence_ttl)
+        except Exception as e:
+            logging.warning(f"[FRAME HUB] Gagal memperbarui presence CCTV {self.cctv_id}: {e}")
+
+    def _run(self):
+        reader = FrameReader(self.redis, self.cctv_id, self.size)
+        try:
+            # Frame terakhir untuk viewer yang baru bergabung, lalu XREAD BLOCK dari posisi tersebut
+            primed = False
+            while not self._idle():
+                # Worker hanya menggambar + encode preview selama key presence ini hidup
+                self._refresh_presence()
+                try:
+                    if not primed:
+                        latest = reader.latest()
+                        if latest is not None:
+                            self._publish(latest)
+                        primed = True
+                    messages = reader.read(block_ms=1000)
+                except Exception as e:
+                    logging.error(f"[FRAME HUB] Gagal membaca stream CCTV {self.cctv_id}: {e}")
+                    time.sleep(1.0)
+                    continue
+                if messages:
+                    # Hanya frame terbaru yang relevan untuk live view
+                    self._publish(messages[-1])
+                    self.missed = reader.missed
+        finally:
+            with self.cond:
+                self.closed = True
+                self.cond.notify_all()
+
+    def wait_frame(self, last_seq, timeout):
+        """Tunggu frame dengan seq > last_seq. Return (seq, bytes, updated_at) atau None jika timeout/ditutup."""
+        deadline = time.time() + timeout
+        with self.cond:
+            while self.seq <= last_seq and not self.closed:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self.cond.wait(remaining)
+            if self.seq <= last_seq:
+                return None
+            return self.seq, self.frame, self.updated_at
+
+    def stats(self):
+        with self.cond:
+            return {
+                "viewers": self.viewers,
+                "seq": self.seq,
+                "frame_age_ms": round((time.time() - self.updated_at) * 1000) if self.updated_at else None,
+                # capture -> diterima hub (termasuk deteksi + encode di worker)
+                "capture_latency_ms": round((self.updated_at - self.captured_at) * 1000) if self.captured_at else None,
+                "detections": self.detections,
+                "missed": self.missed,
+                "frames_in": self.frames_in,
+                "frames_out": self.frames_out,
+                "slow_clients_dropped": self.slow_dropped,
+            }
+
+class FrameHub:
+    """
+    Fan-out MJPEG di proses API: N browser yang menonton kamera yang sama berbagi satu pembaca Redis
+    dan satu salinan JPEG terakhir. Client lambat tidak di-buffer: frame lama langsung ditimpa frame terbaru,
+    dan client yang satu kali kirimnya lebih lama dari slow_client_timeout diputus.
+    """
+    def __init__(self, redis_client, frame_timeout=3.0, slow_client_timeout=5.0, idle_linger=30.0):
+        self.redis = redis_client
+        self.frame_timeout = frame_timeout
+        self.slow_client_timeout = slow_client_timeout
+        self.idle_linger = idle_linger
+        self._channels = {}
+        self._lock = Lock()
+
+    def _acquire(self, cctv_id, size, request):
+        with self._lock:
+            channel = self._channels.get((cctv_id, size))
+            if channel is None or channel.closed:
+                channel = CameraChannel(cctv_id, size, self.redis, self.idle_linger).start()
+                self._channels[(cctv_id, size)] = channel
+            with channel.cond:
+                channel.viewers += 1
+                channel.requests[request] += 1
+                channel.last_viewer_at = time.time()
+                # Viewer pertama: langsung beri tahu worker, jangan tunggu interval presence
+                channel._presence_at = 0.0
+            return channel
+
+    def _release(self, channel, request):
+        with channel.cond:
+            channel.viewers -= 1
+            channel.requests[request] -= 1
+            if channel.requests[request] <= 0:
+                del channel.requests[request]
+            channel.last_viewer_at = time.time()
+
+    def stream(self, cctv_id, placeholder, size=DEFAULT_RENDITION, quality=80):
+        """
+        Generator JPEG untuk satu viewer. Mengirim frame baru saja; jika tidak ada frame selama
+        frame_timeout detik (worker mati / stream putus / belum ada viewer), placeholder dikirim.
+        size (rendition: thumb/medium/full) & quality adalah permintaan encode untuk worker.
+        """
+        if size not in RENDITIONS:
+            raise ValueError(f"Rendition tidak dikenal: {size}")
+        request = int(quality)
+        channel = self._acquire(cctv_id, size, request)
+        last_seq = 0
+        try:
+            while True:
+                if channel.closed:
+                    # Pembaca berhenti (idle ditutup bersamaan dengan viewer baru): ganti tanpa memutus viewer
+                    self._release(channel, request)
+                    channel = self._acquire(cctv_id, size, request)
+                    last_seq = 0
+
+                item = channel.wait_frame(last_seq, self.frame_timeout)
+                if item is None:
+                    payload = placeholder
+                else:
+                    last_seq, payload, _ = item
+
+                started = time.time()
+                yield payload
+                # yield kembali setelah server selesai menulis ke socket -> ukuran lambatnya client
+                if time.time() - started > self.slow_client_timeout:
+                    with channel.cond:
+                        channel.slow_dropped += 1
+                    logging.warning(f"[FRAME HUB] Viewer lambat CCTV {cctv_id} diputus.")
+                    return
+                if item is not None:
+                    with channel.cond:
+                        channel.frames_out += 1
+        finally:
+            self._release(channel, request)
+
+    def stats(self):
+        with self._lock:
+            channels = dict(self._channels)
+        result = {}
+        for (cctv_id, size), ch in channels.items():
+            if not ch.closed or ch.viewers:
+                result.setdefault(cctv_id, {})[size] = ch.stats()
+        return result
+
+_hub = None
+_hub_lock = Lock()
+
+def get_frame_hub(redis_client):
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = FrameHub(redis_client)
+        return _hub
@@ -0,0 +1,145 @@
+# backend/services/frame_transport.py
+import os
+import json
+import time
+import socket
+from collections import namedtuple
+
+FRAME_STREAM_KEY = "cctv_frames:{}:{}"
+
+# Rendition preview: nama -> lebar maksimal (0 = resolusi asli). Dipilih lewat /api/video-feed?size=
+RENDITIONS = {"thumb": 320, "medium": 960, "full": 0}
+DEFAULT_RENDITION = "full"
+
+# id = ID entry stream Redis (posisi baca), seq = nomor urut dari worker (selisih seq = frame yang terlewat)
+FrameMessage = namedtuple("FrameMessage", ["id", "seq", "captured_at", "detections", "frame"])
+
+def _decode(entry_id, fields):
+    return FrameMessage(
+        id=entry_id.decode() if isinstance(entry_id, bytes) else entry_id,
+        seq=int(fields[b"seq"]),
+        captured_at=float(fields[b"ts"]),
+        detections=int(fields.get(b"detections", 0)),
+        frame=fields[b"frame"],
+    )
+
+class FramePublisher:
+    """
+    Sisi worker: setiap frame preview dikirim ke Redis Stream yang dibatasi panjangnya (XADD MAXLEN ~),
+    beserta waktu capture, jumlah deteksi, dan nomor urut. Client Redis di-inject (redis-py atau fake).
+    """
+    def __init__(self, redis_client, cctv_id, size=DEFAULT_RENDITION, maxlen=30, ttl=10):
+        self.redis = redis_client
+        self.key = FRAME_STREAM_KEY.format(cctv_id, size)
+        self.maxlen = maxlen
+        self.ttl = ttl
+        self.seq = 0
+        self._last_expire = 0.0
+
+    def publish(self, frame_bytes, captured_at=None, detections=0, **extra):
+        self.seq += 1
+        fields = {
+            "frame": frame_bytes,
+            "ts": captured_at or time.time(),
+            "seq": self.seq,
+            "detections": detections,
+        }
+        if extra:
+            fields["meta"] = json.dumps(extra)
+        entry_id = self.redis.xadd(self.key, fields, maxlen=self.maxlen, approximate=True)
+        # Stream kamera yang workernya mati akan hilang sendiri (pengganti ex=5 pada SET lama)
+        now = time.time()
+        if now - self._last_expire > 1.0:
+            self.redis.expire(self.key, self.ttl)
+            self._last_expire = now
+        return entry_id
+
+class FrameReader:
+    """
+    Sisi pembaca (API FrameHub, recorder, konsumen metrik): baca inkremental dengan XREAD BLOCK.
+    Tidak ada state bersama di Redis, jadi setiap pembaca punya posisi sendiri.
+    """
+    def __init__(self, redis_client, cctv_id, size=DEFAULT_RENDITION):
+        self.redis = redis_client
+        self.key = FRAME_STREAM_KEY.format(cctv_id, size)
+        self.last_id = "$"
+        self.last_seq = None
+        self.missed = 0
+
+    def latest(self):
+        """Frame terbaru (tanpa menunggu) dan jadikan posisi baca; None jika stream kosong."""
+        entries = self.redis.xrevrange(self.key, count=1)
+        if not entries:
+            return None
+        msg = _decode(*entries[0])
+        self._advance(msg)
+        return msg
+
+    def read(self, block_ms=1000, count=None):
+        """Semua frame setelah posisi terakhir (list, bisa kosong jika timeout)."""
+        response = self.redis.xread({self.key: self.last_id}, count=count, block=block_ms)
+        messages = []
+        for _key, entries in response or []:
+            for entry_id, fields in entries:
+                msg = _decode(entry_id, fields)
+                self._advance(msg)
+                messages.append(msg)
+        return messages
+
+    def _advance(self, msg):
+        if self.last_seq is not None and msg.seq > self.last_seq + 1:
+            self.missed += msg.seq - self.last_seq - 1
+        # seq mundur = worker restart, mulai hitung ulang
+        self.last_seq = msg.seq
+        self.last_id = msg.id
+
+VIEWER_PRESENCE_KEY = "cctv_viewers:{}"
+
+def publish_viewer_presence(redis_client, cctv_id, size, viewers, quality, ttl=5):
+    """
+    Sisi API: tandai bahwa rendition kamera ini sedang ditonton. Hash per kamera, satu field per
+    proses API + rendition, dengan TTL -> jika semua viewer pergi (atau API mati) worker berhenti meng-encode.
+    """
+    key = VIEWER_PRESENCE_KEY.format(cctv_id)
+    value = json.dumps({"viewers": viewers, "size": size, "quality": quality, "ts": time.time()})
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hset(key, f"{socket.gethostname()}:{os.getpid()}:{size}", value)
+    pipe.expire(key, ttl)
+    pipe.execute()
+
+class ViewerDemand:
+    """
+    Sisi worker: apakah ada viewer, rendition mana saja yang harus di-encode dan dengan kualitas berapa.
+    Dibaca dari Redis maksimal sekali per check_interval detik, bukan per frame.
+    """
+    def __init__(self, redis_client, cctv_id, ttl=5, check_interval=1.0):
+        self.redis = redis_client
+        self.key = VIEWER_PRESENCE_KEY.format(cctv_id)
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._checked_at = 0.0
+        self._demand = None
+
+    def get(self):
+        """None jika tidak ada viewer, selain itu dict viewers + renditions {size: quality}."""
+        now = time.time()
+        if now - self._checked_at < self.check_interval:
+            return self._demand
+        self._checked_at = now
+        try:
+            entries = self.redis.hgetall(self.key)
+        except Exception:
+            # Redis bermasalah: tetap encode agar preview tidak hilang diam-diam
+            self._demand = {"viewers": None, "renditions": {DEFAULT_RENDITION: 80}}
+            return self._demand
+
+        viewers, renditions = 0, {}
+        for raw in entries.values():
+            entry = json.loads(raw)
+            size = entry.get("size")
+            if now - entry.get("ts", 0) > self.ttl or not entry.get("viewers") or size not in RENDITIONS:
+                continue
+            viewers += entry["viewers"]
+            renditions[size] = max(renditions.get(size, 0), entry.get("quality", 80))
+        self._demand = {"viewers": viewers, "renditions": renditions} if viewers else None
+        return self._demand
@@ -40,6 +40,17 @@ class SharedState:
                     'queue_size': 3,
                     'padding_percent': 0.5,
                     'target_max_width': 320,
+                    'target_detection_fps': 0,
+                    'motion_gate_enabled': 0,
+                    'motion_threshold': 0.005,
+                    'motion_pixel_delta': 25,
+                    'motion_keyframe_seconds': 2.0,
+                    'adaptive_sampling_enabled': 0,
+                    'adaptive_min_fps': 0.5,
+                    'adaptive_max_fps': 5,
+                    'adaptive_idle_fps': 1,
+                    'adaptive_cpu_budget': 85,
+                    'adaptive_latency_budget_ms': 250,
                 }
 
                 cls._instance.DETECTION_SETTINGS_LOCK = Lock()
@@ -0,0 +1,8 @@
+# tests/conftest.py
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
@@ -0,0 +1,58 @@
+# tests/test_adaptive_sampler.py
+from core.adaptive_sampler import AdaptiveSampler, ADAPTIVE_SETTINGS
+
+def make_sampler(**overrides):
+    sampler = AdaptiveSampler(update_interval=1.0)
+    sampler.apply_settings(dict(ADAPTIVE_SETTINGS, adaptive_sampling_enabled=1, **overrides))
+    return sampler
+
+def run(sampler, start, seconds, **observe):
+    fps = None
+    for k in range(seconds):
+        fps = sampler.observe(now=start + k, **observe)
+    return fps
+
+def test_apply_settings_defaults():
+    sampler = AdaptiveSampler()
+    sampler.apply_settings({'adaptive_max_fps': '8'})
+    assert not sampler.enabled
+    assert sampler.settings['adaptive_max_fps'] == 8.0
+    assert sampler.settings['adaptive_idle_fps'] == ADAPTIVE_SETTINGS['adaptive_idle_fps']
+
+def test_idle_scene_decays_gradually():
+    sampler = make_sampler()
+    first = sampler.observe(False, now=100.0)
+    # Turun bertahap (x0.8 per interval), bukan langsung ke idle fps
+    assert first == ADAPTIVE_SETTINGS['adaptive_max_fps'] * 0.8
+    assert run(sampler, 101.0, 20, active=False) == ADAPTIVE_SETTINGS['adaptive_idle_fps']
+
+def test_activity_jumps_to_max_immediately():
+    sampler = make_sampler()
+    run(sampler, 100.0, 20, active=False)
+    assert sampler.observe(True, now=200.0) == ADAPTIVE_SETTINGS['adaptive_max_fps']
+    assert sampler.active
+
+def test_update_rate_limited():
+    sampler = make_sampler()
+    fps = sampler.observe(False, now=100.0)
+    assert sampler.observe(False, now=100.5) == fps
+
+def test_cpu_over_budget_backs_off_to_min():
+    sampler = make_sampler()
+    fps = run(sampler, 100.0, 30, active=True, cpu_percent=99)
+    assert fps == ADAPTIVE_SETTINGS['adaptive_min_fps']
+    assert sampler.backoff == 0.1
+
+def test_backoff_recovers_under_budget():
+    sampler = make_sampler()
+    run(sampler, 100.0, 30, active=True, latency_ms=1000)
+    assert sampler.backoff < 1.0
+    run(sampler, 200.0, 60, active=True, latency_ms=10)
+    assert sampler.backoff == 1.0
+    assert sampler.fps == ADAPTIVE_SETTINGS['adaptive_max_fps']
+
+def test_should_sample():
+    sampler = make_sampler()
+    sampler.fps = 2.0
+    assert not sampler.should_sample(10.4, 10.0)
+    assert sampler.should_sample(10.5, 10.0)
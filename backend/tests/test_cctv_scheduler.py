@@ -0,0 +1,74 @@
+# tests/test_cctv_scheduler.py
+import datetime
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("psycopg2")
+pytest.importorskip("redis")
+
+from core import cctv_scheduler
+from core.cctv_scheduler import ScheduleCache
+
+WIB = datetime.timezone(datetime.timedelta(hours=7))
+MONDAY, TUESDAY = 1, 2  # day_of_week DB (0 = minggu)
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+def wib(day, hour, minute=0, second=0, microsecond=0):
+    # 2026-10-12 adalah hari Senin
+    return datetime.datetime(2026, 10, 12 + day, hour, minute, second, microsecond, tzinfo=WIB)
+
+@pytest.fixture
+def overnight(monkeypatch):
+    """Jadwal Senin 22:00 -> Selasa 06:00, disimpan terpecah di tengah malam seperti route jadwal."""
+    rows = [
+        (MONDAY, datetime.time(22, 0), datetime.time(0, 0)),
+        (TUESDAY, datetime.time(0, 0), datetime.time(6, 0)),
+    ]
+    monkeypatch.setattr(cctv_scheduler, "get_connection", lambda: FakeConnection(rows))
+    cache = ScheduleCache(1)
+    assert cache.load()
+    return cache
+
+def test_split_row_runs_until_end_of_day(overnight):
+    assert overnight.intervals[MONDAY] == [(22 * 3600, 24 * 3600)]
+    assert overnight.intervals[TUESDAY] == [(0, 6 * 3600)]
+
+@pytest.mark.parametrize("when, active", [
+    (wib(0, 21, 59, 59), False),
+    (wib(0, 22), True),
+    (wib(0, 23, 59, 59, 999999), True),
+    (wib(1, 0), True),
+    (wib(1, 6), True),
+    (wib(1, 6, 0, 1), False),
+])
+def test_active_across_midnight(overnight, when, active):
+    assert overnight._active_at(when) is active
+
+def test_next_transition_skips_midnight(overnight):
+    assert overnight.next_transition(wib(0, 12)) == wib(0, 22)
+    # Tengah malam bukan transisi: status tetap aktif sampai Selasa 06:00
+    assert overnight.next_transition(wib(0, 23)) == wib(1, 6, microsecond=1)
+    # Berikutnya Senin depan
+    assert overnight.next_transition(wib(1, 7)) == wib(7, 22)
+
+def test_no_schedule_never_transitions(monkeypatch):
+    monkeypatch.setattr(cctv_scheduler, "get_connection", lambda: FakeConnection([]))
+    cache = ScheduleCache(1)
+    cache.load()
+    assert cache.next_transition(wib(0, 12)) is None
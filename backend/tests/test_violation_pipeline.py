@@ -0,0 +1,86 @@
+# tests/test_violation_pipeline.py
+import time
+from threading import Event
+
+import pytest
+
+from core.violation_pipeline import BoundedWorkQueue
+
+def make_queue(**kwargs):
+    """Antrian tanpa start(): event tetap antre sehingga kebijakan penuh bisa diuji deterministik."""
+    handled = []
+    return BoundedWorkQueue("TEST", handled.append, **kwargs), handled
+
+def drain(queue, timeout=2.0):
+    queue.start()
+    queue.stop(timeout)
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        BoundedWorkQueue("TEST", print, policy="lifo")
+
+def test_drop_oldest_when_full():
+    queue, handled = make_queue(maxsize=2)
+    assert queue.submit(1)
+    assert queue.submit(2)
+    assert not queue.submit(3)
+    drain(queue)
+    assert handled == [2, 3]
+    assert queue.stats()["dropped"] == 1
+
+def test_coalesce_replaces_pending_payload():
+    replaced = []
+    queue, handled = make_queue(maxsize=2, policy="coalesce", on_coalesced=replaced.append)
+    queue.submit("a1", key="a")
+    queue.submit("b1", key="b")
+    assert queue.submit("a2", key="a")
+    drain(queue)
+    assert handled == ["a2", "b1"]
+    assert replaced == ["a1"]
+    assert queue.stats()["coalesced"] == 1
+
+def test_coalesce_without_matching_key_drops_oldest():
+    replaced = []
+    queue, handled = make_queue(maxsize=2, policy="coalesce", on_coalesced=replaced.append)
+    queue.submit("a1", key="a")
+    queue.submit("b1", key="b")
+    assert not queue.submit("c1", key="c")
+    drain(queue)
+    assert handled == ["b1", "c1"]
+    assert replaced == []
+
+def test_on_coalesced_error_does_not_break_submit():
+    def boom(payload):
+        raise RuntimeError("gagal")
+    queue, handled = make_queue(maxsize=1, policy="coalesce", on_coalesced=boom)
+    queue.submit("a1", key="a")
+    assert queue.submit("a2", key="a")
+    drain(queue)
+    assert handled == ["a2"]
+
+def test_handler_error_counted_as_failed():
+    def handler(payload):
+        if payload == "bad":
+            raise RuntimeError("gagal")
+    queue = BoundedWorkQueue("TEST", handler)
+    queue.submit("bad")
+    queue.submit("ok")
+    drain(queue)
+    stats = queue.stats()
+    assert (stats["processed"], stats["failed"]) == (1, 1)
+
+def test_latency_measured_at_handler_by_default():
+    queue, _ = make_queue()
+    queue.submit(1, created_at=time.time() - 2)
+    drain(queue)
+    assert queue.stats()["latency_ms_avg"] >= 2000
+
+def test_external_latency_when_measure_disabled():
+    done = Event()
+    queue = BoundedWorkQueue("TEST", lambda payload: done.set(), measure_latency=False)
+    queue.submit(1, created_at=time.time() - 2)
+    drain(queue)
+    assert done.is_set()
+    assert queue.stats()["latency_ms_avg"] is None
+    queue.record_latency(0.25)
+    assert queue.stats()["latency_ms_avg"] == 250.0
@@ -0,0 +1,70 @@
+# tests/test_violation_spool.py
+import time
+
+import pytest
+
+from core.violation_spool import ViolationSpool
+
+@pytest.fixture
+def spool(tmp_path):
+    s = ViolationSpool(str(tmp_path / "spool.db"), base_backoff=5.0)
+    yield s
+    s.close()
+
+def expire_claim(spool, spool_id):
+    """Simulasikan event yang menunggu di antrian lebih lama dari claim_seconds."""
+    with spool._lock:
+        spool._conn.execute("UPDATE violation_spool SET claimed_until = ? WHERE id = ?", (time.time() - 1, spool_id))
+
+def test_put_is_claimed_and_not_due(spool):
+    spool.put(1, "no-helmet", b"jpeg")
+    assert spool.claim_due() == []
+
+def test_take_with_own_token(spool):
+    spool_id, token = spool.put(1, "no-helmet", b"jpeg")
+    new_token = spool.take(spool_id, token)
+    assert new_token is not None and new_token != token
+    # Token lama tidak berlaku lagi setelah diperpanjang
+    assert spool.take(spool_id, token) is None
+    assert spool.take(spool_id, new_token) is not None
+
+def test_queue_worker_loses_after_drainer_reclaims(spool):
+    spool_id, token = spool.put(1, "no-helmet", b"jpeg")
+    expire_claim(spool, spool_id)
+    claimed = spool.claim_due()
+    assert [e["spool_id"] for e in claimed] == [spool_id]
+    assert spool.take(spool_id, token) is None
+    assert spool.take(spool_id, claimed[0]["claim_token"]) is not None
+
+def test_take_after_complete_fails(spool):
+    spool_id, token = spool.put(1, "no-helmet", b"jpeg")
+    spool.complete(spool_id)
+    assert spool.take(spool_id, token) is None
+
+def test_discard_only_with_own_token(spool):
+    spool_id, token = spool.put(1, "no-helmet", b"jpeg")
+    assert not spool.discard(spool_id, token + 1)
+    assert spool.discard(spool_id, token)
+    assert spool.stats()["pending"] == 0
+
+def test_fail_backoff_releases_claim(spool):
+    spool_id, token = spool.put(1, "no-helmet", b"jpeg")
+    spool.fail(spool_id, "timeout")
+    assert spool.claim_due() == []
+    assert spool.take(spool_id, token) is None
+    assert spool.stats()["retrying"] == 1
+
+def test_release_claims_keeps_active_claims(spool):
+    active_id, active_token = spool.put(1, "no-helmet", b"jpeg")
+    backoff_id, _ = spool.put(1, "no-vest", b"jpeg")
+    spool.fail(backoff_id, "timeout")
+
+    assert spool.release_claims() == 1
+    assert [e["spool_id"] for e in spool.claim_due()] == [backoff_id]
+    assert spool.take(active_id, active_token) is not None
+
+def test_release_claims_force(spool):
+    spool_id, token = spool.put(1, "no-helmet", b"jpeg")
+    assert spool.release_claims(force=True) == 1
+    assert [e["spool_id"] for e in spool.claim_due()] == [spool_id]
+    assert spool.take(spool_id, token) is None
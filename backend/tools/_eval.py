@@ -0,0 +1,78 @@
+# tools/_eval.py
+"""
+Helper evaluasi deteksi bersama untuk benchmarks/ dan tools/ (bukan jalur produksi):
+muat frame / label YOLO, IoU, pencocokan deteksi per kelas, dan pengukuran latensi lewat LocalDetector.
+Deteksi = array [x1, y1, x2, y2, conf, cls] per frame, seperti output LocalDetector.
+"""
+import os
+import glob
+import time
+import cv2
+import numpy as np
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+def load_dir_frames(folder, limit=0):
+    """List (path, frame) gambar di folder (maks. limit, 0 = semua), urut nama; frame None jika gagal dibaca."""
+    paths = sorted(p for p in glob.glob(os.path.join(folder, "*")) if p.lower().endswith(IMAGE_EXTS))
+    return [(p, cv2.imread(p)) for p in paths[:limit or None]]
+
+def load_labels(folder, name, shape):
+    """Label YOLO (cls cx cy w h ternormalisasi) -> array [x1, y1, x2, y2, 1, cls] dalam piksel frame."""
+    path = os.path.join(folder, os.path.splitext(os.path.basename(name))[0] + ".txt")
+    rows = np.loadtxt(path, ndmin=2) if os.path.exists(path) and os.path.getsize(path) else np.zeros((0, 5))
+    h, w = shape[:2]
+    gt = np.zeros((len(rows), 6), dtype=np.float32)
+    gt[:, 0] = (rows[:, 1] - rows[:, 3] / 2) * w
+    gt[:, 1] = (rows[:, 2] - rows[:, 4] / 2) * h
+    gt[:, 2] = (rows[:, 1] + rows[:, 3] / 2) * w
+    gt[:, 3] = (rows[:, 2] + rows[:, 4] / 2) * h
+    gt[:, 4] = 1.0
+    gt[:, 5] = rows[:, 0]
+    return gt
+
+def box_iou(a, b):
+    """IoU antar box xyxy: a (N, 4), b (M, 4) -> (N, M)."""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+def match(ref, cand, iou_threshold):
+    """Greedy per kelas (conf tertinggi dulu). Return list (iou, selisih conf) pasangan yang cocok."""
+    pairs = []
+    for cls in np.union1d(ref[:, 5], cand[:, 5]):
+        r, c = ref[ref[:, 5] == cls], cand[cand[:, 5] == cls]
+        if len(r) == 0 or len(c) == 0:
+            continue
+        r, c = r[np.argsort(-r[:, 4])], c[np.argsort(-c[:, 4])]
+        ious = box_iou(r[:, :4], c[:, :4])
+        used = set()
+        for i in range(len(r)):
+            for j in np.argsort(-ious[i]):
+                if ious[i, j] < iou_threshold:
+                    break
+                if j not in used:
+                    used.add(j)
+                    pairs.append((ious[i, j], abs(r[i, 4] - c[j, 4])))
+                    break
+    return pairs
+
+def run_model(path, frames, conf, batch, warmup):
+    """Jalankan model pada semua frame. Return (detector, output per frame, latensi ms per frame, fps)."""
+    from core.detector import LocalDetector
+    detector = LocalDetector(path, 'cpu')
+    for _ in range(warmup):
+        detector.detect_batch(frames[:batch], conf)
+
+    outputs, per_frame_ms = [], []
+    started = time.perf_counter()
+    for start in range(0, len(frames), batch):
+        chunk = frames[start:start + batch]
+        t0 = time.perf_counter()
+        outputs.extend(detector.detect_batch(chunk, conf))
+        per_frame_ms.extend([(time.perf_counter() - t0) * 1000 / len(chunk)] * len(chunk))
+    elapsed = time.perf_counter() - started
+    return detector, outputs, per_frame_ms, len(frames) / elapsed
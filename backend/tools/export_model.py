@@ -0,0 +1,72 @@
+# tools/export_model.py
+"""
+Ekspor model PPE (.pt) ke ONNX atau OpenVINO untuk inferensi CPU tanpa PyTorch di jalur panas.
+Hasil ekspor langsung bisa dipakai dengan MODEL_PATH=<hasil> (backend dipilih otomatis, lihat
+core/inference_backends.py). Cek akurasi & latensi dengan benchmarks/bench_inference_backends.py.
+
+Contoh:
+    python tools/export_model.py --format onnx                       # batch 1, 640x640
+    python tools/export_model.py --format onnx --dynamic             # batch dinamis (inference server / pool)
+    python tools/export_model.py --format onnx --batch 8             # batch tetap 8 (= INFERENCE_MAX_BATCH)
+    python tools/export_model.py --format openvino --dynamic
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import time
+
+import numpy as np
+
+from config import MODEL_PATH, INFERENCE_MAX_BATCH
+from core.inference_backends import load_backend
+
+def export(args):
+    from ultralytics import YOLO
+    model = YOLO(args.weights)
+    options = dict(format=args.format, imgsz=args.imgsz, dynamic=args.dynamic, half=args.half)
+    if args.dynamic:
+        # Batch maksimum profil dinamis (OpenVINO / TensorRT); ONNX tetap bebas
+        options["batch"] = args.batch or INFERENCE_MAX_BATCH
+    else:
+        options["batch"] = args.batch or 1
+    if args.format == "onnx":
+        options.update(simplify=args.simplify, opset=args.opset)
+    started = time.time()
+    path = model.export(**options)
+    print(f"Ekspor {args.format} selesai dalam {time.time() - started:.1f} s: {path}")
+    return path
+
+def smoke_test(path, imgsz):
+    """Muat hasil ekspor lewat backend yang sama dengan worker dan jalankan satu batch kosong."""
+    backend = load_backend(path, 'cpu')
+    frames = [np.zeros((imgsz, imgsz, 3), dtype=np.uint8)] * 2
+    outputs = backend.predict(frames, 0.5)
+    print(f"Smoke test OK: {backend.describe()}, {len(outputs)} output, kelas {backend.names}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", default=MODEL_PATH, help="Model .pt sumber (default: MODEL_PATH)")
+    parser.add_argument("--format", choices=["onnx", "openvino"], default="onnx")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--batch", type=int, default=0,
+                        help="Batch tetap (default 1), atau batch maksimum jika --dynamic (default INFERENCE_MAX_BATCH)")
+    parser.add_argument("--dynamic", action="store_true", help="Dimensi batch dinamis")
+    parser.add_argument("--half", action="store_true", help="FP16 (umumnya hanya berguna di GPU / OpenVINO)")
+    parser.add_argument("--no-simplify", dest="simplify", action="store_false", help="Lewati onnxslim")
+    parser.add_argument("--opset", type=int, default=None)
+    parser.add_argument("--skip-test", action="store_true", help="Jangan muat ulang hasil ekspor")
+    args = parser.parse_args()
+
+    if not args.weights.endswith(".pt"):
+        raise SystemExit(f"--weights harus model .pt: {args.weights}")
+    path = export(args)
+    if not args.skip_test:
+        smoke_test(path, args.imgsz)
+    print(f"\nPakai dengan: MODEL_PATH={os.path.relpath(path, backend_dir)}")
@@ -0,0 +1,51 @@
+# tools/frame_stream_tail.py
+"""
+Konsumen contoh Redis Stream frame preview (cctv_frames:{id}:{size}): membaca inkremental dengan XREAD BLOCK
+dan mencetak fps, latensi capture -> Redis, jumlah deteksi, serta frame yang terlewat.
+
+Contoh:
+    python tools/frame_stream_tail.py --cctv-id 3
+    python tools/frame_stream_tail.py --cctv-id 3 --save-dir /tmp/cctv3   # simpan setiap JPEG (recorder sederhana)
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import time
+
+from utils.redis_client import get_redis
+from services.frame_transport import FrameReader, RENDITIONS, DEFAULT_RENDITION
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cctv-id", type=int, required=True)
+    parser.add_argument("--size", default=DEFAULT_RENDITION, choices=list(RENDITIONS))
+    parser.add_argument("--interval", type=float, default=5.0, help="Detik per baris laporan")
+    parser.add_argument("--save-dir", help="Simpan setiap frame sebagai JPEG ke folder ini")
+    args = parser.parse_args()
+
+    if args.save_dir:
+        os.makedirs(args.save_dir, exist_ok=True)
+
+    reader = FrameReader(get_redis(), args.cctv_id, args.size)
+    count, latency_sum, window_start = 0, 0.0, time.time()
+    while True:
+        for msg in reader.read(block_ms=1000):
+            count += 1
+            latency_sum += time.time() - msg.captured_at
+            if args.save_dir:
+                with open(os.path.join(args.save_dir, f"{msg.seq:08d}.jpg"), "wb") as f:
+                    f.write(msg.frame)
+
+        elapsed = time.time() - window_start
+        if elapsed >= args.interval:
+            avg_latency = latency_sum / count * 1000 if count else 0
+            print(f"{count / elapsed:5.1f} fps | latensi {avg_latency:6.1f} ms | seq {reader.last_seq} | "
+                  f"terlewat {reader.missed}")
+            count, latency_sum, window_start = 0, 0.0, time.time()
@@ -0,0 +1,139 @@
+# tools/imgsz_recall.py
+"""
+Recall deteksi vs ukuran input model (imgsz) pada frame rekaman satu kamera, untuk memilih area.imgsz
+terkecil yang masih cukup. Kamera dekat (orang besar di frame) biasanya aman di 320-480,
+kamera jauh butuh 960+.
+
+Referensi = deteksi pada --ref-size (default 1280, mendekati resolusi asli), atau label YOLO txt (--labels).
+Recall dihitung per kelas (IoU >= --iou, kelas sama); latensi per frame diukur pada setiap ukuran.
+Dengan --cctv-id, ROI kamera dipakai: hanya objek di dalam ROI yang dihitung dan roi_crop diikuti seperti worker.
+
+Contoh:
+    python tools/frame_stream_tail.py --cctv-id 3 --size full --save-dir samples/cctv3   # rekam dulu
+    python tools/imgsz_recall.py --frames samples/cctv3 --cctv-id 3
+    python tools/imgsz_recall.py --frames samples/cctv3 --sizes 320 416 512 640 --target 0.95
+Model .pt atau ONNX/OpenVINO yang diekspor dengan --dynamic; model fixed shape tidak bisa berganti imgsz.
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import statistics
+import time
+import numpy as np
+
+from config import MODEL_PATH, MODEL_BACKEND, ROI_CROP_MAX_RATIO
+from core.detector import LocalDetector
+from core.inference_backends import normalize_imgsz
+from core.roi_mask import get_roi_mask
+from tools._eval import load_dir_frames, load_labels, match
+
+def load_camera(cctv_id):
+    """Konfigurasi kamera dari DB (ROI, roi_crop, imgsz sekarang) seperti yang dimuat worker."""
+    from services.cctv_services import load_all_cctv_configs
+    cfg = load_all_cctv_configs().get(cctv_id)
+    if cfg is None:
+        raise SystemExit(f"CCTV {cctv_id} tidak ditemukan / tidak aktif")
+    return cfg
+
+def detect(detector, frame, conf, imgsz, cfg):
+    """Sama dengan CCTVWorker._detect: crop ROI jika roi_crop aktif, lalu buang objek di luar ROI."""
+    if cfg is None:
+        return detector.detect(0, frame, conf, imgsz)
+    roi_mask = get_roi_mask(cfg["cctv_id"], cfg, frame.shape[1], frame.shape[0])
+    box = roi_mask.crop_box() if cfg.get("roi_crop") else None
+    if box is None or roi_mask.area_ratio > ROI_CROP_MAX_RATIO:
+        dets = detector.detect(0, frame, conf, imgsz)
+    else:
+        x1, y1, x2, y2 = box
+        dets = detector.detect(0, frame[y1:y2, x1:x2], conf, imgsz).copy()
+        dets[:, [0, 2]] += x1
+        dets[:, [1, 3]] += y1
+    return dets[roi_mask.lookup(dets[:, :4]) >= 0] if len(dets) else dets
+
+def run_size(detector, frames, conf, imgsz, cfg, warmup):
+    for frame in frames[:warmup]:
+        detect(detector, frame, conf, imgsz, cfg)
+    outputs, latencies = [], []
+    for frame in frames:
+        started = time.perf_counter()
+        outputs.append(detect(detector, frame, conf, imgsz, cfg))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return outputs, latencies
+
+def recall(reference, outputs, iou, names):
+    """Recall total dan per kelas terhadap referensi."""
+    per_class = {}
+    total_ref = total_hit = 0
+    for ref, out in zip(reference, outputs):
+        for cls in np.unique(ref[:, 5]).astype(int):
+            r = ref[ref[:, 5] == cls]
+            hits = len(match(r, out[out[:, 5] == cls], iou))
+            n, h = per_class.get(cls, (0, 0))
+            per_class[cls] = (n + len(r), h + hits)
+            total_ref += len(r)
+            total_hit += hits
+    overall = total_hit / total_ref if total_ref else None
+    return overall, {names.get(cls, cls): round(h / n, 3) for cls, (n, h) in sorted(per_class.items())}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", required=True, help="Folder frame rekaman kamera")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--cctv-id", type=int, help="Pakai ROI / roi_crop kamera ini dari cctv_data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[320, 416, 480, 512, 640, 768, 960])
+    parser.add_argument("--ref-size", type=int, default=1280, help="imgsz referensi (diabaikan jika --labels)")
+    parser.add_argument("--labels", help="Folder label YOLO txt sebagai referensi (nama file sama dengan gambar)")
+    parser.add_argument("--conf", type=float, default=0.5, help="Samakan dengan confidence_threshold produksi")
+    parser.add_argument("--iou", type=float, default=0.5)
+    parser.add_argument("--target", type=float, default=0.95, help="Recall minimum yang dianggap cukup")
+    parser.add_argument("--limit", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=3)
+    args = parser.parse_args()
+
+    cfg = None
+    if args.cctv_id is not None:
+        cfg = dict(load_camera(args.cctv_id), cctv_id=args.cctv_id)
+        print(f"CCTV {args.cctv_id} ({cfg['name']}): {len(cfg['roi'])} ROI, roi_crop={cfg['roi_crop']}, "
+              f"imgsz sekarang={cfg.get('imgsz') or 'default'}")
+
+    named = [(path, f) for path, f in load_dir_frames(args.frames) if f is not None][:args.limit or None]
+    if not named:
+        raise SystemExit(f"Tidak ada gambar di {args.frames}")
+    frames = [f for _, f in named]
+    detector = LocalDetector(args.model, 'cpu', MODEL_BACKEND)
+    print(f"{len(frames)} frame {frames[0].shape[1]}x{frames[0].shape[0]}, model {detector.describe()}")
+
+    if args.labels:
+        reference = [load_labels(args.labels, path, f.shape) for path, f in named]
+        if cfg is not None:
+            # Label di luar ROI tidak pernah dihitung worker
+            reference = [r[get_roi_mask(args.cctv_id, cfg, f.shape[1], f.shape[0]).lookup(r[:, :4]) >= 0] if len(r) else r
+                         for r, f in zip(reference, frames)]
+        ref_label = "label"
+    else:
+        reference, _ = run_size(detector, frames, args.conf, normalize_imgsz(args.ref_size), cfg, args.warmup)
+        ref_label = f"imgsz {normalize_imgsz(args.ref_size)}"
+    print(f"Referensi: {ref_label}, {sum(len(r) for r in reference)} objek\n")
+
+    print(f"{'imgsz':>6} | {'recall':>6} | {'p50 ms':>7} | {'p95 ms':>7} | per kelas")
+    chosen = None
+    for size in sorted({normalize_imgsz(s) for s in args.sizes}):
+        outputs, latencies = run_size(detector, frames, args.conf, size, cfg, args.warmup)
+        overall, per_class = recall(reference, outputs, args.iou, detector.names)
+        ordered = sorted(latencies)
+        print(f"{size:>6} | {overall if overall is not None else 0:6.3f} | {statistics.median(ordered):7.1f} | "
+              f"{ordered[int(len(ordered) * 0.95)]:7.1f} | {per_class}")
+        if chosen is None and overall is not None and overall >= args.target:
+            chosen = size
+
+    if chosen:
+        print(f"\nimgsz terkecil dengan recall >= {args.target}: {chosen}  ->  set \"imgsz\": {chosen} di area kamera")
+    else:
+        print(f"\nTidak ada ukuran dengan recall >= {args.target}; pakai ukuran terbesar atau default model")
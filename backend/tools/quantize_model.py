@@ -0,0 +1,292 @@
+# tools/quantize_model.py
+"""
+Kuantisasi INT8 post-training (statis, ONNX Runtime QDQ) untuk model PPE, beserta laporan mAP vs latensi.
+
+Sumber frame kalibrasi:
+  --frames DIR   gambar frame kamera (mis. direkam dengan tools/frame_stream_tail.py --save-dir)
+  --spool        crop pelanggaran dari spool lokal (strip label polaroid dipotong)
+Frame diacak lalu dibagi: --calib-count untuk kalibrasi, sisanya (maks. --eval-count) untuk evaluasi.
+
+Tanpa --labels, "ground truth" = deteksi model FP32 referensi (pseudo-GT), sehingga mAP mengukur seberapa
+dekat model INT8 dengan model yang sekarang dipakai. Dengan --labels DIR (format YOLO txt, nama file sama
+dengan gambar) mAP dihitung terhadap label asli untuk semua model.
+
+Contoh:
+    python tools/quantize_model.py --frames samples/site-a
+    python tools/quantize_model.py --frames samples/site-a --spool --calib-method percentile --threads 2
+    python tools/quantize_model.py --model model/ppe_detection_yolov12.onnx --frames samples/ --labels labels/
+Hasil: model/ppe_detection_yolov12.int8.onnx + <hasil>.report.json. Pakai dengan MODEL_PATH=<hasil>.
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import json
+import random
+import re
+import statistics
+import tempfile
+import cv2
+import numpy as np
+
+from config import MODEL_PATH, VIOLATION_SPOOL_PATH
+from core.inference_backends import to_blob, parse_meta, static_dim
+from tools._eval import load_dir_frames, load_labels, box_iou, run_model
+
+MAP_IOUS = np.arange(0.5, 0.96, 0.05)
+
+def load_spool_frames(path, limit):
+    from core.violation_spool import ViolationSpool
+    from core.violation_processor import POLAROID_LABEL_HEIGHT
+    frames = []
+    for k, jpg in enumerate(ViolationSpool(path).sample_images(limit)):
+        img = cv2.imdecode(np.frombuffer(jpg, np.uint8), cv2.IMREAD_COLOR)
+        if img is not None and img.shape[0] > POLAROID_LABEL_HEIGHT:
+            frames.append((f"spool:{k}", img[:-POLAROID_LABEL_HEIGHT]))
+    return frames
+
+# --- Ekspor & kuantisasi ---
+
+def ensure_onnx(model, imgsz):
+    """Model .pt diekspor dulu ke ONNX FP32 batch dinamis; .onnx dipakai apa adanya."""
+    if model.endswith(".onnx"):
+        return model
+    if not model.endswith(".pt"):
+        raise SystemExit(f"Kuantisasi butuh model .pt atau .onnx FP32: {model}")
+    from ultralytics import YOLO
+    return YOLO(model).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+
+def head_nodes(onnx_model):
+    """
+    Node milik modul Detect (indeks /model.N/ terbesar): decode box (DFL) dan sigmoid kelas
+    sensitif terhadap kuantisasi, jadi dibiarkan FP32.
+    """
+    index = {}
+    for node in onnx_model.graph.node:
+        m = re.match(r"/model\.(\d+)/", node.name)
+        if m:
+            index[node.name] = int(m.group(1))
+    if not index:
+        return []
+    last = max(index.values())
+    return [name for name, i in index.items() if i == last]
+
+class FrameCalibrationReader:
+    """CalibrationDataReader ONNX Runtime: frame dipreprocess persis seperti OnnxBackend (to_blob)."""
+    def __init__(self, frames, input_name, imgsz, batch):
+        self.input_name = input_name
+        chunks = [frames[k:k + batch] for k in range(0, len(frames), batch)]
+        # Model fixed batch hanya menerima batch penuh
+        self.chunks = iter(c for c in chunks if len(c) == batch)
+        self.imgsz = imgsz
+
+    def get_next(self):
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            return None
+        return {self.input_name: to_blob(chunk, self.imgsz)[0]}
+
+def quantize(fp32_path, output, frames, args):
+    import onnx
+    from onnxruntime.quantization import (
+        quantize_static, QuantFormat, QuantType, CalibrationMethod
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    source = onnx.load(fp32_path)
+    meta = {p.key: p.value for p in source.metadata_props}
+    graph_input = source.graph.input[0]
+    dims = [d.dim_value or None for d in graph_input.type.tensor_type.shape.dim]
+    imgsz = parse_meta(meta.get("imgsz")) or [dims[2], dims[3]]
+    batch = static_dim(dims[0]) or 1
+    exclude = head_nodes(source) if args.exclude_head else []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prepared = os.path.join(tmp, "prepared.onnx")
+        quant_pre_process(fp32_path, prepared, skip_symbolic_shape=False)
+        reader = FrameCalibrationReader(frames, graph_input.name, imgsz, batch)
+        quantize_static(
+            prepared, output, reader,
+            quant_format=QuantFormat.QDQ,
+            per_channel=args.per_channel,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method={
+                "minmax": CalibrationMethod.MinMax,
+                "entropy": CalibrationMethod.Entropy,
+                "percentile": CalibrationMethod.Percentile,
+            }[args.calib_method],
+            nodes_to_exclude=exclude,
+        )
+
+    # names / imgsz / stride dibutuhkan OnnxBackend; kuantisasi tidak selalu membawa metadata_props
+    quantized = onnx.load(output)
+    existing = {p.key for p in quantized.metadata_props}
+    for key, value in meta.items():
+        if key not in existing:
+            quantized.metadata_props.add(key=key, value=value)
+    onnx.save(quantized, output)
+    print(f"INT8 tersimpan: {output} ({len(exclude)} node head tetap FP32, kalibrasi {args.calib_method}, "
+          f"{len(frames)} frame)")
+
+# --- Evaluasi ---
+
+def average_precision(recall, precision):
+    """AP = luas di bawah envelope kurva PR, interpolasi 101 titik (seperti COCO / ultralytics)."""
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    x = np.linspace(0, 1, 101)
+    return float(np.trapz(np.interp(x, mrec, mpre), x))
+
+def mean_average_precision(ground_truth, predictions):
+    """mAP@0.5 dan mAP@0.5:0.95 rata-rata kelas yang punya GT. Input: list array [x1,y1,x2,y2,conf,cls] per frame."""
+    classes = np.unique(np.concatenate([g[:, 5] for g in ground_truth])) if ground_truth else []
+    ap = np.zeros((len(classes), len(MAP_IOUS)))
+    for ci, cls in enumerate(classes):
+        n_gt = sum(int((g[:, 5] == cls).sum()) for g in ground_truth)
+        confs, tp = [], []
+        for gt, pred in zip(ground_truth, predictions):
+            g = gt[gt[:, 5] == cls]
+            p = pred[pred[:, 5] == cls]
+            if len(p) == 0:
+                continue
+            p = p[np.argsort(-p[:, 4])]
+            hits = np.zeros((len(p), len(MAP_IOUS)), dtype=bool)
+            if len(g):
+                ious = box_iou(p[:, :4], g[:, :4])
+                # Greedy: prediksi conf tertinggi mengambil GT dengan IoU terbesar yang belum terpakai
+                for ti, threshold in enumerate(MAP_IOUS):
+                    used = set()
+                    for i in range(len(p)):
+                        for j in np.argsort(-ious[i]):
+                            if ious[i, j] < threshold:
+                                break
+                            if j not in used:
+                                used.add(j)
+                                hits[i, ti] = True
+                                break
+            confs.extend(p[:, 4])
+            tp.append(hits)
+        if not tp or n_gt == 0:
+            continue
+        order = np.argsort(-np.asarray(confs))
+        tp = np.concatenate(tp)[order]
+        tpc = np.cumsum(tp, axis=0)
+        fpc = np.cumsum(~tp, axis=0)
+        for ti in range(len(MAP_IOUS)):
+            recall = tpc[:, ti] / n_gt
+            precision = tpc[:, ti] / (tpc[:, ti] + fpc[:, ti])
+            ap[ci, ti] = average_precision(recall, precision)
+    if not len(classes):
+        return {"map50": None, "map50_95": None}
+    return {"map50": round(float(ap[:, 0].mean()), 4), "map50_95": round(float(ap.mean()), 4)}
+
+def model_size_mb(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1e6
+    return os.path.getsize(path) / 1e6
+
+def measure(path, images, args):
+    """Latensi per frame pada --conf (sama dengan produksi) lewat backend yang dipakai worker."""
+    detector, _, latencies, fps = run_model(path, images, args.conf, args.batch, args.warmup)
+    ordered = sorted(latencies)
+    return detector, {
+        "model": path,
+        "size_mb": round(model_size_mb(path), 1),
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95)], 2),
+        "fps": round(fps, 2),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL_PATH, help="Model sumber .pt / .onnx FP32 (default: MODEL_PATH)")
+    parser.add_argument("--output", help="Path model INT8 (default: <model>.int8.onnx)")
+    parser.add_argument("--frames", help="Folder frame kalibrasi / evaluasi")
+    parser.add_argument("--spool", action="store_true", help="Tambahkan crop pelanggaran dari spool lokal")
+    parser.add_argument("--spool-path", default=VIOLATION_SPOOL_PATH)
+    parser.add_argument("--labels", help="Folder label YOLO txt untuk mAP terhadap GT asli (opsional)")
+    parser.add_argument("--calib-count", type=int, default=200)
+    parser.add_argument("--eval-count", type=int, default=200)
+    parser.add_argument("--calib-method", choices=["minmax", "entropy", "percentile"], default="minmax")
+    parser.add_argument("--no-per-channel", dest="per_channel", action="store_false")
+    parser.add_argument("--quantize-head", dest="exclude_head", action="store_false",
+                        help="Ikut kuantisasi head Detect (lebih cepat, biasanya akurasi turun)")
+    parser.add_argument("--imgsz", type=int, default=640, help="Hanya untuk ekspor .pt -> ONNX")
+    parser.add_argument("--conf", type=float, default=0.25, help="Threshold untuk pengukuran latensi & pseudo-GT")
+    parser.add_argument("--eval-conf", type=float, default=0.01, help="Threshold prediksi untuk kurva PR mAP")
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=0, help="Batasi thread inferensi (samakan dengan produksi)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-quantize", action="store_true", help="Hanya laporan untuk --output yang sudah ada")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        os.environ["OMP_NUM_THREADS"] = os.environ["MKL_NUM_THREADS"] = str(args.threads)
+        from core.inference_pool import pin_process
+        pin_process(args.threads)
+
+    frames = load_dir_frames(args.frames) if args.frames else []
+    if args.spool:
+        frames += load_spool_frames(args.spool_path, args.calib_count + args.eval_count)
+    frames = [(name, f) for name, f in frames if f is not None]
+    if len(frames) < 2:
+        raise SystemExit("Butuh minimal 2 frame (--frames DIR dan/atau --spool)")
+    random.Random(args.seed).shuffle(frames)
+    calib = frames[:min(args.calib_count, len(frames) - 1)]
+    evaluation = frames[len(calib):len(calib) + args.eval_count]
+    print(f"{len(calib)} frame kalibrasi, {len(evaluation)} frame evaluasi")
+
+    fp32 = ensure_onnx(args.model, args.imgsz)
+    output = args.output or os.path.splitext(fp32)[0] + ".int8.onnx"
+    if not args.skip_quantize:
+        quantize(fp32, output, [f for _, f in calib], args)
+
+    candidates = [args.model] + ([fp32] if fp32 != args.model else []) + [output]
+    images = [f for _, f in evaluation]
+    ground_truth = None
+    if args.labels:
+        ground_truth = [load_labels(args.labels, name, f.shape) for name, f in evaluation]
+
+    rows = []
+    for path in candidates:
+        detector, row = measure(path, images, args)
+        if ground_truth is None:
+            # Model pertama (yang sekarang dipakai) menjadi pseudo-GT pada --conf
+            ground_truth = detector.detect_batch(images, args.conf)
+            row["reference"] = True
+        row.update(mean_average_precision(ground_truth, detector.detect_batch(images, args.eval_conf)))
+        rows.append(row)
+
+    base = rows[0]
+    print(f"\n{'model':<50} | {'MB':>6} | {'p50 ms':>7} | {'p95 ms':>7} | {'fps':>7} | {'speedup':>7} | "
+          f"{'mAP50':>6} | {'mAP50-95':>8}")
+    for row in rows:
+        row["speedup"] = round(base["p50_ms"] / row["p50_ms"], 2) if row["p50_ms"] else None
+        fmt = lambda v, w, p: f"{v:{w}.{p}f}" if v is not None else f"{'-':>{w}}"
+        print(f"{row['model'][-50:]:<50} | {row['size_mb']:6.1f} | {row['p50_ms']:7.1f} | {row['p95_ms']:7.1f} | "
+              f"{row['fps']:7.2f} | {fmt(row['speedup'], 7, 2)} | {fmt(row['map50'], 6, 3)} | "
+              f"{fmt(row['map50_95'], 8, 3)}{'  (pseudo-GT)' if row.get('reference') else ''}")
+
+    report = {
+        "source_model": args.model,
+        "quantized_model": output,
+        "ground_truth": "labels" if args.labels else "pseudo (model referensi)",
+        "calib_frames": len(calib),
+        "eval_frames": len(evaluation),
+        "calib_method": args.calib_method,
+        "threads": args.threads or None,
+        "results": rows,
+    }
+    with open(output + ".report.json", "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nLaporan: {output}.report.json")
+    print(f"Pakai dengan: MODEL_PATH={os.path.relpath(output, backend_dir)}")
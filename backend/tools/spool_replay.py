@@ -0,0 +1,89 @@
+# tools/spool_replay.py
+"""
+Melihat dan mengirim ulang isi spool pelanggaran lokal (core/violation_spool.py).
+
+Contoh:
+    python tools/spool_replay.py stats
+    python tools/spool_replay.py list --limit 20
+    python tools/spool_replay.py replay            # abaikan backoff, kirim semua yang tidak sedang di-claim worker
+    python tools/spool_replay.py replay --force    # lepas juga claim aktif (semua worker harus berhenti)
+    python tools/spool_replay.py purge --older-than-hours 168
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import datetime
+import json
+import time
+
+from config import VIOLATION_SPOOL_PATH
+from core.violation_spool import get_spool
+
+def cmd_stats(spool, args):
+    print(json.dumps(spool.stats(), indent=2))
+
+def cmd_list(spool, args):
+    for spool_id, cctv_id, class_name, detected_at, attempts, uploaded, last_error in spool.list(args.limit):
+        ts = datetime.datetime.fromtimestamp(detected_at).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"#{spool_id:<6} cctv={cctv_id:<4} {class_name:<16} {ts} attempts={attempts} "
+              f"uploaded={'ya' if uploaded else 'tidak'} {last_error or ''}")
+
+def cmd_replay(spool, args):
+    # Import di sini: butuh Supabase + DB, tidak diperlukan untuk stats/list/purge
+    import services.config_service as config_service
+    from core.violation_processor import upload_and_log_violation, shutdown_violation_pipeline
+
+    config_service.load_object_classes()
+    released = spool.release_claims(force=args.force)
+    print(f"{released} baris dilepas dari backoff" + ("" if args.force else " (baris yang sedang di-claim worker dilewati)"))
+    ok = failed = 0
+    started = time.time()
+    while True:
+        events = spool.claim_due(args.batch)
+        if not events:
+            break
+        for event in events:
+            try:
+                upload_and_log_violation(event)
+                ok += 1
+            except Exception as e:
+                failed += 1
+                print(f"Gagal #{event['spool_id']}: {e}")
+        if failed and args.stop_on_error:
+            break
+    # Tulis sisa batch ke DB sebelum menampilkan hasil
+    shutdown_violation_pipeline()
+    print(f"Replay selesai: {ok} ter-upload, {failed} gagal dalam {time.time() - started:.1f} detik")
+    print(json.dumps(spool.stats(), indent=2))
+
+def cmd_purge(spool, args):
+    removed = spool.purge(args.older_than_hours * 3600)
+    print(f"{removed} baris dihapus dari spool")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default=VIOLATION_SPOOL_PATH, help="Lokasi file spool SQLite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("stats")
+    p_list = sub.add_parser("list")
+    p_list.add_argument("--limit", type=int, default=50)
+    p_replay = sub.add_parser("replay")
+    p_replay.add_argument("--batch", type=int, default=20)
+    p_replay.add_argument("--stop-on-error", action="store_true")
+    p_replay.add_argument("--force", action="store_true",
+                          help="Lepas juga claim aktif (hanya jika semua worker sudah dihentikan)")
+    p_purge = sub.add_parser("purge")
+    p_purge.add_argument("--older-than-hours", type=float, required=True)
+
+    args = parser.parse_args()
+    # get_spool: instance yang sama dipakai upload_and_log_violation saat replay
+    spool = get_spool(args.path)
+    {"stats": cmd_stats, "list": cmd_list, "replay": cmd_replay, "purge": cmd_purge}[args.command](spool, args)
@@ -0,0 +1,65 @@
+# backend/utils/ipc.py
+import json
+import os
+import socket
+import struct
+
+# Format pesan: [4 byte panjang header][4 byte panjang payload][header JSON][payload biner]
+_PREFIX = struct.Struct("!II")
+
+def parse_address(address: str):
+    """
+    Alamat berbentuk 'host:port' dipakai sebagai TCP (fallback Windows yang tidak punya AF_UNIX),
+    selain itu dianggap path Unix socket.
+    """
+    if ":" in address and not address.startswith("/"):
+        host, port = address.rsplit(":", 1)
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+def connect(address: str, timeout: float = None) -> socket.socket:
+    family, addr = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    if timeout is not None:
+        sock.settimeout(timeout)
+    sock.connect(addr)
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+def listen(address: str, backlog: int = 64) -> socket.socket:
+    family, addr = parse_address(address)
+    if family == socket.AF_UNIX and os.path.exists(addr):
+        # Sisa socket dari proses sebelumnya (crash / restart PM2)
+        os.unlink(addr)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(addr)
+    sock.listen(backlog)
+    return sock
+
+def _recv_exact(sock: socket.socket, size: int) -> bytearray:
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise ConnectionError("Socket ditutup oleh peer.")
+        received += n
+    return buf
+
+def send_message(sock: socket.socket, header: dict, payload=b"") -> None:
+    """payload boleh bytes atau numpy array C-contiguous (dikirim tanpa salinan tambahan)."""
+    header_bytes = json.dumps(header).encode("utf-8")
+    payload = memoryview(payload).cast("B")
+    sock.sendall(_PREFIX.pack(len(header_bytes), payload.nbytes) + header_bytes)
+    if payload.nbytes:
+        sock.sendall(payload)
+
+def recv_message(sock: socket.socket):
+    header_len, payload_len = _PREFIX.unpack(_recv_exact(sock, _PREFIX.size))
+    header = json.loads(_recv_exact(sock, header_len).decode("utf-8"))
+    payload = _recv_exact(sock, payload_len) if payload_len else bytearray()
+    return header, payload
@@ -0,0 +1,23 @@
+# backend/utils/redis_client.py
+import os
+import redis
+from threading import Lock
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_client = None
+_lock = Lock()
+
+def get_redis():
+    """Satu client Redis per proses (redis-py thread-safe, koneksi diambil dari pool internalnya)."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = redis.Redis(
+                    host=os.getenv("REDIS_HOST", "localhost"),
+                    port=int(os.getenv("REDIS_PORT", 6379)),
+                    db=int(os.getenv("REDIS_DB", 0))
+                )
+    return _client
@@ -28,4 +28,23 @@ def log_resource(label: str = "ALL"):
             f"Threads {threads}"
         )
     except Exception:
-        pass  
\ No newline at end of file
+        pass  
+
+_cpu_sample = (0.0, None)
+
+
+def host_cpu_percent(max_age: float = 1.0):
+    """
+    CPU host (semua core, %) dengan cache max_age detik; dipakai controller adaptif di loop panas.
+    psutil.cpu_percent(interval=None) mengukur sejak panggilan sebelumnya, jadi panggilan pertama bernilai 0.
+    """
+    global _cpu_sample
+    now = time.time()
+    sampled_at, value = _cpu_sample
+    if value is None or now - sampled_at >= max_age:
+        try:
+            value = psutil.cpu_percent(interval=None)
+        except Exception:
+            value = 0.0
+        _cpu_sample = (now, value)
+    return value
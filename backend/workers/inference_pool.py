@@ -0,0 +1,187 @@
+# inference_pool.py
+import sys
+import os
+
+# Mendapatkan path absolut dari direktori 'backend'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import json
+import logging
+import subprocess
+import time
+from threading import Thread, Lock
+
+from utils import ipc
+from utils.redis_client import get_redis
+from core.inference_pool import (
+    PoolMember, PoolScheduler, resolve_pool_shape, plan_members, member_address, format_cpus
+)
+from config import (
+    INFERENCE_SERVER_ADDR, INFERENCE_MAX_BATCH, INFERENCE_MAX_LATENCY_MS,
+    INFERENCE_POOL_SIZE, INFERENCE_POOL_THREADS
+)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - [POOL] - %(message)s")
+
+POOL_STATUS_KEY = "inference_pool_status"
+
+class InferencePool:
+    """
+    N proses workers/inference_server.py, masing-masing di-pin ke set core sendiri dengan thread torch terbatas,
+    sehingga total thread inferensi = jumlah core fisik (bukan core x jumlah worker).
+    Proses ini hanya control plane di INFERENCE_SERVER_ADDR: worker (INFERENCE_MODE=pool) meminta member
+    lewat op "assign", lalu frame dikirim langsung ke member. Member yang mati di-restart dengan backoff;
+    hitungan restart (dan backoff-nya) di-reset setelah member hidup stabil selama stable_uptime detik.
+    """
+    def __init__(self, address, pool_size, threads, max_batch, max_latency_ms, poll_interval=2.0, stable_uptime=300.0):
+        self.address = address
+        self.max_batch = max_batch
+        self.max_latency_ms = max_latency_ms
+        self.poll_interval = poll_interval
+        self.stable_uptime = stable_uptime
+        pool_size, threads = resolve_pool_shape(pool_size, threads)
+        self.members = [
+            PoolMember(k, member_address(address, k), cpus, threads)
+            for k, cpus in enumerate(plan_members(pool_size, threads))
+        ]
+        self.scheduler = PoolScheduler(self.members)
+        self.lock = Lock()
+        self._stats_socks = {}
+        self._restart_at = {}
+        self._started_at = {}
+
+    def _spawn(self, member):
+        env = dict(os.environ)
+        # Batasi thread OpenMP/MKL sebelum torch di-import di proses member
+        env["OMP_NUM_THREADS"] = env["MKL_NUM_THREADS"] = str(member.threads)
+        member.process = subprocess.Popen([
+            sys.executable, os.path.join(backend_dir, "workers", "inference_server.py"),
+            "--address", member.address,
+            "--max-batch", str(self.max_batch),
+            "--max-latency-ms", str(self.max_latency_ms),
+            "--threads", str(member.threads),
+            "--cpus", format_cpus(member.cpus),
+        ], cwd=backend_dir, env=env)
+        self._started_at[member.index] = time.time()
+        member.mark_down()
+        logging.info(f"[POOL] Member {member.index} dimulai (pid {member.process.pid}, cpus "
+                     f"{format_cpus(member.cpus) or '-'}, {member.threads} thread) di {member.address}")
+
+    def _poll_member(self, member, now):
+        """Ambil stats member (koneksi stats dipertahankan); gagal = member belum/tidak siap."""
+        try:
+            sock = self._stats_socks.get(member.index)
+            if sock is None:
+                sock = ipc.connect(member.address, timeout=5)
+                self._stats_socks[member.index] = sock
+            ipc.send_message(sock, {"op": "stats"})
+            header, _ = ipc.recv_message(sock)
+        except OSError:
+            self._close_stats_sock(member.index)
+            with self.lock:
+                member.mark_down()
+            return
+        with self.lock:
+            member.update_stats(header, now)
+
+    def _close_stats_sock(self, index):
+        sock = self._stats_socks.pop(index, None)
+        if sock is not None:
+            sock.close()
+
+    def monitor_loop(self):
+        last_log = 0.0
+        while True:
+            now = time.time()
+            for member in self.members:
+                if member.process.poll() is not None:
+                    with self.lock:
+                        member.mark_down()
+                    if now >= self._restart_at.get(member.index, 0):
+                        member.restarts += 1
+                        logging.error(f"[POOL] Member {member.index} mati (exit {member.process.returncode}), restart ke-{member.restarts}.")
+                        self._restart_at[member.index] = now + min(2 ** member.restarts, 60)
+                        self._close_stats_sock(member.index)
+                        self._spawn(member)
+                    continue
+                if member.restarts and now - self._started_at.get(member.index, now) >= self.stable_uptime:
+                    logging.info(f"[POOL] Member {member.index} stabil {self.stable_uptime:.0f} s, hitungan restart di-reset.")
+                    member.restarts = 0
+                self._poll_member(member, now)
+
+            status = self.stats()
+            try:
+                get_redis().set(POOL_STATUS_KEY, json.dumps(status), ex=10)
+            except Exception as e:
+                logging.warning(f"[POOL] Gagal publish status: {e}")
+            if now - last_log >= 30:
+                last_log = now
+                logging.info("[POOL] " + " | ".join(
+                    f"#{m['index']} util {m['utilization'] * 100:3.0f}% cam {m['cameras']} batch {m['avg_batch_size']}"
+                    for m in status["members"]
+                ))
+            time.sleep(self.poll_interval)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "address": self.address,
+                "members": [m.summary() for m in self.members],
+                "assignments": {str(cctv_id): index for cctv_id, (index, _) in self.scheduler.assignments.items()},
+                "updated_at": time.time(),
+            }
+
+    def handle_client(self, sock):
+        try:
+            while True:
+                header, _ = ipc.recv_message(sock)
+                op = header.get("op")
+                if op == "assign":
+                    with self.lock:
+                        member = self.scheduler.assign(int(header["cctv_id"]), failed=header.get("failed"))
+                    if member is None:
+                        ipc.send_message(sock, {"error": "Belum ada member inference pool yang siap"})
+                    else:
+                        ipc.send_message(sock, {"member": member.index, "address": member.address})
+                elif op == "stats":
+                    ipc.send_message(sock, self.stats())
+                else:
+                    ipc.send_message(sock, {"error": f"Unknown op: {op}"})
+        except ConnectionError:
+            pass
+        except Exception as e:
+            logging.error(f"[POOL] Koneksi client error: {e}")
+        finally:
+            sock.close()
+
+    def serve_forever(self):
+        for member in self.members:
+            self._spawn(member)
+        Thread(target=self.monitor_loop, daemon=True, name="PoolMonitor").start()
+        server_sock = ipc.listen(self.address)
+        logging.info(f"[POOL] Inference pool siap di {self.address}: {len(self.members)} member x "
+                     f"{self.members[0].threads} thread")
+        try:
+            while True:
+                client, _ = server_sock.accept()
+                Thread(target=self.handle_client, args=(client,), daemon=True, name="PoolClient").start()
+        finally:
+            for member in self.members:
+                if member.process is not None and member.process.poll() is None:
+                    member.process.terminate()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--address", default=INFERENCE_SERVER_ADDR, help="Path Unix socket atau host:port (control plane)")
+    parser.add_argument("--size", type=int, default=INFERENCE_POOL_SIZE, help="Jumlah member (0 = otomatis dari core fisik)")
+    parser.add_argument("--threads", type=int, default=INFERENCE_POOL_THREADS, help="Thread torch per member (0 = otomatis)")
+    parser.add_argument("--max-batch", type=int, default=INFERENCE_MAX_BATCH)
+    parser.add_argument("--max-latency-ms", type=float, default=INFERENCE_MAX_LATENCY_MS)
+    args = parser.parse_args()
+
+    InferencePool(args.address, args.size, args.threads, args.max_batch, args.max_latency_ms).serve_forever()
@@ -0,0 +1,111 @@
+# inference_server.py
+import sys
+import os
+
+# Mendapatkan path absolut dari direktori 'backend'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import logging
+import time
+import torch
+import numpy as np
+from threading import Thread
+
+from utils import ipc
+from core.batching import BatchCollector
+from core.detector import LocalDetector, detect_requests
+from core.inference_pool import pin_process, parse_cpus, ACTIVE_CAMERA_SECONDS
+from config import (
+    MODEL_PATH, MODEL_BACKEND, INFERENCE_SERVER_ADDR, INFERENCE_MAX_BATCH, INFERENCE_MAX_LATENCY_MS
+)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - [INFER] - %(message)s")
+
+class InferenceServer:
+    """
+    Satu model YOLO untuk semua worker kamera. Frame dari setiap koneksi dikumpulkan
+    oleh BatchCollector lalu di-predict sekaligus. Server hanya mengembalikan deteksi;
+    tracking tetap dilakukan di worker masing-masing (core.tracker) sehingga track ID
+    antar kamera tidak pernah tercampur.
+    """
+    def __init__(self, address, max_batch, max_latency_ms):
+        self.address = address
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.detector = LocalDetector(MODEL_PATH, self.device, MODEL_BACKEND)
+        self.names = self.detector.names
+        # cctv_id -> waktu frame terakhir (scheduler pool menghitung kamera aktif per member)
+        self.cameras = {}
+        self.collector = BatchCollector(self._infer_batch, max_batch, max_latency_ms, name="INFER").start()
+        self.started_at = time.time()
+
+    def _infer_batch(self, batch):
+        # Dikelompokkan per imgsz kamera; threshold tiap kelompok = conf terendah, filter per kamera sesudahnya
+        outputs = detect_requests(self.detector, batch)
+        now = time.time()
+        for req in batch:
+            self.cameras[req.cctv_id] = now
+        return outputs
+
+    def handle_client(self, sock):
+        try:
+            while True:
+                header, payload = ipc.recv_message(sock)
+                op = header.get("op")
+
+                if op == "hello":
+                    ipc.send_message(sock, {"names": {str(k): v for k, v in self.names.items()}})
+                elif op == "detect":
+                    try:
+                        frame = np.frombuffer(payload, dtype=np.uint8).reshape(header["shape"])
+                        dets = self.collector.submit(
+                            int(header["cctv_id"]), frame, conf=float(header["conf"]), imgsz=header.get("imgsz")
+                        )
+                        ipc.send_message(sock, {"n": len(dets)}, np.ascontiguousarray(dets))
+                    except Exception as e:
+                        ipc.send_message(sock, {"error": str(e)})
+                elif op == "stats":
+                    ipc.send_message(sock, self.stats())
+                else:
+                    ipc.send_message(sock, {"error": f"Unknown op: {op}"})
+        except ConnectionError:
+            pass
+        except Exception as e:
+            logging.error(f"[INFER] Koneksi client error: {e}")
+        finally:
+            sock.close()
+
+    def stats(self):
+        s = self.collector.stats()
+        threshold = time.time() - ACTIVE_CAMERA_SECONDS
+        active = sorted(cctv_id for cctv_id, seen in list(self.cameras.items()) if seen > threshold)
+        s["cameras"] = len(active)
+        s["camera_ids"] = active
+        s["torch_threads"] = torch.get_num_threads()
+        s["model"] = self.detector.describe()
+        s["uptime_s"] = round(time.time() - self.started_at, 1)
+        return s
+
+    def serve_forever(self):
+        server_sock = ipc.listen(self.address)
+        logging.info(f"[INFER] Inference server siap di {self.address} (device={self.device})")
+        while True:
+            client, _ = server_sock.accept()
+            Thread(target=self.handle_client, args=(client,), daemon=True, name="InferClient").start()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--address", default=INFERENCE_SERVER_ADDR, help="Path Unix socket atau host:port")
+    parser.add_argument("--max-batch", type=int, default=INFERENCE_MAX_BATCH)
+    parser.add_argument("--max-latency-ms", type=float, default=INFERENCE_MAX_LATENCY_MS)
+    parser.add_argument("--threads", type=int, default=0, help="torch.set_num_threads (0 = default torch)")
+    parser.add_argument("--cpus", default="", help="CPU affinity, mis. 0-3 atau 0,1 (member inference pool)")
+    args = parser.parse_args()
+
+    pin_process(args.threads, parse_cpus(args.cpus))
+
+    InferenceServer(args.address, args.max_batch, args.max_latency_ms).serve_forever()
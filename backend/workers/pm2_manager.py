@@ -14,12 +14,32 @@ if backend_dir not in sys.path:
 import subprocess
 import json
 import time
+import select
 import logging
-from services.cctv_services import get_all_active_cctv
-from core.cctv_scheduler import get_active_cctv_ids_now
+from concurrent.futures import ThreadPoolExecutor
+import psycopg2
+from db.db_config import get_listen_connection
+from services.cctv_services import get_cctv_process_rows, CCTV_NOTIFY_CHANNEL
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
 
+# Rekonsiliasi penuh (pm2 jlist + semua baris cctv_data) sebagai jaring pengaman bila ada NOTIFY yang terlewat
+PM2_RECONCILE_INTERVAL = float(os.getenv("PM2_RECONCILE_INTERVAL", 120))
+# Interval polling lama, dipakai selama koneksi LISTEN ke PostgreSQL tidak tersedia
+PM2_FALLBACK_INTERVAL = float(os.getenv("PM2_FALLBACK_INTERVAL", 15))
+# Jumlah subprocess pm2 start/delete yang boleh berjalan bersamaan
+PM2_PARALLELISM = int(os.getenv("PM2_PARALLELISM", 8))
+# Notifikasi yang datang beruntun (mis. beberapa kamera diubah sekaligus) digabung dalam jendela ini
+NOTIFY_DEBOUNCE = 0.2
+
+# "process" = satu proses PM2 per kamera (workers/worker_cctv.py)
+# "host"    = beberapa kamera per proses dengan model bersama (workers/worker_host.py)
+WORKER_MODE = os.getenv("WORKER_MODE", "process")
+# Mode host: jumlah core per proses host; jumlah host = core mesin // WORKER_HOST_CORES (WORKER_HOSTS menimpa)
+WORKER_HOST_CORES = int(os.getenv("WORKER_HOST_CORES", 4))
+WORKER_HOSTS = int(os.getenv("WORKER_HOSTS", 0))
+HOST_PROCESS_PREFIX = "CCTV-HOST-"
+
 def get_pm2_cmd():
     """Mencari perintah PM2 yang tepat sesuai OS."""
     # Mencari pm2.cmd (Windows) atau pm2 (Linux/Mac) di dalam PATH
@@ -39,19 +59,10 @@ def get_running_pm2_processes():
     except:
         return []
 
-def sync_cctv_workers():
-    logging.info("[SYNC] Checking database for all enabled CCTVs...")
-    pm2_executable = get_pm2_cmd()
-    
-    # 1. Tidak lagi memfilter berdasarkan jadwal untuk menjalankan proses
-    # Cukup ambil semua CCTV yang statusnya Enabled di database
-    all_enabled_cctvs = get_all_active_cctv()
-    final_active_ids = [c['id'] for c in all_enabled_cctvs] # Gunakan list ini untuk kontrol proses
-    
-    running_processes = get_running_pm2_processes()
+def get_running_worker_map(processes=None):
+    """cctv_id -> nama proses PM2 dari pm2 jlist (processes = hasil jlist yang sudah diambil)."""
     running_id_map = {}
-    
-    for p in running_processes:
+    for p in get_running_pm2_processes() if processes is None else processes:
         # PM2 jlist terkadang mengembalikan proses yang berstatus 'stopped' atau 'errored'
         # Kita hanya fokus pada argumen --cctv_id
         args = p.get('pm2_env', {}).get('args', [])
@@ -62,49 +73,272 @@ def sync_cctv_workers():
                 running_id_map[c_id] = p['name']
             except (ValueError, IndexError):
                 continue
+    return running_id_map
+
+def get_running_host_map(processes=None):
+    """nama proses host -> tuple cctv_id dari argumen --cctv_ids di pm2 jlist."""
+    hosts = {}
+    for p in get_running_pm2_processes() if processes is None else processes:
+        args = p.get('pm2_env', {}).get('args', [])
+        if '--cctv_ids' in args:
+            idx = args.index('--cctv_ids')
+            try:
+                hosts[p['name']] = tuple(sorted(int(x) for x in args[idx + 1].split(",") if x))
+            except (ValueError, IndexError):
+                continue
+    return hosts
+
+def host_count():
+    if WORKER_HOSTS > 0:
+        return WORKER_HOSTS
+    return max(1, (os.cpu_count() or 1) // max(WORKER_HOST_CORES, 1))
+
+def plan_hosts(enabled_ids, current, n_hosts):
+    """
+    Bin-packing kamera ke n_hosts host dengan kapasitas rata (ceil(kamera / host)).
+    Penempatan lama dipertahankan selama host masih ada dan belum penuh, karena setiap perubahan anggota
+    berarti proses host (dan semua kameranya) di-restart; kamera baru masuk ke host yang paling sedikit isinya.
+    Return dict nama proses -> tuple cctv_id (host kosong tidak dijalankan).
+    """
+    enabled_ids = set(enabled_ids)
+    n_hosts = max(1, min(n_hosts, len(enabled_ids))) if enabled_ids else 0
+    capacity = -(-len(enabled_ids) // n_hosts) if n_hosts else 0
+    hosts = {f"{HOST_PROCESS_PREFIX}{k}": [] for k in range(n_hosts)}
+    placed = set()
+    for name in sorted(current):
+        if name not in hosts:
+            continue
+        for cctv_id in current[name]:
+            if cctv_id in enabled_ids and cctv_id not in placed and len(hosts[name]) < capacity:
+                hosts[name].append(cctv_id)
+                placed.add(cctv_id)
+    for cctv_id in sorted(enabled_ids - placed):
+        target = min(hosts, key=lambda name: (len(hosts[name]), name))
+        hosts[target].append(cctv_id)
+    return {name: tuple(sorted(ids)) for name, ids in hosts.items() if ids}
+
+def worker_process_name(cctv):
+    c_name = "".join(x for x in cctv['name'] if x.isalnum() or x == '-').replace(" ", "-")
+    return f"CCTV-{cctv['id']}_{c_name}"
+
+class Orchestrator:
+    """
+    Menyamakan proses PM2 dengan cctv_data yang enabled.
+    - Event-driven: LISTEN cctv_changed (NOTIFY dikirim routes/cctv_crud.py di dalam transaksi),
+      hanya kamera yang disebut di payload yang di-query dan di-diff.
+    - self.running adalah cache cctv_id -> nama proses yang diperbarui setelah setiap aksi,
+      sehingga pm2 jlist hanya dijalankan saat rekonsiliasi penuh.
+    - pm2 start/delete untuk kamera berbeda berjalan paralel; untuk satu kamera tetap berurutan (delete -> start).
+    - WORKER_MODE=host: kamera di-bin-pack ke proses host (workers/worker_host.py); hanya host yang anggotanya
+      berubah yang di-restart.
+    """
+    def __init__(self, mode=WORKER_MODE):
+        self.pm2 = get_pm2_cmd()
+        self.mode = mode
+        self.running = {}
+        self.hosts = {}
+        self.executor = ThreadPoolExecutor(max_workers=max(PM2_PARALLELISM, 1), thread_name_prefix="pm2")
+        self.listen_conn = None
+        self.last_reconcile = 0.0
+
+    # --- Aksi PM2 ---
+    def _pm2(self, *args):
+        result = subprocess.run([self.pm2, *args], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"pm2 {' '.join(args)} gagal: {result.stderr.strip()[:200]}")
+
+    def _start(self, script, name, *script_args):
+        self._pm2(
+            'start', script,
+            '--name', name,
+            '--exp-backoff-restart-delay', '100',
+            '--max-restarts', '50',
+            '--kill-timeout', '3000',
+            '--', *script_args
+        )
+
+    def _converge(self, c_id, want, have):
+        """Dijalankan di thread pool: bawa satu kamera dari proses `have` ke `want` (None = tidak ada)."""
+        if have:
+            if want:
+                logging.info(f"[RENAME/UPDATE] {have} -> {want}")
+            else:
+                logging.info(f"[STOP] Deleting worker: {have} (Status is DISABLED in database)")
+            self._pm2('delete', have)
+        if want:
+            logging.info(f"[START] Launching Worker: {want}")
+            self._start('workers/worker_cctv.py', want, '--cctv_id', str(c_id))
+
+    def _converge_host(self, name, want_ids, have_ids):
+        """Dijalankan di thread pool: restart satu proses host dengan anggota kamera baru (None = hentikan)."""
+        if have_ids is not None:
+            logging.info(f"[STOP] Deleting host: {name} {list(have_ids)}")
+            self._pm2('delete', name)
+        if want_ids is not None:
+            logging.info(f"[START] Launching host: {name} {list(want_ids)}")
+            self._start(
+                'workers/worker_host.py', name,
+                '--host_id', name[len(HOST_PROCESS_PREFIX):], '--cctv_ids', ",".join(map(str, want_ids))
+            )
+
+    def apply(self, desired, cctv_ids):
+        """Diff desired (cctv_id -> nama proses, hanya yang enabled) terhadap cache running untuk cctv_ids."""
+        started = time.time()
+        jobs = {}
+        for c_id in cctv_ids:
+            want, have = desired.get(c_id), self.running.get(c_id)
+            if want != have:
+                jobs[c_id] = (want, self.executor.submit(self._converge, c_id, want, have))
+
+        for c_id, (want, job) in jobs.items():
+            try:
+                job.result()
+            except Exception as e:
+                # Cache tidak diubah: rekonsiliasi berikutnya (jlist) yang menentukan kondisi sebenarnya
+                logging.error(f"[SYNC] CCTV {c_id}: {e}")
+                continue
+            if want:
+                self.running[c_id] = want
+            else:
+                self.running.pop(c_id, None)
+        if jobs:
+            logging.info(f"[SYNC] {len(jobs)} worker disesuaikan dalam {(time.time() - started) * 1000:.0f} ms")
 
-    # 2. START atau UPDATE worker
-    # Loop sekarang menggunakan all_enabled_cctvs
-    for cctv in all_enabled_cctvs: 
-        c_id = cctv['id']
-        c_name = "".join(x for x in cctv['name'] if x.isalnum() or x == '-').replace(" ", "-")
-        desired_process_name = f"CCTV-{c_id}_{c_name}"
-        
-        if c_id not in running_id_map:
-            logging.info(f"[START] Launching Worker: {desired_process_name}")
-            subprocess.run([
-                pm2_executable, 'start', 'workers/worker_cctv.py',
-                '--name', desired_process_name,
-                '--exp-backoff-restart-delay', '100',
-                '--max-restarts', '50',
-                '--kill-timeout', '3000',
-                '--', '--cctv_id', str(c_id)
-            ])
-        elif running_id_map[c_id] != desired_process_name:
-            logging.info(f"[RENAME/UPDATE] {running_id_map[c_id]} -> {desired_process_name}")
-            subprocess.run([pm2_executable, 'delete', running_id_map[c_id]])
-            subprocess.run([
-                pm2_executable, 'start', 'workers/worker_cctv.py',
-                '--name', desired_process_name,
-                '--exp-backoff-restart-delay', '100',
-                '--max-restarts', '50',
-                '--kill-timeout', '3000',
-                '--', '--cctv_id', str(c_id)
-            ])
-
-    # 3. STOP & DELETE
-    # Sekarang worker hanya dihapus jika r_id tidak ada di daftar Enabled (final_active_ids)
-    for r_id, r_name in running_id_map.items():
-        if r_id not in final_active_ids:
-            logging.info(f"[STOP] Deleting worker: {r_name} (Status is DISABLED in database)")
-            subprocess.run([pm2_executable, 'delete', r_name])
+    def apply_hosts(self, desired):
+        """Diff desired (nama host -> tuple cctv_id) terhadap cache host; host dengan anggota sama tidak disentuh."""
+        started = time.time()
+        jobs = {}
+        for name in set(desired) | set(self.hosts):
+            want, have = desired.get(name), self.hosts.get(name)
+            if want != have:
+                jobs[name] = (want, self.executor.submit(self._converge_host, name, want, have))
+
+        for name, (want, job) in jobs.items():
+            try:
+                job.result()
+            except Exception as e:
+                logging.error(f"[SYNC] {name}: {e}")
+                continue
+            if want is not None:
+                self.hosts[name] = want
+            else:
+                self.hosts.pop(name, None)
+        if jobs:
+            logging.info(f"[SYNC] {len(jobs)} host disesuaikan dalam {(time.time() - started) * 1000:.0f} ms")
+
+    def sync_hosts(self):
+        rows = get_cctv_process_rows()
+        enabled = [row['id'] for row in rows if row['enabled']]
+        self.apply_hosts(plan_hosts(enabled, self.hosts, host_count()))
+
+    def reconcile(self):
+        """Rekonsiliasi penuh: semua baris cctv_data vs pm2 jlist."""
+        logging.info("[SYNC] Checking database for all enabled CCTVs...")
+        processes = get_running_pm2_processes()
+        if self.mode == "host":
+            self.hosts = get_running_host_map(processes)
+            # Worker per kamera sisa mode "process" dihentikan
+            self.running = get_running_worker_map(processes)
+            self.apply({}, set(self.running))
+            self.sync_hosts()
+        else:
+            rows = get_cctv_process_rows()
+            desired = {row['id']: worker_process_name(row) for row in rows if row['enabled']}
+            self.running = get_running_worker_map(processes)
+            self.apply(desired, set(desired) | set(self.running))
+            # Host sisa mode "host" dihentikan
+            self.hosts = get_running_host_map(processes)
+            self.apply_hosts({})
+        self.last_reconcile = time.time()
+
+    def on_cctv_changed(self, cctv_ids):
+        """Hanya kamera yang disebut NOTIFY; baris yang sudah dihapus tidak ikut ter-query sehingga worker-nya dihentikan."""
+        if self.mode == "host":
+            # Bin-packing butuh seluruh daftar kamera enabled (query ringan: id, name, enabled)
+            self.sync_hosts()
+            return
+        rows = get_cctv_process_rows(cctv_ids)
+        desired = {row['id']: worker_process_name(row) for row in rows if row['enabled']}
+        self.apply(desired, cctv_ids)
+
+    # --- LISTEN/NOTIFY ---
+    def _listen(self):
+        try:
+            conn = get_listen_connection()
+            conn.cursor().execute(f"LISTEN {CCTV_NOTIFY_CHANNEL};")
+            self.listen_conn = conn
+            logging.info(f"[LISTEN] Menunggu notifikasi '{CCTV_NOTIFY_CHANNEL}'.")
+            return True
+        except psycopg2.Error as e:
+            logging.warning(f"[LISTEN] Gagal LISTEN, kembali ke polling {PM2_FALLBACK_INTERVAL:.0f} detik: {e}")
+            self.listen_conn = None
+            return False
+
+    def _close_listen(self):
+        try:
+            self.listen_conn.close()
+        except Exception:
+            pass
+        self.listen_conn = None
+
+    def wait_notifications(self, timeout):
+        """Tunggu NOTIFY maksimal timeout detik. Return set cctv_id, atau None jika payload tidak dikenal (sync penuh)."""
+        conn = self.listen_conn
+        try:
+            if not select.select([conn], [], [], timeout)[0]:
+                return set()
+            conn.poll()
+            deadline = time.time() + NOTIFY_DEBOUNCE
+            while time.time() < deadline:
+                if select.select([conn], [], [], max(deadline - time.time(), 0))[0]:
+                    conn.poll()
+        except (psycopg2.Error, OSError) as e:
+            logging.warning(f"[LISTEN] Koneksi terputus: {e}")
+            self._close_listen()
+            return None
+
+        cctv_ids = set()
+        while conn.notifies:
+            payload = conn.notifies.pop(0).payload
+            try:
+                cctv_ids.add(int(payload))
+            except ValueError:
+                return None
+        return cctv_ids
+
+    def run(self):
+        self._listen()
+        self.reconcile()
+        while True:
+            try:
+                if self.listen_conn is None and self._listen():
+                    # Perubahan selama LISTEN terputus tidak pernah dinotifikasi
+                    self.reconcile()
+
+                interval = PM2_RECONCILE_INTERVAL if self.listen_conn is not None else PM2_FALLBACK_INTERVAL
+                timeout = max(self.last_reconcile + interval - time.time(), 0)
+                if self.listen_conn is None:
+                    time.sleep(timeout)
+                else:
+                    cctv_ids = self.wait_notifications(timeout)
+                    if cctv_ids is None:
+                        self.reconcile()
+                    elif cctv_ids:
+                        logging.info(f"[NOTIFY] cctv_data berubah: {sorted(cctv_ids)}")
+                        self.on_cctv_changed(cctv_ids)
+
+                if time.time() - self.last_reconcile >= interval:
+                    self.reconcile()
+            except Exception as e:
+                logging.error(f"Sync Error: {e}")
+                # Notifikasi yang gagal diproses ditebus oleh rekonsiliasi penuh dalam PM2_FALLBACK_INTERVAL detik
+                self.last_reconcile = time.time() - PM2_RECONCILE_INTERVAL + PM2_FALLBACK_INTERVAL
+                time.sleep(1)
+
+def sync_cctv_workers():
+    """Satu kali rekonsiliasi penuh (dipakai manual / skrip lama)."""
+    Orchestrator().reconcile()
 
 if __name__ == "__main__":
-    # Saat pertama kali manager jalan, sebaiknya bersihkan worker lama yang nyangkut
     logging.info("PM2 Orchestrator Started.")
-    while True:
-        try:
-            sync_cctv_workers()
-        except Exception as e:
-            logging.error(f"Sync Error: {e}")
-        time.sleep(15)
\ No newline at end of file
+    Orchestrator().run()
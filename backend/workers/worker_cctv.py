@@ -3,13 +3,10 @@ import logging
 import time
 import cv2
 import os
-import gc
+import json
 import torch
-import redis
 import numpy as np
-from ultralytics import YOLO
-from collections import deque
-from threading import Thread, Event
+from threading import Thread, Event, Lock
 
 import sys
 import os
@@ -27,29 +24,94 @@ if backend_dir not in sys.path:
 from shared_state import state
 import services.config_service as config_service
 from services.cctv_services import load_all_cctv_configs
-from core.violation_processor import process_detection
-from core.cctv_scheduler import is_cctv_active_now
+from core.violation_processor import process_detection, start_spool_drainer, spool_stats, shutdown_violation_pipeline
+from core.violation_writer import writer_stats
+from core.violation_pipeline import all_stats as pipeline_stats
+from core.cctv_scheduler import get_schedule_cache
+from core.detector import LocalDetector
+from core.tracker import CameraTracker, empty_tracks
+from core.motion_gate import MotionGate
+from core.adaptive_sampler import AdaptiveSampler
+from utils.resource_monitor import host_cpu_percent
+from core.frame_ring import SharedFrameRing
+from core.roi_mask import get_roi_mask
+from core.video_source import open_video_source
+from core.inference_client import InferenceClient
+from core.inference_pool import PoolInferenceClient
 from utils.helpers import get_color_for_class
+from utils.redis_client import get_redis
+from services.frame_transport import FramePublisher, ViewerDemand, RENDITIONS
+from db.db_config import pool_stats
+from services.config_bus import ConfigWatcher, SCOPE_SETTINGS, SCOPE_CCTV, SCOPE_SCHEDULE
 from config import (
-    CONFIDENCE_THRESHOLD, QUEUE_SIZE, FRAME_SKIP, CLEANUP_INTERVAL, 
-    MODEL_PATH, CCTV_RATIO
+    detection_setting, MODEL_PATH, MODEL_BACKEND, INFERENCE_MODE, INFERENCE_SERVER_ADDR,
+    CAPTURE_MODE, FRAME_STREAM_MAXLEN, ROI_CROP_MAX_RATIO
 )
 
 # Setup logging khusus worker agar tidak tercampur
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - [WORKER] - %(message)s")
 
-redis_client = redis.Redis(host='localhost', port=6379, db=0)
+redis_client = get_redis()
+
+# Field cctv_data yang butuh stream dibuka ulang jika berubah (sisanya cukup ditukar di antara frame)
+STREAM_CONFIG_KEYS = ("ip_address", "port", "token", "capture_backend", "decode_width")
 
 class CCTVWorker:
-    def __init__(self, cctv_id):
+    def __init__(self, cctv_id, detector=None, standalone=True):
+        """
+        detector: model yang dipakai bersama (mode host, workers/worker_host.py); None = dibuat sendiri.
+        standalone: True = satu proses per kamera (thread mati -> os._exit, PM2 restart),
+                    False = berjalan di dalam host; watchdog host yang membuat ulang thread capture.
+        """
         self.cctv_id = int(cctv_id)
+        self.standalone = standalone
         self.stop_event = Event()
-        self.frame_queue = deque(maxlen=QUEUE_SIZE)
+        self.threads = {}
+        # Generasi thread capture: thread lama yang macet di grab() berhenti sendiri begitu generasinya usang
+        self._capture_generation = 0
+        self.capture_restarts = 0
+        self._restart_streak = 0
+        self._next_restart_at = 0.0
+        self._health_checked_at = time.time()
+        self._health_frame_count = 0
+        # Ring buffer shared memory (dibuat saat frame pertama diketahui resolusinya)
+        self.ring = None
+        self.ring_lock = Lock()
+        self._retired_ring = None
+        self._ring_generation = 0
         self.tracked_violations = {}
         self.cctv_config = None
-        self.model = None
+        # Snapshot detection_settings milik worker ini; diganti utuh (bukan di-mutate) di antara frame
+        self.settings = dict(state.detection_settings)
+        # Perubahan dari config bus yang menunggu diterapkan oleh process_loop
+        self._pending_config = {}
+        self._pending_lock = Lock()
+        self._reopen_stream = Event()
+        self.config_watcher = None
+        self.config_applied = 0
+        self.detector = detector
+        self.tracker = None
+        self.frame_publishers = {}
+        self.viewer_demand = None
+        # Preview: encoded = frame yang digambar + di-encode, skipped = tidak ada viewer
+        self.preview_encoded = 0
+        # Frame yang dideteksi hanya pada crop ROI (roi_crop)
+        self.roi_crop_frames = 0
+        # Motion gate: track terakhir dipakai ulang untuk anotasi saat deteksi dilewati
+        self.motion_gate = MotionGate()
+        self.last_tracks = empty_tracks()
+        self.detect_ms_avg = 0.0
+        # Sampling adaptif per kamera (aktif lewat detection_settings.adaptive_sampling_enabled)
+        self.sampler = AdaptiveSampler()
+        self.preview_skipped = 0
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
         self.frame_count = 0
+        # Counter capture: grabbed = frame yang diambil dari stream, decoded = frame yang dikonversi ke BGR
+        self.grabbed_count = 0
+        self.decoded_count = 0
+        self._last_decode_at = 0.0
+        # seq ring -> callable frame resolusi penuh (hanya backend pyav dengan decode_width)
+        self.full_frame_handles = {}
 
     def load_config(self):
         """Mengambil konfigurasi spesifik CCTV dan GLOBAL CACHE dari database."""
@@ -57,46 +119,216 @@ class CCTVWorker:
         config_service.load_object_classes()
         config_service.load_violation_pairs()
         config_service.load_detection_settings()
+        with state.DETECTION_SETTINGS_LOCK:
+            self.settings = dict(state.detection_settings)
+        self._apply_settings()
 
         configs = load_all_cctv_configs()
         self.cctv_config = configs.get(self.cctv_id)
         if not self.cctv_config:
             raise Exception(f"Konfigurasi untuk CCTV ID {self.cctv_id} tidak ditemukan.")
+        # process_detection membaca lokasi/ROI dari state bersama
+        state.cctv_configs[self.cctv_id] = self.cctv_config
+
+    def _setting(self, key):
+        return detection_setting(key, self.settings)
+
+    def _apply_settings(self):
+        self.motion_gate.apply_settings(self.settings)
+        self.sampler.apply_settings(self.settings)
+
+    def _on_config_change(self, scopes):
+        """
+        Callback ConfigWatcher (thread listener): query DB di sini, lalu titipkan hasilnya ke process_loop
+        yang menukarnya sekaligus di antara dua frame (_apply_pending_config).
+        """
+        update = {}
+        if SCOPE_SETTINGS in scopes:
+            config_service.load_detection_settings()
+            with state.DETECTION_SETTINGS_LOCK:
+                update["settings"] = dict(state.detection_settings)
+        if SCOPE_CCTV in scopes:
+            cfg = load_all_cctv_configs().get(self.cctv_id)
+            if cfg is None:
+                # Kamera di-disable / dihapus: pm2_manager akan menghentikan proses ini
+                logging.info(f"[CCTV {self.cctv_id}] Tidak lagi aktif di DB, konfigurasi lama dipertahankan.")
+            else:
+                update["cctv"] = cfg
+        if SCOPE_SCHEDULE in scopes:
+            # ScheduleCache sudah thread-safe; cukup paksa reload pada panggilan berikutnya
+            get_schedule_cache(self.cctv_id).invalidate()
+        if update:
+            with self._pending_lock:
+                self._pending_config.update(update)
+            logging.info(f"[CCTV {self.cctv_id}] Perubahan konfigurasi diterima: {sorted(update)}")
+
+    def _apply_pending_config(self):
+        """Dipanggil process_loop sebelum mengambil frame berikutnya: settings & config kamera diganti utuh."""
+        with self._pending_lock:
+            if not self._pending_config:
+                return
+            update, self._pending_config = self._pending_config, {}
+
+        if "settings" in update:
+            self.settings = update["settings"]
+            self._apply_settings()
+        cfg = update.get("cctv")
+        if cfg is not None:
+            old = self.cctv_config or {}
+            self.cctv_config = cfg
+            state.cctv_configs[self.cctv_id] = cfg
+            # ROI baru -> RoiMask dibangun ulang otomatis (identitas list roi berubah)
+            if any(old.get(key) != cfg.get(key) for key in STREAM_CONFIG_KEYS):
+                self._reopen_stream.set()
+        self.config_applied += 1
+        logging.info(f"[CCTV {self.cctv_id}] Konfigurasi baru diterapkan: {sorted(update)}")
+
+    def build_detector(self):
+        """Mode 'server' / 'pool' berbagi model di inference server / pool, mode 'local' memuat model sendiri."""
+        if INFERENCE_MODE == "pool":
+            logging.info(f"[CCTV {self.cctv_id}] Menggunakan inference pool: {INFERENCE_SERVER_ADDR}")
+            return PoolInferenceClient(INFERENCE_SERVER_ADDR)
+        if INFERENCE_MODE == "server":
+            logging.info(f"[CCTV {self.cctv_id}] Menggunakan inference server: {INFERENCE_SERVER_ADDR}")
+            return InferenceClient(INFERENCE_SERVER_ADDR)
+        return LocalDetector(MODEL_PATH, self.device, MODEL_BACKEND)
 
     def open_stream(self):
-        """Membuka stream RTSP dengan validasi ketat."""
+        """Membuka stream RTSP dengan validasi ketat (backend opencv atau pyav sesuai cctv_data)."""
         cctv = self.cctv_config
         video_path = f"rtsps://{cctv['ip_address']}:{cctv['port']}/{cctv['token']}?enableSrtp"
         os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'rtsp_transport;tcp|stimeout;5000000'
         
-        logging.info(f"[CCTV {self.cctv_id}] Connecting to: {video_path}")
-        cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
-        
-        if not cap.isOpened():
-            # Fallback ke RTSP biasa
-            rtsp_url = video_path.replace("rtsps://", "rtsp://").replace(":7441", ":7447")
-            logging.info(f"[CCTV {self.cctv_id}] Fallback to: {rtsp_url}")
-            cap = cv2.VideoCapture(rtsp_url, cv2.CAP_FFMPEG)
+        # Fallback ke RTSP biasa
+        rtsp_url = video_path.replace("rtsps://", "rtsp://").replace(":7441", ":7447")
+        cap = open_video_source(
+            [video_path, rtsp_url],
+            backend=cctv.get("capture_backend", "opencv"),
+            decode_width=cctv.get("decode_width")
+        )
             
-        if not cap.isOpened():
+        if cap is None:
             # Jika tetap gagal, lempar error agar PM2 mengambil alih
             raise ConnectionError(f"Gagal membuka stream untuk CCTV ID {self.cctv_id}")
             
         return cap
 
-    def capture_loop(self):
+    def _ring_slots(self):
+        return max(int(self._setting('queue_size')), 1) + 1
+
+    def _ensure_ring(self, shape):
+        """Buat (ulang) ring buffer bila belum ada, resolusi stream berubah, atau queue_size diubah."""
+        slots = self._ring_slots()
+        with self.ring_lock:
+            if self.ring is not None and self.ring.shape == tuple(shape) and self.ring.slots == slots:
+                return self.ring
+            if self.ring is not None:
+                logging.warning(f"[CCTV {self.cctv_id}] Ring {self.ring.shape} x{self.ring.slots} -> "
+                                f"{tuple(shape)} x{slots}, ring dibuat ulang.")
+                # Ring lama ditahan satu generasi karena reader mungkin masih memegang frame-nya
+                if self._retired_ring is not None:
+                    self._retired_ring.close()
+                self._retired_ring = self.ring
+            # Nama tetap agar proses lain bisa attach; generasi baru diberi suffix
+            name = f"cctv_ring_{self.cctv_id}" + (f"_{self._ring_generation}" if self._ring_generation else "")
+            self._ring_generation += 1
+            self.ring = SharedFrameRing.create(shape, slots=slots, name=name)
+            return self.ring
+
+    def _decode_into_ring(self, cap, read_fn):
+        """
+        Decode frame langsung ke slot ring buffer (tanpa frame.copy()).
+        read_fn adalah cap.retrieve (mode grab) atau cap.read (mode read).
+        """
+        ring = self.ring
+        if ring is not None and ring.slots != self._ring_slots():
+            ring = self._ensure_ring(ring.shape)
+        if ring is None:
+            ret, frame = read_fn()
+            if not ret or frame is None:
+                return False
+            seq = self._ensure_ring(frame.shape).write(frame)
+        else:
+            slot, buf = ring.begin_write()
+            ret, frame = read_fn(buf)
+            if not ret or frame is None:
+                ring.abort_write(slot)
+                return False
+            if frame.shape != buf.shape:
+                # Decoder mengalokasikan array baru karena resolusi berubah
+                ring.abort_write(slot)
+                seq = self._ensure_ring(frame.shape).write(frame)
+            else:
+                if not np.shares_memory(frame, buf):
+                    np.copyto(buf, frame)
+                seq = ring.commit_write(slot)
+
+        if hasattr(cap, "full_frame_handle"):
+            handle = cap.full_frame_handle()
+            if handle is not None:
+                self.full_frame_handles[seq] = handle
+                # Simpan secukupnya: hanya frame yang masih mungkin ada di ring
+                for old_seq in [k for k in list(self.full_frame_handles) if k <= seq - self.ring.slots]:
+                    self.full_frame_handles.pop(old_seq, None)
+        return True
+
+    def _should_decode(self, now):
+        """
+        Sampler: adaptif per kamera (adaptive_sampling_enabled), berbasis waktu (target_detection_fps),
+        atau berbasis jumlah frame (frame_skip).
+        """
+        if self.sampler.enabled:
+            return self.sampler.should_sample(now, self._last_decode_at)
+        target_fps = self._setting('target_detection_fps')
+        if target_fps > 0:
+            return now - self._last_decode_at >= 1.0 / target_fps
+        return self.frame_count % max(int(self._setting('frame_skip')), 1) == 0
+
+    def _sampler_label(self):
+        if self.sampler.enabled:
+            return f"adaptive {self.sampler.fps:.2f} fps"
+        target_fps = self._setting('target_detection_fps')
+        return f"{target_fps} fps" if target_fps > 0 else f"skip {int(self._setting('frame_skip'))}"
+
+    def capture_loop(self, generation=0):
         """Thread pengambilan frame."""
+        cap = None
         try:
             cap = self.open_stream()
             consecutive_failures = 0
+            logging.info(f"[CCTV {self.cctv_id}] Capture mode: {CAPTURE_MODE}, sampler: {self._sampler_label()}")
             
-            while not self.stop_event.is_set():
-                ret, frame = cap.read()
-                if ret and frame is not None:
+            while not self.stop_event.is_set() and generation == self._capture_generation:
+                if self._reopen_stream.is_set():
+                    # Alamat/token/backend capture berubah lewat config bus: buka ulang stream tanpa restart proses
+                    self._reopen_stream.clear()
+                    logging.info(f"[CCTV {self.cctv_id}] Konfigurasi stream berubah, membuka ulang stream...")
+                    cap.release()
+                    cap = self.open_stream()
+
+                now = time.time()
+                decode = self._should_decode(now)
+
+                if CAPTURE_MODE == "grab":
+                    # grab() hanya mengambil paket & men-decode seperlunya, konversi BGR
+                    # baru terjadi di retrieve() untuk frame yang benar-benar dipakai
+                    ok = cap.grab()
+                    if ok:
+                        self.grabbed_count += 1
+                        if decode:
+                            ok = self._decode_into_ring(cap, cap.retrieve)
+                else:
+                    ok = self._decode_into_ring(cap, cap.read) if decode else cap.read()[0]
+                    if ok:
+                        self.grabbed_count += 1
+
+                if ok:
                     consecutive_failures = 0
-                    if self.frame_count % FRAME_SKIP == 0:
-                        self.frame_queue.append(frame.copy())
                     self.frame_count += 1
+                    if decode or CAPTURE_MODE != "grab":
+                        self.decoded_count += 1
+                    if decode:
+                        self._last_decode_at = now
                 else:
                     consecutive_failures += 1
                     if consecutive_failures > 10:
@@ -106,95 +338,275 @@ class CCTVWorker:
         except Exception as e:
             logging.error(f"[FATAL CAPTURE] {e}")
         finally:
-            # PAKSA MATI: Jika thread ini berhenti, matikan seluruh proses
-            logging.info("Mematikan seluruh proses worker...")
-            os._exit(1)
+            if self.standalone:
+                # PAKSA MATI: Jika thread ini berhenti, matikan seluruh proses
+                logging.info("Mematikan seluruh proses worker...")
+                if self.ring is not None:
+                    self.ring.close()
+                os._exit(1)
+            # Mode host: hanya kamera ini yang berhenti, kamera lain di proses yang sama tetap jalan
+            logging.warning(f"[CCTV {self.cctv_id}] Capture thread (generasi {generation}) berhenti.")
+            if cap is not None:
+                try:
+                    cap.release()
+                except Exception:
+                    pass
 
     def process_loop(self):
         """Thread utama deteksi dengan mode Dual: Stream Only vs Full Detection."""
-        self.model = YOLO(MODEL_PATH).to(self.device)
+        if self.detector is None:
+            self.detector = self.build_detector()
+        if self.tracker is None:
+            self.tracker = CameraTracker()
+        self.viewer_demand = ViewerDemand(redis_client, self.cctv_id)
         
         while not self.stop_event.is_set():
-            if self.frame_queue:
-                try:
-                    # 1. Ambil frame & siapkan anotasi
-                    frame = self.frame_queue.popleft()
-                    annotated = frame.copy()
-                    h, w = frame.shape[:2]
+            self._apply_pending_config()
+            with self.ring_lock:
+                lease = self.ring.acquire_latest() if self.ring is not None else None
+            if lease is None:
+                time.sleep(0.01)
+                continue
 
-                    # 2. Cek Jadwal Aktif (WIB)
-                    active_by_schedule = is_cctv_active_now(self.cctv_id)
-                    
-                    # 3. Ambil Konfigurasi ROI
-                    roi_regions = self.cctv_config.get("roi", [])
-                    json_w = self.cctv_config.get("json_width", CCTV_RATIO[0])
-                    json_h = self.cctv_config.get("json_height", CCTV_RATIO[1])
-
-                    # KONDISI: Jalankan deteksi HANYA JIKA dalam jadwal DAN ada ROI
-                    if active_by_schedule and roi_regions:
-                        # --- [A] MODE FULL DETECTION ---
-                        scale_x, scale_y = w / json_w, h / json_h
-
-                        # Filter Active IDs & ROI Drawing
-                        active_ids = set()
-                        for region in roi_regions:
-                            active_ids.update(region.get("allowed_violations", []))
-                            pts = (region["points"] * [scale_x, scale_y]).astype(np.int32).reshape((-1, 1, 2))
-                            cv2.polylines(annotated, [pts], True, (0, 0, 255), 2)
-                        
-                        active_ids = list(active_ids)
-
-                        # Deteksi YOLO (Langkah Berat)
-                        results = self.model.track(
-                            frame, 
-                            conf=CONFIDENCE_THRESHOLD, 
-                            persist=True, 
-                            tracker="bytetrack.yaml", 
-                            half=(self.device == 'cuda')
-                        )
-
-                        # Proses Deteksi & Pelanggaran
-                        for r in results:
-                            for box in r.boxes:
-                                if box.id is None: continue
-                                x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-                                cls_id, conf, track_id = int(box.cls[0]), float(box.conf[0]), int(box.id[0])
-                                class_name = self.model.names[cls_id]
-
-                                color = get_color_for_class(class_name)
-                                cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
-                                cv2.putText(annotated, f"{class_name} {conf:.2f}", (x1, max(y1-10, 10)), 
-                                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-
-                                class_info = state.OBJECT_CLASS_CACHE.get(class_name)
-                                if class_info and class_info["is_violation"] and class_info["id"] in active_ids:
-                                    process_detection(
-                                        self.cctv_id, frame, annotated, x1, y1, x2, y2,
-                                        cls_id, conf, track_id, self.model, self.tracked_violations
-                                    )
-                    else:
-                        # --- [B] MODE STREAM ONLY (Outside Schedule / No ROI) ---
-                        # Menambahkan label status pada frame agar user tahu alasannya
-                        status_msg = "STREAMING ONLY (Outside Schedule)" if not active_by_schedule else "STREAMING ONLY (No ROI set)"
-                        cv2.putText(annotated, status_msg, (20, 1440), 
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                        
-                    # 4. SELALU Kirim ke Redis agar frontend tidak freeze
-                    _, buffer = cv2.imencode('.jpg', annotated, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                    redis_client.set(f"cctv_frame:{self.cctv_id}", buffer.tobytes(), ex=5)
-
-                except Exception as e:
-                    logging.error(f"[CCTV {self.cctv_id}] Detection Loop Error: {e}")
+            try:
+                # 1. frame & annotated menunjuk slot shared memory yang sama (tanpa salinan).
+                #    Crop pelanggaran diambil dulu dari frame bersih, anotasi digambar sesudahnya.
+                frame = annotated = lease.frame
+                full_frame = self._full_frame_getter(lease.seq)
+                n_detections = 0
+                detect_ms = None
+
+                # 2. Cek Jadwal Aktif (WIB) - dari cache di memori, bukan query DB per frame
+                active_by_schedule = get_schedule_cache(self.cctv_id).is_active_now()
                 
-                gc.collect()
-            else:
-                time.sleep(0.01)
+                # 3. Ambil Konfigurasi ROI
+                roi_regions = self.cctv_config.get("roi", [])
+
+                # KONDISI: Jalankan deteksi HANYA JIKA dalam jadwal DAN ada ROI
+                if active_by_schedule and roi_regions:
+                    # --- [A] MODE FULL DETECTION ---
+                    # Label mask ROI (dibangun ulang hanya jika area/resolusi berubah)
+                    roi_mask = get_roi_mask(self.cctv_id, self.cctv_config, frame.shape[1], frame.shape[0])
+
+                    # Gate gerakan: scene statis di dalam ROI -> detektor dilewati, anotasi memakai track terakhir
+                    if self.motion_gate.should_detect(frame, roi_mask):
+                        started = time.perf_counter()
+                        tracks = self._detect_and_process(frame, annotated, roi_mask, full_frame)
+                        self.motion_gate.mark_detected()
+                        detect_ms = (time.perf_counter() - started) * 1000
+                        self.detect_ms_avg = detect_ms if not self.detect_ms_avg else 0.9 * self.detect_ms_avg + 0.1 * detect_ms
+                        self.last_tracks = tracks
+                    else:
+                        tracks = self.last_tracks
+                    n_detections = len(tracks)
+
+                    status_msg = None
+                else:
+                    # --- [B] MODE STREAM ONLY (Outside Schedule / No ROI) ---
+                    # Label status pada preview agar user tahu alasannya
+                    tracks = None
+                    status_msg = "STREAMING ONLY (Outside Schedule)" if not active_by_schedule else "STREAMING ONLY (No ROI set)"
+
+                # Controller sampling: ramai / cooldown pelanggaran -> fps naik, kosong atau host sibuk -> turun
+                if self.sampler.enabled:
+                    self.sampler.observe(
+                        active=n_detections > 0 or self._violation_in_cooldown(),
+                        latency_ms=detect_ms, cpu_percent=host_cpu_percent()
+                    )
+
+                # 4. Preview hanya digambar + di-encode jika ada yang menonton (key presence dari API)
+                demand = self.viewer_demand.get()
+                if demand is None:
+                    self.preview_skipped += 1
+                else:
+                    jpegs = self._render_previews(annotated, tracks, status_msg, demand)
+                    # Redis Stream terbatas per rendition: pembaca (FrameHub API, recorder, metrik) membaca dengan XREAD
+                    for size, jpeg in jpegs.items():
+                        self._frame_publisher(size).publish(jpeg, captured_at=lease.timestamp, detections=n_detections)
+                    self.preview_encoded += 1
+
+            except Exception as e:
+                logging.error(f"[CCTV {self.cctv_id}] Detection Loop Error: {e}")
+            finally:
+                frame = annotated = None
+                lease.release()
+
+    def _violation_in_cooldown(self):
+        """True jika ada pelanggaran yang tercatat dalam cooldown_seconds terakhir (masih perlu dipantau rapat)."""
+        threshold = time.time() - self._setting('cooldown_seconds')
+        for data in list(self.tracked_violations.values()):
+            if any(t > threshold for t in data.get("last_times", {}).values()):
+                return True
+        return False
+
+    def _detect_and_process(self, frame, annotated, roi_mask, full_frame):
+        """Deteksi + tracking + proses pelanggaran untuk satu frame. Return array track Nx7."""
+        # Deteksi YOLO (Langkah Berat) - lokal atau via inference server,
+        # lalu tracking ByteTrack milik kamera ini sendiri
+        detections = self._detect(frame, roi_mask)
+        tracks = self.tracker.update(detections)
+
+        # Keanggotaan ROI semua track sekaligus
+        roi_ids = roi_mask.lookup(tracks[:, :4])
+
+        # Proses Pelanggaran (crop dari frame yang belum dianotasi)
+        for det, roi_id in zip(tracks, roi_ids):
+            if roi_id < 0:
+                continue
+            x1, y1, x2, y2 = map(int, det[:4])
+            conf, cls_id, track_id = float(det[4]), int(det[5]), int(det[6])
+            class_name = self.detector.names[cls_id]
+
+            class_info = state.OBJECT_CLASS_CACHE.get(class_name)
+            if class_info and class_info["is_violation"] and class_info["id"] in roi_mask.allowed[roi_id]:
+                process_detection(
+                    self.cctv_id, frame, annotated, x1, y1, x2, y2,
+                    cls_id, conf, track_id, self.detector, self.tracked_violations,
+                    full_frame=full_frame, roi_index=int(roi_id), cctv_cfg=self.cctv_config,
+                    settings=self.settings
+                )
+        return tracks
+
+    def _detect(self, frame, roi_mask):
+        """
+        Deteksi pada frame penuh, atau (roi_crop aktif di area kamera) hanya pada bounding box gabungan ROI;
+        box hasil crop digeser kembali ke koordinat frame sehingga tracker & lookup ROI tidak berubah.
+        """
+        confidence = self._setting('confidence_threshold')
+        # area.imgsz: ukuran input model untuk kamera ini (None = default model)
+        imgsz = self.cctv_config.get("imgsz")
+        box = roi_mask.crop_box() if self.cctv_config.get("roi_crop") else None
+        if box is None or roi_mask.area_ratio > ROI_CROP_MAX_RATIO:
+            return self.detector.detect(self.cctv_id, frame, confidence, imgsz)
+
+        x1, y1, x2, y2 = box
+        detections = self.detector.detect(self.cctv_id, frame[y1:y2, x1:x2], confidence, imgsz)
+        if len(detections):
+            detections = detections.copy()
+            detections[:, [0, 2]] += x1
+            detections[:, [1, 3]] += y1
+        self.roi_crop_frames += 1
+        return detections
+
+    def _render_previews(self, frame, tracks, status_msg, demand):
+        """
+        Gambar ROI + box (atau label status) sekali, lalu encode setiap rendition yang sedang ditonton.
+        Anotasi digambar pada rendition terbesar yang diminta (frame diperkecil dulu jika bukan 'full');
+        rendition yang lebih kecil diambil dari hasil tersebut. Untuk 'full', anotasi digambar langsung
+        di slot ring (crop pelanggaran sudah diambil sebelumnya). Return dict size -> bytes JPEG.
+        """
+        h, w = frame.shape[:2]
+        renditions = demand["renditions"]
+        widths = {size: RENDITIONS[size] if 0 < RENDITIONS[size] < w else w for size in renditions}
+        base_width = max(widths.values())
+        if base_width < w:
+            scale = base_width / w
+            canvas = cv2.resize(frame, (base_width, int(h * scale)), interpolation=cv2.INTER_AREA)
+        else:
+            scale = 1.0
+            canvas = frame
+
+        if status_msg is not None:
+            cv2.putText(canvas, status_msg, (20, canvas.shape[0] - 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8 * max(scale, 0.5), (255, 255, 255), 2)
+        else:
+            # Polygon ROI sudah diskalakan & di-cache di RoiMask (per scale preview)
+            roi_mask = get_roi_mask(self.cctv_id, self.cctv_config, w, h)
+            cv2.polylines(canvas, roi_mask.polygons(scale), True, (0, 0, 255), 2)
+
+            for det in tracks:
+                x1, y1, x2, y2 = (int(v * scale) for v in det[:4])
+                class_name = self.detector.names[int(det[5])]
+                color = get_color_for_class(class_name)
+                cv2.rectangle(canvas, (x1, y1), (x2, y2), color, 2)
+                cv2.putText(canvas, f"{class_name} {float(det[4]):.2f}", (x1, max(y1-10, 10)), 
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+        jpegs = {}
+        for size, quality in renditions.items():
+            image = canvas
+            if widths[size] < base_width:
+                target_h = int(canvas.shape[0] * widths[size] / base_width)
+                image = cv2.resize(canvas, (widths[size], target_h), interpolation=cv2.INTER_AREA)
+            _, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+            jpegs[size] = buffer.tobytes()
+        return jpegs
+
+    def _frame_publisher(self, size):
+        publisher = self.frame_publishers.get(size)
+        if publisher is None:
+            publisher = FramePublisher(redis_client, self.cctv_id, size=size, maxlen=FRAME_STREAM_MAXLEN)
+            self.frame_publishers[size] = publisher
+        return publisher
+
+    def _full_frame_getter(self, seq):
+        """Frame resolusi penuh untuk crop, dibuat paling banyak sekali per frame dan hanya jika diminta."""
+        handle = self.full_frame_handles.pop(seq, None)
+        if handle is None:
+            return None
+        cache = []
+        def get():
+            if not cache:
+                cache.append(handle())
+            return cache[0]
+        return get
+
+    def get_status(self):
+        """Ringkasan kondisi worker untuk monitoring (dipublikasikan ke Redis oleh run())."""
+        ring = self.ring
+        return {
+            "cctv_id": self.cctv_id,
+            "name": self.cctv_config.get("name") if self.cctv_config else None,
+            "pid": os.getpid(),
+            "frame_count": self.frame_count,
+            "capture": {
+                "mode": CAPTURE_MODE,
+                "backend": self.cctv_config.get("capture_backend", "opencv") if self.cctv_config else None,
+                "sampler": self._sampler_label(),
+                "adaptive": self.sampler.stats(),
+                "grabbed": self.grabbed_count,
+                "decoded": self.decoded_count,
+                "decode_ratio": round(self.decoded_count / self.grabbed_count, 3) if self.grabbed_count else None,
+                "restarts": self.capture_restarts,
+            },
+            "preview": {
+                "demand": self.viewer_demand.get() if self.viewer_demand else None,
+                "encoded": self.preview_encoded,
+                "skipped": self.preview_skipped,
+            },
+            "roi_crop": {
+                "enabled": bool(self.cctv_config.get("roi_crop")) if self.cctv_config else False,
+                "frames": self.roi_crop_frames,
+            },
+            "imgsz": self.cctv_config.get("imgsz") if self.cctv_config else None,
+            "motion_gate": dict(
+                self.motion_gate.stats(),
+                detect_ms_avg=round(self.detect_ms_avg, 1),
+                # Perkiraan waktu detektor yang dihemat
+                saved_s=round(self.motion_gate.skipped * self.detect_ms_avg / 1000, 1),
+            ),
+            "schedule": get_schedule_cache(self.cctv_id).status(),
+            "config": dict(self.config_watcher.stats(), applied=self.config_applied) if self.config_watcher else None,
+            "db_pool": pool_stats(),
+            "pipelines": pipeline_stats(),
+            "spool": spool_stats(),
+            "violation_writer": writer_stats(),
+            "ring": dict(ring.stats(), name=ring.name) if ring is not None else None,
+            "updated_at": time.time(),
+        }
+
+    def publish_status(self):
+        try:
+            redis_client.set(f"cctv_worker_status:{self.cctv_id}", json.dumps(self.get_status()), ex=10)
+        except Exception as e:
+            logging.warning(f"[CCTV {self.cctv_id}] Gagal publish status: {e}")
 
     def cleanup_loop(self):
         """Membersihkan data pelanggaran lama agar memori tidak bengkak."""
         logging.info(f"[CCTV {self.cctv_id}] Cleanup thread started.")
         while not self.stop_event.is_set():
             now = time.time()
+            cleanup_interval = self._setting('cleanup_interval')
             removed_count = 0
             for track_id in list(self.tracked_violations.keys()):
                 data = self.tracked_violations[track_id]
@@ -203,57 +615,94 @@ class CCTVWorker:
                     continue
                 
                 last_seen = max(last_times.values(), default=0)
-                if now - last_seen > CLEANUP_INTERVAL:
+                if now - last_seen > cleanup_interval:
                     del self.tracked_violations[track_id]
                     removed_count += 1
             
             if removed_count > 0:
                 logging.info(f"[CLEANUP {self.cctv_id}] Berhasil menghapus {removed_count} track lama.")
             
-            time.sleep(CLEANUP_INTERVAL)
+            time.sleep(cleanup_interval)
+
+    def _start_thread(self, role):
+        if role == "capture":
+            self._capture_generation += 1
+            thread = Thread(target=self.capture_loop, args=(self._capture_generation,), daemon=True,
+                            name=f"CapThread-{self.cctv_id}")
+        elif role == "process":
+            thread = Thread(target=self.process_loop, daemon=True, name=f"ProcThread-{self.cctv_id}")
+        else:
+            thread = Thread(target=self.cleanup_loop, daemon=True, name=f"CleanThread-{self.cctv_id}")
+        self.threads[role] = thread
+        thread.start()
+
+    def start(self):
+        """Jalankan thread capture, proses, cleanup + listener config (dipanggil setelah load_config)."""
+        # Hot-reload detection_settings / ROI / jadwal dari API tanpa restart proses
+        self.config_watcher = ConfigWatcher(redis_client, self.cctv_id, self._on_config_change).start()
+        for role in ("capture", "process", "cleanup"):
+            self._start_thread(role)
+        self._health_checked_at = time.time()
+        self._health_frame_count = self.frame_count
+
+    def check_health(self, now):
+        """Watchdog: alasan jika kamera bermasalah (frame macet 15 detik / thread vital mati), selain itu None."""
+        if now - self._health_checked_at > 15:
+            stalled = self.frame_count == self._health_frame_count
+            self._health_frame_count = self.frame_count
+            self._health_checked_at = now
+            if stalled:
+                return "Frame macet selama 15 detik!"
+            self._restart_streak = 0
+        for role in ("capture", "process"):
+            if not self.threads[role].is_alive():
+                return f"Thread vital mati ({role})!"
+        return None
+
+    def recover(self, now):
+        """
+        Mode host: buat ulang thread capture (stream dibuka ulang) dan thread proses jika mati, dengan backoff
+        eksponensial agar kamera yang offline tidak dibuka ulang terus-menerus. Return True jika restart dilakukan.
+        """
+        if now < self._next_restart_at:
+            return False
+        self._restart_streak += 1
+        self._next_restart_at = now + min(2 ** self._restart_streak, 60)
+        self.capture_restarts += 1
+        self._start_thread("capture")
+        if not self.threads["process"].is_alive():
+            self._start_thread("process")
+        self._health_checked_at = now
+        self._health_frame_count = self.frame_count
+        return True
 
     def run(self):
         """Menjalankan semua komponen worker dengan pengawasan ketat."""
         try:
             self.load_config()
             logging.info(f"Worker dimulai untuk {self.cctv_config['name']}")
-            
-            # Mendefinisikan thread
-            t_cap = Thread(target=self.capture_loop, daemon=True, name="CapThread")
-            t_proc = Thread(target=self.process_loop, daemon=True, name="ProcThread")
-            t_clean = Thread(target=self.cleanup_loop, daemon=True, name="CleanThread")
-            
-            t_cap.start()
-            t_proc.start()
-            t_clean.start()
-            
-            last_count = 0
-            last_check_time = time.time()
+            self.start()
+            # Kirim ulang pelanggaran yang tertahan di spool (upload/DB sempat gagal)
+            start_spool_drainer()
 
             while not self.stop_event.is_set():
-                current_time = time.time()
-                
-                # Cek setiap 15 detik jika frame tidak bertambah
-                if current_time - last_check_time > 15:
-                    if self.frame_count == last_count:
-                        logging.error(f"[CCTV {self.cctv_id}] Frame macet selama 15 detik! Memaksa restart...")
-                        os._exit(1) # PM2 akan otomatis restart
-                    
-                    last_count = self.frame_count
-                    last_check_time = current_time
+                problem = self.check_health(time.time())
+                if problem:
+                    logging.error(f"[CCTV {self.cctv_id}] {problem} Memaksa restart...")
+                    os._exit(1) # PM2 akan otomatis restart
 
-                if not t_cap.is_alive() or not t_proc.is_alive():
-                    logging.error("Thread vital mati!")
-                    os._exit(1)
+                self.publish_status()
                     
                 time.sleep(2)
                                 
         except KeyboardInterrupt:
             logging.info("Berhenti via KeyboardInterrupt...")
             self.stop_event.set()
+            shutdown_violation_pipeline()
             os._exit(0) # Keluar normal
         except Exception as e:
             logging.error(f"Worker Fatal Error: {e}")
+            shutdown_violation_pipeline()
             os._exit(1) # Keluar dengan error agar PM2 restart
 
 if __name__ == "__main__":
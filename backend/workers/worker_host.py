@@ -0,0 +1,139 @@
+# worker_host.py
+import sys
+import os
+
+# Mendapatkan path absolut dari direktori 'backend'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import argparse
+import json
+import logging
+import time
+import psutil
+import torch
+
+from workers.worker_cctv import CCTVWorker, redis_client
+from core.detector import LocalDetector, BatchedDetector
+from core.violation_processor import start_spool_drainer, shutdown_violation_pipeline
+from config import MODEL_PATH, MODEL_BACKEND, INFERENCE_MODE, INFERENCE_MAX_BATCH, INFERENCE_MAX_LATENCY_MS
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - [HOST] - %(message)s")
+
+HOST_STATUS_KEY = "cctv_host_status:{}"
+# Kamera yang gagal load_config (DB sibuk / baris belum ada) dicoba lagi setiap N detik
+CONFIG_RETRY_SECONDS = 30
+
+class WorkerHost:
+    """
+    Beberapa kamera dalam satu proses: masing-masing tetap CCTVWorker (capture, proses, cleanup, tracker sendiri),
+    tetapi berbagi satu model (BatchedDetector), satu client Redis, satu pool DB, serta satu pipeline
+    upload/spool/batch writer. Watchdog per kamera hanya membuat ulang thread capture kamera yang bermasalah;
+    proses tidak pernah di-os._exit karena satu kamera.
+    """
+    def __init__(self, host_id, cctv_ids):
+        self.host_id = host_id
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.detector = None
+        if INFERENCE_MODE not in ("server", "pool"):
+            # Mode server/pool: tiap kamera tetap memakai client sendiri (socket tidak dibagi antar thread)
+            self.detector = BatchedDetector(
+                LocalDetector(MODEL_PATH, self.device, MODEL_BACKEND), INFERENCE_MAX_BATCH, INFERENCE_MAX_LATENCY_MS
+            )
+        self.workers = {
+            int(cctv_id): CCTVWorker(cctv_id, detector=self.detector, standalone=False) for cctv_id in cctv_ids
+        }
+        self.started = {}
+        self.started_at = time.time()
+        self._config_retry_at = {}
+
+    def _start_worker(self, worker, now):
+        try:
+            worker.load_config()
+        except Exception as e:
+            logging.error(f"[HOST {self.host_id}] CCTV {worker.cctv_id} gagal load config: {e}")
+            self._config_retry_at[worker.cctv_id] = now + CONFIG_RETRY_SECONDS
+            return False
+        worker.start()
+        logging.info(f"[HOST {self.host_id}] Kamera dimulai: {worker.cctv_config['name']} (CCTV {worker.cctv_id})")
+        return True
+
+    def supervise(self, now):
+        """Satu putaran watchdog untuk semua kamera di host ini."""
+        for cctv_id, worker in self.workers.items():
+            if not self.started.get(cctv_id):
+                if now >= self._config_retry_at.get(cctv_id, 0):
+                    self.started[cctv_id] = self._start_worker(worker, now)
+                continue
+
+            problem = worker.check_health(now)
+            if problem and worker.recover(now):
+                logging.error(f"[HOST {self.host_id}] CCTV {cctv_id}: {problem} Thread capture dibuat ulang "
+                              f"(restart ke-{worker.capture_restarts}).")
+            worker.publish_status()
+
+    def get_status(self):
+        process = psutil.Process()
+        return {
+            "host_id": self.host_id,
+            "pid": os.getpid(),
+            "cameras": sorted(self.workers),
+            "running": sorted(cctv_id for cctv_id, ok in self.started.items() if ok),
+            "capture_restarts": {cctv_id: w.capture_restarts for cctv_id, w in self.workers.items()},
+            "detector": self.detector.stats() if self.detector is not None else {"mode": INFERENCE_MODE},
+            "model": self.detector.detector.describe() if self.detector is not None else None,
+            "rss_mb": round(process.memory_info().rss / 1024 / 1024, 1),
+            "threads": process.num_threads(),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "updated_at": time.time(),
+        }
+
+    def publish_status(self):
+        try:
+            redis_client.set(HOST_STATUS_KEY.format(self.host_id), json.dumps(self.get_status()), ex=10)
+        except Exception as e:
+            logging.warning(f"[HOST {self.host_id}] Gagal publish status: {e}")
+
+    def shutdown(self):
+        for worker in self.workers.values():
+            worker.stop_event.set()
+            if worker.config_watcher is not None:
+                worker.config_watcher.stop()
+        shutdown_violation_pipeline()
+        for worker in self.workers.values():
+            if worker.ring is not None:
+                worker.ring.close()
+
+    def run(self):
+        logging.info(f"[HOST {self.host_id}] Menjalankan {len(self.workers)} kamera: {sorted(self.workers)}")
+        now = time.time()
+        for cctv_id, worker in self.workers.items():
+            self.started[cctv_id] = self._start_worker(worker, now)
+        # Satu drainer spool untuk seluruh host
+        start_spool_drainer()
+
+        try:
+            while True:
+                self.supervise(time.time())
+                self.publish_status()
+                time.sleep(2)
+        except KeyboardInterrupt:
+            logging.info("Berhenti via KeyboardInterrupt...")
+            self.shutdown()
+            os._exit(0)
+        except Exception as e:
+            logging.error(f"Host Fatal Error: {e}")
+            self.shutdown()
+            os._exit(1) # Keluar dengan error agar PM2 restart
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host_id", required=True, help="Nomor host (nama proses PM2 CCTV-HOST-<id>)")
+    parser.add_argument("--cctv_ids", required=True, help="Daftar ID CCTV dipisah koma, mis. 1,4,7")
+    args = parser.parse_args()
+
+    cctv_ids = [int(x) for x in args.cctv_ids.split(",") if x.strip()]
+    WorkerHost(args.host_id, cctv_ids).run()
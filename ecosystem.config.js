@@ -25,6 +25,17 @@ module.exports = {
       autorestart: true
     },
 
+    // 2b. Inference Server (opsional) - satu model YOLO untuk semua kamera.
+    // Aktifkan bersama env INFERENCE_MODE=server agar worker tidak memuat model sendiri.
+    // {
+    //   name: "cctv-inference",
+    //   script: "workers/inference_server.py",
+    //   interpreter: "/Users/macbook/opt/anaconda3/envs/comvis/bin/python",
+    //   cwd: "./backend",
+    //   watch: false,
+    //   autorestart: true
+    // },
+
     // 3. Frontend Server Mac
     {
       name: "cctv-frontend",
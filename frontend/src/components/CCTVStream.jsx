@@ -2,7 +2,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { FaExclamationTriangle, FaCheckCircle, FaRedo } from 'react-icons/fa';
 
-function CCTVStream({ cctvId }) {
+function CCTVStream({ cctvId, size = 'full' }) {
   const [status, setStatus] = useState('Connecting...');
   const [errorCount, setErrorCount] = useState(0);
   const imgRef = useRef(null);
@@ -16,7 +16,8 @@ function CCTVStream({ cctvId }) {
 
     const loadImage = () => {
       const timestamp = Date.now();
-      const streamUrl = `/api/video-feed?id=${cctvId}&t=${timestamp}`;
+      // size: rendition preview dari server (thumb / medium / full)
+      const streamUrl = `/api/video-feed?id=${cctvId}&size=${size}&t=${timestamp}`;
       img.src = streamUrl;
       setStatus('Connecting...');
     };
@@ -47,7 +48,7 @@ function CCTVStream({ cctvId }) {
       img.onerror = null;
       img.src = '';
     };
-  }, [cctvId]);
+  }, [cctvId, size]);
 
   return (
     <div className="max-w-4xl w-full mx-auto bg-white rounded-lg shadow-lg overflow-hidden">